@@ -0,0 +1,76 @@
+"""Prepare issues history tables for bulk loading
+
+Revision ID: 5b2f1c9d7e41
+Revises: 1cda061a421c
+Create Date: 2019-02-11 12:40:21.301457
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '5b2f1c9d7e41'
+down_revision = '1cda061a421c'
+branch_labels = None
+depends_on = None
+
+
+ESTIMATE_TABLES = ('original_estimate', 'remaining_estimate')
+
+
+def upgrade():
+    # every team estimates several kinds of work for an issue, so the kind is a part of estimate identity
+    for table in ESTIMATE_TABLES:
+        op.drop_constraint(f'{table}_begin_datetime_issue_id_team_id_idx', table, type_='unique')
+        op.create_unique_constraint(
+            f'{table}_begin_datetime_issue_team_type_idx',
+            table,
+            ['begin_datetime', 'issue_id', 'team_id', 'implementation_type_id']
+        )
+
+    # unix time is converted to UTC, as loaded issues history stores all times
+    op.alter_column(
+        'issue_history',
+        'resolved',
+        type_=postgresql.TIMESTAMP(),
+        existing_type=postgresql.INTEGER(),
+        existing_nullable=True,
+        postgresql_using="to_timestamp(resolved) AT TIME ZONE 'UTC'"
+    )
+
+    # issues are looked up by key on every load, current versions are looked up by issue
+    op.create_unique_constraint('issue_key_idx', 'issue', ['key'])
+    op.create_index(
+        'issue_history_current_issue_id_idx',
+        'issue_history',
+        ['issue_id'],
+        postgresql_where=sa.text('end_datetime IS NULL')
+    )
+    for table in ESTIMATE_TABLES:
+        op.create_index(
+            f'{table}_current_issue_id_idx', table, ['issue_id'], postgresql_where=sa.text('end_datetime IS NULL')
+        )
+
+
+def downgrade():
+    for table in ESTIMATE_TABLES:
+        op.drop_index(f'{table}_current_issue_id_idx', table)
+    op.drop_index('issue_history_current_issue_id_idx', 'issue_history')
+    op.drop_constraint('issue_key_idx', 'issue', type_='unique')
+
+    op.alter_column(
+        'issue_history',
+        'resolved',
+        type_=postgresql.INTEGER(),
+        existing_type=postgresql.TIMESTAMP(),
+        existing_nullable=True,
+        postgresql_using='extract(epoch from resolved)::integer'
+    )
+
+    for table in ESTIMATE_TABLES:
+        op.drop_constraint(f'{table}_begin_datetime_issue_team_type_idx', table, type_='unique')
+        op.create_unique_constraint(
+            f'{table}_begin_datetime_issue_id_team_id_idx', table, ['begin_datetime', 'issue_id', 'team_id']
+        )
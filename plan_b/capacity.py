@@ -0,0 +1,158 @@
+from datetime import date
+from typing import Dict, List, Optional
+
+from plan_b.team import Team
+from plan_b.plan import Project
+from plan_b.issue_table import IssueTable
+from plan_b.date_utils import get_months_range, get_month_workdays_count
+
+INTEGRATION_RATE = 0.1
+TEST_AUTOMATION_RATE = 0.2
+STABILIZATION_RATE = 0.3
+WORKDAYS_PER_WEEK = 5
+SUPPORT_TASKS_MAN_WEEKS = 1.5
+
+# Calculations below follow formulas of the exported plan, so that order of arithmetic operations matters:
+# calculated values are stored as cached results of the formulas and must be the same as spreadsheet app gets
+
+
+class IssueCapacity:
+    """
+    Effort of dev owned issue in man-weeks
+    """
+
+    def __init__(self, table: IssueTable, row: int):
+        self.reqs_level = table.reqs_level[row]
+        self.design_level = table.design_level[row]
+
+        self.arch_design: float = table.arch_design[row]
+
+        self.implementation_by_team: Dict[str, float] = {
+            name: column[row] for name, column in table.implementation.items()
+        }
+        self.implementation: float = table.implementation_total[row]
+        self.integration: float = self.implementation * INTEGRATION_RATE
+        self.test_automation: float = self.implementation * TEST_AUTOMATION_RATE
+        self.stabilization: float = self.implementation * STABILIZATION_RATE
+
+        self.documentation: float = table.documentation[row]
+
+        self.perf_engineering_by_team: Dict[str, float] = {
+            name: column[row] for name, column in table.perf_design.items()
+        }
+        self.perf_engineering: float = table.perf_design_total[row]
+
+        self.feature_dev: float = \
+            (
+                self.arch_design
+                + self.implementation
+                + self.integration
+                + self.test_automation
+                + self.stabilization
+                + self.documentation
+                + self.perf_engineering
+            ) * self.reqs_level * self.design_level
+
+        # feature development effort is split between teams proportionally to their implementation effort
+        self.feature_dev_by_team: Dict[str, float] = {
+            name: self.feature_dev * value / self.implementation if self.implementation != 0 else 0
+            for name, value in self.implementation_by_team.items()
+        }
+
+        self.qa_effort_by_team: Dict[str, float] = {name: column[row] for name, column in table.qa_effort.items()}
+        self.qa_effort: float = table.qa_effort_total[row]
+
+        self.total: float = self.feature_dev + self.qa_effort
+
+
+class QaIssueCapacity:
+    """
+    Effort of QA owned issue in man-weeks
+    """
+
+    def __init__(self, table: IssueTable, row: int):
+        self.qa_effort_by_team: Dict[str, float] = {name: column[row] for name, column in table.qa_effort.items()}
+        self.qa_effort: float = table.qa_effort_total[row]
+
+
+class ProjectCapacity:
+    """
+    Effort of all project issues and bugs in man-weeks
+    """
+
+    def __init__(self, project: Project, teams: List[Team]):
+        self.table: IssueTable = IssueTable(project.issues, teams)
+        dev_teams = self.table.dev_teams
+        qa_teams = self.table.qa_teams
+
+        self.dev_issues: List[IssueCapacity] = [IssueCapacity(self.table, row) for row in self.table.dev_rows]
+        self.qa_issues: List[QaIssueCapacity] = [QaIssueCapacity(self.table, row) for row in self.table.qa_rows]
+
+        self.feature_dev_by_team: Dict[str, float] = {
+            team.name: sum(x.feature_dev_by_team[team.name] for x in self.dev_issues) for team in dev_teams
+        }
+        self.qa_checks_by_team: Dict[str, float] = {
+            team.name: sum(x.qa_effort_by_team[team.name] for x in self.dev_issues) for team in qa_teams
+        }
+
+        self.new_bugs_by_team: Dict[str, int] = {team.name: self.table.new_bugs_count(team) for team in dev_teams}
+        self.bugfix_by_team: Dict[str, Optional[float]] = {
+            team.name: calculate_bugfix_effort(
+                project.known_bugs_count[team], self.new_bugs_by_team[team.name], team.bugfix_rate
+            )
+            for team in dev_teams
+        }
+
+
+class TeamCapacity:
+    """
+    Available capacity of the team by months of the plan period
+    """
+
+    def __init__(self, team: Team, start_date: date, end_date: date, production_calendar):
+        months = list(get_months_range(start_date, end_date))
+        workdays_count = get_month_workdays_count(start_date, end_date, production_calendar)
+
+        self.months: List[date] = months
+        self.efficiency_by_worker: Dict[str, List[float]] = {
+            worker.name: [worker.efficiency(x) for x in months] for worker in team.members
+        }
+        self.people: List[float] = [
+            sum(x[i] for x in self.efficiency_by_worker.values()) for i in range(len(months))
+        ]
+        self.workdays: List[int] = [workdays_count[x] for x in months]
+        self.weeks: List[float] = [x / WORKDAYS_PER_WEEK for x in self.workdays]
+        self.man_weeks: List[float] = [people * weeks for people, weeks in zip(self.people, self.weeks)]
+        # TODO consider either time of the year or real vacations of people
+        self.vacations: List[float] = [x * 5 / 12 for x in self.people]
+        self.support: List[float] = [SUPPORT_TASKS_MAN_WEEKS for _ in months]
+        self.remaining: List[float] = [
+            man_weeks - vacations - support
+            for man_weeks, vacations, support in zip(self.man_weeks, self.vacations, self.support)
+        ]
+
+    def calculate_difference(self, allocations: List[List]) -> List[float]:
+        """
+        Capacity remaining after allocation of given values in every month
+        """
+        return [
+            remaining - sum_numbers(x[i] for x in allocations)
+            for i, remaining in enumerate(self.remaining)
+        ]
+
+
+def is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def sum_numbers(values) -> float:
+    """
+    Sum of numeric values only, like spreadsheet SUM function does
+    """
+    return sum(x for x in values if is_number(x))
+
+
+def calculate_bugfix_effort(known_bugs_count: int, new_bugs_count: int, bugfix_rate: float) -> Optional[float]:
+    if bugfix_rate is None:
+        return None
+    return (known_bugs_count + new_bugs_count) * bugfix_rate / WORKDAYS_PER_WEEK
@@ -2,29 +2,111 @@ import locale
 import logging
 
 from argparse import ArgumentParser
+from configparser import ConfigParser
 
-from plan_b.exporters.config import make_capacity_plan_from_config
+from plan_b import profiling
 
 log = logging.getLogger(__name__)
 
 
-def do_work(path_to_config: str, path_to_destination: str):
+def _setup_logging():
     logging.basicConfig(
         level=logging.INFO, format='%(asctime)s %(levelname)-5.5s [%(name)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S'
     )
+
+
+def do_work(
+    path_to_config: str, path_to_destination: str, record_snapshot: str = None, replay_snapshot: str = None
+):
+    # modules of exporters and data sources are imported only when they are needed,
+    # so that the app starts fast for --help and config checks
+    from plan_b.exporters.config import make_capacity_plan_from_config
+    from plan_b.issue_data_sources.snapshot import RecordingIssuesDataSource, SnapshotIssuesDataSource
+
+    _setup_logging()
     locale.setlocale(locale.LC_TIME, "en_US.UTF-8")
 
     plan = make_capacity_plan_from_config(path_to_config)
+    if replay_snapshot:
+        plan.data_source = SnapshotIssuesDataSource(replay_snapshot)
+    elif record_snapshot:
+        plan.data_source = RecordingIssuesDataSource(plan.data_source, record_snapshot)
     plan.export(path_to_destination)
+    # snapshot is saved only after successful export, so that a failed run keeps previous one
+    if record_snapshot:
+        plan.data_source.save()
+
+
+def save_history(path_to_config: str, path_to_app_config: str):
+    """
+    Save current state of plan projects work items to issues history database set in [db] section of app config
+    """
+    from plan_b.exporters.config import make_capacity_plan_from_config
+    from plan_b.issues_history import capture_plan_history
+
+    _setup_logging()
+    app_config = ConfigParser()
+    app_config.read(path_to_app_config)
+    db_url = app_config.get('db', 'url', fallback=None)
+    if not db_url:
+        raise RuntimeError(f'App config {path_to_app_config} has no "url" in [db] section')
+
+    capture_plan_history(make_capacity_plan_from_config(path_to_config), db_url)
+
+
+def check_config(path_to_config: str):
+    """
+    Load plan from config file without connecting to data sources and exporting anything
+    """
+    from plan_b.exporters.config import make_capacity_plan_from_config
+
+    _setup_logging()
+    plan = make_capacity_plan_from_config(path_to_config)
+    log.info(
+        'Config is valid: %d team(s), %d project(s), period %s - %s',
+        len(plan.teams), len(plan.projects), plan.start_date, plan.end_date
+    )
 
 
 def main():
     parser = ArgumentParser()
     parser.add_argument('--config', dest='config', help='path to config file')
     parser.add_argument('--destination', dest='destination', help='path to output file')
+    parser.add_argument(
+        '--check-config', dest='check_config', action='store_true', help='validate config file and exit'
+    )
+    parser.add_argument(
+        '--profile', dest='profile', help='path to JSON file to write time, calls and memory usage of run phases to'
+    )
+    snapshot_group = parser.add_mutually_exclusive_group()
+    snapshot_group.add_argument(
+        '--record-snapshot', dest='record_snapshot', help='path to file to record issues exported from data source to'
+    )
+    snapshot_group.add_argument(
+        '--replay-snapshot',
+        dest='replay_snapshot',
+        help='path to recorded issues snapshot to export plan from instead of data source'
+    )
+    parser.add_argument(
+        '--save-history',
+        dest='save_history',
+        help='path to app config file with issues history database url to save work items to instead of export'
+    )
     args = parser.parse_args()
 
-    do_work(args.config, args.destination)
+    if args.profile:
+        profiling.enable()
+    try:
+        if args.check_config:
+            check_config(args.config)
+        elif args.save_history:
+            save_history(args.config, args.save_history)
+        else:
+            do_work(args.config, args.destination, args.record_snapshot, args.replay_snapshot)
+    finally:
+        if args.profile:
+            profiling.write_report(args.profile)
+            log.info('Profiling report written to %s', args.profile)
 
 
 if __name__ == '__main__':
@@ -1,47 +1,117 @@
+from array import array
 from calendar import monthrange
-from datetime import date
-
-from dateutil import rrule
+from datetime import date, datetime, timedelta
+from typing import Iterable
 
 
 def get_months_range(start_date: date, end_date: date):
-    for d in rrule.rrule(
-        freq=rrule.MONTHLY,
-        dtstart=date(start_date.year, start_date.month, 1),
-        until=end_date,
-        bymonthday=1,
-        cache=True
+    """
+    First days of months from month of start_date up to end_date inclusive
+    """
+    if isinstance(end_date, datetime):
+        end_date = end_date.date()
+    year, month = start_date.year, start_date.month
+    while date(year, month, 1) <= end_date:
+        yield date(year, month, 1)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def _weekdays_count(start_date: date, end_date: date) -> int:
+    """
+    Number of days from Monday to Friday between given dates inclusive
+    """
+    days = (end_date - start_date).days + 1
+    if days <= 0:
+        return 0
+    full_weeks, rest = divmod(days, 7)
+    first_weekday = start_date.weekday()
+    return full_weeks * 5 + sum(1 for i in range(rest) if (first_weekday + i) % 7 < 5)
+
+
+class ProductionCalendar:
+    """
+    Workdays of a period compiled to prefix sums of workdays count, so that number of workdays
+    between any dates is calculated in constant time, days outside of the period are regular Mon-Fri weeks
+    """
+
+    def __init__(
+        self, start_date: date, end_date: date, holidays: Iterable[date] = (), workdays: Iterable[date] = ()
     ):
-        yield d.date()
+        self.start_date: date = start_date
+        self.end_date: date = end_date
 
+        holidays = set(holidays)
+        workdays = set(workdays)
 
-def get_month_workdays_count(start_date: date, end_date: date, production_calendar: dict):
-    result = {}
-    for d in get_months_range(start_date, end_date):
-        workdays = 0
+        # number of workdays in the period before every day of the period
+        self._workdays_before = array('l', [0])
+        count = 0
+        day = start_date
+        while day <= end_date:
+            if (day.weekday() < 5 and day not in holidays) or day in workdays:
+                count += 1
+            self._workdays_before.append(count)
+            day += timedelta(days=1)
 
-        _, last_month_day = monthrange(d.year, d.month)
-        for day in rrule.rrule(
-            freq=rrule.DAILY, bymonth=d.month, dtstart=d, until=date(d.year, d.month, last_month_day)
-        ):
-            production_calendar_for_month = production_calendar[d.year][d.month - 1]
+    @classmethod
+    def from_dict(cls, production_calendar: dict) -> 'ProductionCalendar':
+        """
+        Compile calendar described as dict of lists of months indexed by year (see make_production_calendar)
+        """
+        if not production_calendar:
+            return cls(date(1970, 1, 1), date(1969, 12, 31))
+
+        holidays = []
+        workdays = []
+        for year, months in production_calendar.items():
+            for month_idx, month in enumerate(months):
+                for days, target in ((month['holidays'], holidays), (month['workdays'], workdays)):
+                    for day in days:
+                        if 1 <= day <= monthrange(year, month_idx + 1)[1]:
+                            target.append(date(year, month_idx + 1, day))
+
+        return cls(
+            date(min(production_calendar.keys()), 1, 1),
+            date(max(production_calendar.keys()), 12, 31),
+            holidays,
+            workdays
+        )
+
+    def workdays_count(self, start_date: date, end_date: date) -> int:
+        """
+        Number of workdays between given dates inclusive
+        """
+        if start_date > end_date:
+            return 0
 
-            if day.date() < start_date:
-                # skip days before start date
-                continue
+        # parts of the range before and after compiled period
+        result = \
+            _weekdays_count(start_date, min(end_date, self.start_date - timedelta(days=1))) \
+            + _weekdays_count(max(start_date, self.end_date + timedelta(days=1)), end_date)
 
-            if day.date() > end_date:
-                # stop on end date
-                break
+        first = max(start_date, self.start_date)
+        last = min(end_date, self.end_date)
+        if first <= last:
+            result += \
+                self._workdays_before[(last - self.start_date).days + 1] \
+                - self._workdays_before[(first - self.start_date).days]
 
-            if (
-                day.weekday() in (5, 6) or day.day in production_calendar_for_month['holidays']
-            ) and day.day not in production_calendar_for_month['workdays']:
-                # skip holidays
-                continue
+        return result
 
-            workdays += 1
 
-        result[d] = workdays
+def get_month_workdays_count(start_date: date, end_date: date, production_calendar):
+    """
+    Number of workdays in every month of the period, production calendar is either ProductionCalendar
+    or its dict description as returned by make_production_calendar
+    """
+    if not isinstance(production_calendar, ProductionCalendar):
+        production_calendar = ProductionCalendar.from_dict(production_calendar)
+
+    result = {}
+    for d in get_months_range(start_date, end_date):
+        _, last_month_day = monthrange(d.year, d.month)
+        result[d] = production_calendar.workdays_count(
+            max(d, start_date), min(date(d.year, d.month, last_month_day), end_date)
+        )
 
     return result
@@ -9,12 +9,13 @@ from typing import List
 import yaml
 from yarl import URL
 
+from plan_b import profiling
 from plan_b.team import Team, make_worker, Worker, make_team
-from plan_b.plan import Project, CapacityPlan, IssuesDataSource
-from plan_b.date_utils import get_months_range
-from plan_b.exporters.xlsx import export_plan
-from plan_b.exporters.xlsx.metadata import load_metadata
-from plan_b.issue_data_sources.jira import JiraIssuesDataSource
+from plan_b.plan import Project, CapacityPlan, IssuesDataSource, DEFAULT_QUERY_CONCURRENCY
+from plan_b.date_utils import get_months_range, ProductionCalendar
+from plan_b.issue_data_sources.jira import (
+    JiraIssuesDataSource, DEFAULT_COMMENTS_CONCURRENCY, DEFAULT_PAGE_SIZE
+)
 
 SEPARATORS_RX = re.compile('[ \t;]')
 
@@ -28,7 +29,12 @@ def read_teams_from_config(config: dict) -> List[Team]:
         workers: List[Worker] = []
         for m in t.get('members', []):
             workers.append(
-                make_worker(name=m['name'], efficiency=m.get('efficiency'), works_since=m.get('works_since'))
+                make_worker(
+                    name=m['name'],
+                    efficiency=m.get('efficiency'),
+                    works_since=m.get('works_since'),
+                    aliases=m.get('aliases')
+                )
             )
         teams.append(make_team(t['name'], workers, bugfix_rate=t.get('bugfix_rate')))
     return teams
@@ -42,12 +48,34 @@ def read_projects_from_config(config: dict) -> List[Project]:
     return projects
 
 
+def _read_positive_int(section: dict, key: str, default: int, section_title: str) -> int:
+    value = section.get(key, default)
+    if not isinstance(value, int) or value < 1:
+        raise RuntimeError(f'Invalid {key} value "{value}" for {section_title}, it must be a positive integer')
+    return value
+
+
 def read_data_sources_from_config(config: dict) -> List[IssuesDataSource]:
     sources = []
     for ds in config.get('issue_data_sources', []):
         if ds['type'] != 'jira':
             raise RuntimeError(f'Unknown data source type {ds["type"]}')
-        sources.append(JiraIssuesDataSource(ds['name'], URL(ds['url'])))
+        title = f'data source {ds["name"]}'
+        sources.append(
+            JiraIssuesDataSource(
+                ds['name'],
+                URL(ds['url']),
+                comments_concurrency=_read_positive_int(
+                    ds, 'comments_concurrency', DEFAULT_COMMENTS_CONCURRENCY, title
+                ),
+                inline_comments=bool(ds.get('inline_comments', False)),
+                page_size=_read_positive_int(ds, 'page_size', DEFAULT_PAGE_SIZE, title),
+                cache_path=ds.get('cache'),
+                query_concurrency=_read_positive_int(ds, 'query_concurrency', DEFAULT_QUERY_CONCURRENCY, title),
+                count_bugs_on_server=bool(ds.get('count_bugs_on_server', False)),
+                parse_cache_path=ds.get('parse_cache')
+            )
+        )
     return sources
 
 
@@ -88,31 +116,39 @@ def make_production_calendar(calendar_description: dict) -> defaultdict:
 
 class XlsxCapacityPlan(CapacityPlan):
 
-    def __init__(self, **kwargs):
+    def __init__(self, constant_memory: bool = False, **kwargs):
         super().__init__(**kwargs)
         self._output_file = None
+        self._constant_memory: bool = constant_memory
 
     def export(self, output_file_path):
+        # xlsx libraries are imported on export, so that loading of the config does not wait for them
+        from plan_b.exporters.xlsx import export_plan
+        from plan_b.exporters.xlsx.metadata import load_metadata
+
         self._output_file = output_file_path
         plan_edits = None
         if os.path.exists(self._output_file):
             log.info('Output file %s already exists, trying to load its content and scan for changes', self._output_file)
-            plan_edits = load_metadata(self._output_file)
+            with profiling.span('xlsx.load_metadata'):
+                plan_edits = load_metadata(self._output_file)
             log.info('Changes loaded, removing previous file and creating a new one inplace')
             os.unlink(self._output_file)
 
         self._export_issues_for_projects()
 
         log.info('Exporting plan to file %s', self._output_file)
-        export_plan(
-            self.projects,
-            self.teams,
-            self.start_date,
-            self.end_date,
-            self.production_calendar,
-            self._output_file,
-            plan_edits
-        )
+        with profiling.span('xlsx.export_plan'):
+            export_plan(
+                self.projects,
+                self.teams,
+                self.start_date,
+                self.end_date,
+                self.production_calendar,
+                self._output_file,
+                plan_edits,
+                constant_memory=self._constant_memory
+            )
 
 
 def make_capacity_plan_from_config(config_file_path: str) -> XlsxCapacityPlan:
@@ -120,6 +156,13 @@ def make_capacity_plan_from_config(config_file_path: str) -> XlsxCapacityPlan:
     with open(config_file_path) as config_file:
         config = yaml.load(config_file)
 
+    return make_capacity_plan(config)
+
+
+def make_capacity_plan(config: dict) -> XlsxCapacityPlan:
+    """
+    Capacity plan described by config loaded from file
+    """
     p = config['plan']
 
     teams = []
@@ -144,8 +187,11 @@ def make_capacity_plan_from_config(config_file_path: str) -> XlsxCapacityPlan:
     return XlsxCapacityPlan(
         start_date=p['period']['start_date'],
         end_date=p['period']['end_date'],
-        production_calendar=make_production_calendar(config.get('production_calendar', dict())),
+        production_calendar=ProductionCalendar.from_dict(
+            make_production_calendar(config.get('production_calendar', dict()))
+        ),
         issues_data_source=data_sources[0],
         teams=teams,
-        projects=projects
+        projects=projects,
+        constant_memory=bool(p.get('constant_memory', False))
     )
@@ -2,13 +2,15 @@ from datetime import date
 from typing import Dict, List
 from xlsxwriter import Workbook
 
+from plan_b import profiling
 from plan_b.team import Team
 from plan_b.plan import Project
 from plan_b.exporters.xlsx.formats import init_formats
-from plan_b.exporters.xlsx.metadata import save_metadata, TeamAllocation
+from plan_b.exporters.xlsx.metadata import save_plan_state, TeamAllocation
 from plan_b.exporters.xlsx.project import fill_project_worksheet
-from plan_b.exporters.xlsx.team_calendar import fill_calendar_plan_worksheet, apply_plan_edits_to_team_calendar
-from plan_b.exporters.xlsx.utils import write_row, Region, Pos, RelPos, merge_dicts
+from plan_b.exporters.xlsx.team_calendar import fill_calendar_plan_worksheet
+from plan_b.exporters.xlsx.layout import make_plan_layout
+from plan_b.exporters.xlsx.utils import RowOrderedSheet
 
 
 def export_plan(
@@ -18,44 +20,57 @@ def export_plan(
     end_date: date,
     production_calendar: dict,
     output_file: str,
-    team_allocations: Dict[str, TeamAllocation]
+    team_allocations: Dict[str, TeamAllocation],
+    constant_memory: bool = False
 ):
-    workbook = Workbook(output_file)
+    """
+    Write capacity plan to xlsx file, in constant_memory mode rows of every worksheet are written
+    to temporary files as soon as they are complete instead of keeping the whole workbook in memory
+    """
+    workbook = Workbook(output_file, {'constant_memory': constant_memory})
     init_formats(workbook)
 
     sheets_by_team = {}
     for team in teams:
-        sheets_by_team[team] = workbook.add_worksheet(team.name)
+        sheets_by_team[team] = RowOrderedSheet(workbook.add_worksheet(team.name))
 
     sheets_by_project = {}
     for project in projects:
-        sheets_by_project[project] = workbook.add_worksheet(project.name)
+        sheets_by_project[project] = RowOrderedSheet(workbook.add_worksheet(project.name))
 
-    total_cells_by_team = {}
-    for project, sheet in sheets_by_project.items():
-        total_cells_by_team = merge_dicts(
-            total_cells_by_team,
-            fill_project_worksheet(sheet, project, teams)
-        )
+    with profiling.span('xlsx.make_plan_layout'):
+        layout = make_plan_layout(projects, teams, start_date, end_date, production_calendar)
 
-    team_allocation_regions: Dict[Team, Dict[str, Region]] = {}
+    for project, sheet in sheets_by_project.items():
+        with profiling.span('xlsx.fill_project_worksheet'):
+            fill_project_worksheet(sheet, project, teams, layout.projects[project])
     for team, sheet in sheets_by_team.items():
-        team_allocation_regions[team] = fill_calendar_plan_worksheet(
-            sheet,
+        with profiling.span('xlsx.fill_calendar_plan_worksheet'):
+            fill_calendar_plan_worksheet(
+                sheet,
+                start_date,
+                end_date,
+                team,
+                len(projects),
+                layout.teams[team],
+                team_allocations[team.name] if team_allocations else None
+            )
+
+    with profiling.span('xlsx.flush_worksheets'):
+        for sheet in sheets_by_project.values():
+            sheet.flush()
+
+        for sheet in sheets_by_team.values():
+            sheet.flush()
+
+    with profiling.span('xlsx.save_plan_state'):
+        save_plan_state(
+            workbook,
             start_date,
             end_date,
-            team,
-            production_calendar,
-            projects,
-            total_cells_by_team[team]
+            {team: layout.teams[team].allocation_regions for team in teams},
+            team_allocations
         )
 
-        if team_allocations:
-            apply_plan_edits_to_team_calendar(
-                sheet, team_allocations[team.name], team_allocation_regions[team]
-            )
-
-    sheet = workbook.add_worksheet('Meta')
-    save_metadata(sheet, start_date, end_date, team_allocation_regions)
-
-    workbook.close()
+    with profiling.span('xlsx.workbook_close'):
+        workbook.close()
@@ -103,45 +103,56 @@ conf_level_low_format = None
 
 
 __workbook = None
+__formats_registry = {}
 
 
 def init_formats(workbook: Workbook):
     global __workbook
     __workbook = workbook
 
+    global __formats_registry
+    __formats_registry = {}
+
     global green_header_format
-    green_header_format = workbook.add_format(GREEN_HEADER)
+    green_header_format = get_format(GREEN_HEADER)
 
     global bold_total_format
-    bold_total_format = workbook.add_format(BOLD_TOTAL)
+    bold_total_format = get_format(BOLD_TOTAL)
 
     global bold_total_no_borders_format
-    bold_total_no_borders_format = workbook.add_format(BOLD_TOTAL_NO_BORDERS)
+    bold_total_no_borders_format = get_format(BOLD_TOTAL_NO_BORDERS)
 
     global centered_header_format
-    centered_header_format = workbook.add_format(CENTERED_HEADER)
+    centered_header_format = get_format(CENTERED_HEADER)
 
     global numeric_format
-    numeric_format = workbook.add_format(NUMERIC)
+    numeric_format = get_format(NUMERIC)
 
     global centered_vertical_text_header_format
-    centered_vertical_text_header_format = workbook.add_format(CENTERED_VERTICAL_TEXT_HEADER)
+    centered_vertical_text_header_format = get_format(CENTERED_VERTICAL_TEXT_HEADER)
 
     global numeric_border_left_format
-    numeric_border_left_format = workbook.add_format(NUMERIC_BORDER_LEFT)
+    numeric_border_left_format = get_format(NUMERIC_BORDER_LEFT)
 
     global numeric_border_right_format
-    numeric_border_right_format = workbook.add_format(NUMERIC_BORDER_RIGHT)
+    numeric_border_right_format = get_format(NUMERIC_BORDER_RIGHT)
 
     global centered_header_border_format
-    centered_header_border_format = workbook.add_format(CENTERED_HEADER_BORDER)
+    centered_header_border_format = get_format(CENTERED_HEADER_BORDER)
 
     global centered_vertical_text_header_left_border_format
-    centered_vertical_text_header_left_border_format = workbook.add_format(CENTERED_VERTICAL_TEXT_HEADER_LEFT_BORDER)
+    centered_vertical_text_header_left_border_format = get_format(CENTERED_VERTICAL_TEXT_HEADER_LEFT_BORDER)
 
     global centered_vertical_text_header_right_border_format
-    centered_vertical_text_header_right_border_format = workbook.add_format(CENTERED_VERTICAL_TEXT_HEADER_RIGHT_BORDER)
+    centered_vertical_text_header_right_border_format = get_format(CENTERED_VERTICAL_TEXT_HEADER_RIGHT_BORDER)
 
 
 def get_format(format_desc: dict):
-    return __workbook.add_format(format_desc)
+    """
+    Format of the workbook with given properties, formats with equal properties are created only once
+    """
+    key = frozenset(format_desc.items())
+    result = __formats_registry.get(key)
+    if result is None:
+        result = __formats_registry[key] = __workbook.add_format(format_desc)
+    return result
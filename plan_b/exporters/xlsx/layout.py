@@ -0,0 +1,213 @@
+from datetime import date
+from typing import Dict, List, Tuple
+
+from plan_b.team import Team
+from plan_b.plan import Project, Issue
+from plan_b.capacity import ProjectCapacity, TeamCapacity
+from plan_b.date_utils import get_months_range, ProductionCalendar
+from plan_b.exporters.xlsx.metadata import CellReference
+from plan_b.exporters.xlsx.utils import Pos, RelPos, Region, merge_dicts
+
+
+PROJECT_TABLES_SPACING = 2
+CALENDAR_TABLE_HEADER_ROWS = 8  # months, people, working days, weeks, man * weeks, vacations, support, remaining
+
+
+class ProjectSheetLayout:
+    """
+    Positions of project worksheet tables and references to team totals used by team calendars
+    """
+
+    def __init__(
+        self,
+        dev_issues: List[Issue],
+        qa_issues: List[Issue],
+        dev_table: Region,
+        bugs_table: Region,
+        qa_table: Region,
+        total_cells_by_team: Dict[Team, List[CellReference]],
+        capacity: ProjectCapacity
+    ):
+        self.dev_issues: List[Issue] = dev_issues
+        self.qa_issues: List[Issue] = qa_issues
+        self.dev_table: Region = dev_table
+        self.bugs_table: Region = bugs_table
+        self.qa_table: Region = qa_table
+        self.total_cells_by_team: Dict[Team, List[CellReference]] = total_cells_by_team
+        self.capacity: ProjectCapacity = capacity
+
+
+class TeamSheetLayout:
+    """
+    Positions of team calendar worksheet tables, allocation regions are indexed by title of referenced total
+    """
+
+    def __init__(
+        self,
+        capacity_table: Region,
+        calendar_offset: Pos,
+        total_cells: List[CellReference],
+        allocation_regions: Dict[str, Region],
+        capacity: TeamCapacity
+    ):
+        self.capacity_table: Region = capacity_table
+        self.calendar_offset: Pos = calendar_offset
+        self.total_cells: List[CellReference] = total_cells
+        self.allocation_regions: Dict[str, Region] = allocation_regions
+        self.capacity: TeamCapacity = capacity
+
+
+class PlanLayout:
+
+    def __init__(self, projects: Dict[Project, ProjectSheetLayout], teams: Dict[Team, TeamSheetLayout]):
+        self.projects: Dict[Project, ProjectSheetLayout] = projects
+        self.teams: Dict[Team, TeamSheetLayout] = teams
+
+
+def _make_dev_table_layout(
+    project: Project, dev_issues: List[Issue], capacity: ProjectCapacity, teams: List[Team], offset: Pos
+) -> Tuple[Region, Dict[Team, CellReference]]:
+    if not dev_issues:
+        return Region(offset, 1, 0), dict()
+
+    dev_teams = [x for x in teams if x.is_dev()]
+    qa_teams = [x for x in teams if x.is_qa()]
+
+    header_rows = 3
+    totals_row = offset.row + header_rows + len(dev_issues)
+
+    # cell references to totals for every team incl dev and qa
+    total_cells_by_team = {}
+    for i, team in enumerate(dev_teams):
+        total_cells_by_team[team] = CellReference(
+            Pos(totals_row, offset.column + 11 + 2 * len(dev_teams) + i, project.name),
+            project.name,
+            capacity.feature_dev_by_team[team.name]
+        )
+    for i, team in enumerate(qa_teams):
+        total_cells_by_team[team] = CellReference(
+            Pos(totals_row, offset.column + 12 + 3 * len(dev_teams) + i, project.name),
+            f'{project.name} checks',
+            capacity.qa_checks_by_team[team.name]
+        )
+
+    return \
+        Region(offset, header_rows + len(dev_issues) + 1, 14 + 3 * len(dev_teams) + len(qa_teams)), \
+        total_cells_by_team
+
+
+def _make_bugs_table_layout(
+    project: Project, capacity: ProjectCapacity, teams: List[Team], offset: Pos
+) -> Tuple[Region, Dict[Team, CellReference]]:
+    dev_teams = [x for x in teams if x.is_dev()]
+
+    total_cells_by_team = {}
+    for row, team in enumerate(dev_teams):
+        total_cells_by_team[team] = CellReference(
+            RelPos(offset, 1 + row, 4, sheet_name=project.name),
+            f'{project.name} bugfix',
+            capacity.bugfix_by_team[team.name]
+        )
+
+    return Region(offset, 1 + len(dev_teams), 5), total_cells_by_team
+
+
+def _make_qa_table_layout(
+    project: Project, qa_issues: List[Issue], capacity: ProjectCapacity, teams: List[Team], offset: Pos
+) -> Tuple[Region, Dict[Team, List[CellReference]]]:
+    if not qa_issues:
+        return Region(offset, 1, 0), dict()
+
+    qa_teams = [x for x in teams if x.is_qa()]
+
+    header_rows = 2
+    total_cells_by_team = {}
+    for row, issue in enumerate(qa_issues):
+        for i, team in enumerate(qa_teams):
+            total_cells_by_team.setdefault(team, []).append(
+                CellReference(
+                    RelPos(offset, header_rows + row, 2 + i, sheet_name=project.name),
+                    issue.issue_summary,
+                    capacity.qa_issues[row].qa_effort_by_team[team.name]
+                )
+            )
+
+    return Region(offset, header_rows + len(qa_issues) + 1, 3 + len(qa_teams)), total_cells_by_team
+
+
+def make_project_sheet_layout(project: Project, teams: List[Team]) -> ProjectSheetLayout:
+    capacity = ProjectCapacity(project, teams)
+    dev_issues = [project.issues[row] for row in capacity.table.dev_rows]
+    qa_issues = [project.issues[row] for row in capacity.table.qa_rows]
+
+    dev_table, dev_total_cells = _make_dev_table_layout(project, dev_issues, capacity, teams, Pos())
+    bugs_table, bugs_total_cells = _make_bugs_table_layout(
+        project, capacity, teams, RelPos(dev_table.pos_below(), PROJECT_TABLES_SPACING)
+    )
+    qa_table, qa_total_cells = _make_qa_table_layout(
+        project, qa_issues, capacity, teams, RelPos(bugs_table.pos_below(), PROJECT_TABLES_SPACING)
+    )
+
+    return ProjectSheetLayout(
+        dev_issues,
+        qa_issues,
+        dev_table,
+        bugs_table,
+        qa_table,
+        merge_dicts(bugs_total_cells, merge_dicts(dev_total_cells, qa_total_cells)),
+        capacity
+    )
+
+
+def make_team_sheet_layout(
+    team: Team,
+    start_date: date,
+    end_date: date,
+    production_calendar: ProductionCalendar,
+    total_cells: List[CellReference]
+) -> TeamSheetLayout:
+    months_count = len(list(get_months_range(start_date, end_date)))
+
+    capacity_table = Region(Pos(0, 0), 2 + len(team.members), months_count)
+    calendar_offset = RelPos(capacity_table.pos_below(), 1)
+
+    allocations_offset = RelPos(calendar_offset, CALENDAR_TABLE_HEADER_ROWS)
+    allocation_regions = {}
+    for row, cell_ref in enumerate(total_cells):
+        allocation_regions[cell_ref.title] = Region(RelPos(allocations_offset, row), 1, months_count)
+
+    return TeamSheetLayout(
+        capacity_table,
+        calendar_offset,
+        total_cells,
+        allocation_regions,
+        TeamCapacity(team, start_date, end_date, production_calendar)
+    )
+
+
+def make_plan_layout(
+    projects: List[Project],
+    teams: List[Team],
+    start_date: date,
+    end_date: date,
+    production_calendar: ProductionCalendar
+) -> PlanLayout:
+    """
+    Positions of all tables and cross-sheet references of the plan workbook along with capacity model values,
+    computed before anything is written, so that worksheets could be filled independently of each other
+    """
+    project_layouts = {}
+    total_cells_by_team = {}
+    for project in projects:
+        project_layouts[project] = make_project_sheet_layout(project, teams)
+        total_cells_by_team = merge_dicts(total_cells_by_team, project_layouts[project].total_cells_by_team)
+
+    return PlanLayout(
+        project_layouts,
+        {
+            team: make_team_sheet_layout(
+                team, start_date, end_date, production_calendar, total_cells_by_team.get(team, [])
+            )
+            for team in teams
+        }
+    )
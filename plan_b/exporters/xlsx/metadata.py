@@ -1,15 +1,28 @@
-import dateutil
+import base64
+import json
+import zlib
+import dateutil.parser
 
 from datetime import date
-from openpyxl import load_workbook
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
+from zipfile import ZipFile
+
+from xlsxwriter import Workbook
 
 from plan_b.team import Team
 from plan_b.date_utils import get_months_range
-from plan_b.exporters.xlsx.utils import Pos, write_row, RelPos, Region
+from plan_b.exporters.xlsx.reader import XlsxValuesReader
+from plan_b.exporters.xlsx.utils import Pos, Region
+
 
+METADATA_HEADER = 'CAPACITY PLAN METADATA v0.2 - DO NOT EDIT'  # header of Meta worksheet of older files
 
-METADATA_HEADER = 'CAPACITY PLAN METADATA v0.2 - DO NOT EDIT'
+PLAN_STATE_VERSION = 1
+PLAN_STATE_PROPERTY = 'plan_b_state'
+PLAN_STATE_CHUNK_SIZE = 255  # limit of text custom property length
+
+# item name, row, first column, number of columns, values written to the region (if known)
+AllocationItem = Tuple[str, int, int, int, Optional[list]]
 
 
 class ItemAllocation:
@@ -28,91 +41,144 @@ class TeamAllocation:
 
 class CellReference:
 
-    def __init__(self, pos: Pos, title: str):
+    def __init__(self, pos: Pos, title: str, value: Optional[float] = None):
         self.pos: Pos = pos
         self.title: str = title
+        self.value: Optional[float] = value  # calculated value of the referenced cell
 
 
-def save_metadata(
-    sheet, start_date: date, end_date: date, allocations_by_team: Dict[Team, Dict[str, Region]]
+def save_plan_state(
+    workbook: Workbook,
+    start_date: date,
+    end_date: date,
+    allocations_by_team: Dict[Team, Dict[str, Region]],
+    team_allocations: Optional[Dict[str, TeamAllocation]] = None
 ):
-    offset = Pos(0, 0)
-    write_row(sheet, offset, cell_generator=[METADATA_HEADER])
-    write_row(
-        sheet,
-        RelPos(offset, 1),
-        cell_generator=['Period', start_date.isoformat(), end_date.isoformat()]
-    )
-    write_row(sheet, RelPos(offset, 2), cell_generator=['Team calendars'])
-    offset = RelPos(offset, 3)
-    row = 0
+    """
+    Store plan period, positions of team allocation regions and values written to them
+    as compressed JSON in custom properties of the workbook, which are kept by spreadsheet editors
+    """
+    teams = {}
     for team, allocations in allocations_by_team.items():
-        write_row(sheet, RelPos(offset, row), cell_generator=['Team', team.name])
-        row += 1
-        for item_name, table_pos in allocations.items():
-            write_row(
-                sheet,
-                RelPos(offset, row),
-                cell_generator=[
-                    'Item',
-                    item_name,
-                    table_pos.offset.row,
-                    table_pos.offset.column,
-                    table_pos.rows,
-                    table_pos.columns
-                ]
-            )
-            row += 1
-
+        previous_allocation = team_allocations.get(team.name) if team_allocations else None
+        items = teams[team.name] = {}
+        for item_name, region in allocations.items():
+            item = previous_allocation.items.get(item_name) if previous_allocation else None
+            items[item_name] = [
+                region.offset.row,
+                region.offset.column,
+                region.rows,
+                region.columns,
+                [x[1] for x in item.allocations] if item else None
+            ]
+
+    state = json.dumps(
+        {'version': PLAN_STATE_VERSION, 'period': [start_date.isoformat(), end_date.isoformat()], 'teams': teams},
+        separators=(',', ':'),
+        default=str
+    )
+    encoded_state = base64.b64encode(zlib.compress(state.encode())).decode()
+    for i in range(0, len(encoded_state), PLAN_STATE_CHUNK_SIZE):
+        workbook.set_custom_property(
+            f'{PLAN_STATE_PROPERTY}.{i // PLAN_STATE_CHUNK_SIZE:05d}', encoded_state[i:i + PLAN_STATE_CHUNK_SIZE]
+        )
 
-def load_metadata(filename: str) -> Dict[str, TeamAllocation]:
-    workbook = load_workbook(filename, read_only=True)
 
-    metadata_sheet = workbook['Meta']
+def _load_plan_state(reader: XlsxValuesReader) -> Optional[Tuple[List[date], Dict[str, List[AllocationItem]]]]:
+    chunks = sorted(
+        (name, value) for name, value in reader.read_custom_properties().items()
+        if name.startswith(f'{PLAN_STATE_PROPERTY}.')
+    )
+    if not chunks:
+        return None
+
+    state = json.loads(zlib.decompress(base64.b64decode(''.join(x[1] for x in chunks))).decode())
+    if state.get('version') != PLAN_STATE_VERSION:
+        raise ValueError(f'Unsupported plan state version {state.get("version")}')
+
+    start_date, end_date = (dateutil.parser.parse(x) for x in state['period'])
+    items_by_team = {
+        team_name: [
+            (item_name, row, column, columns, values) for item_name, (row, column, _, columns, values) in items.items()
+        ]
+        for team_name, items in state['teams'].items()
+    }
+    return list(get_months_range(start_date, end_date)), items_by_team
+
+
+def _load_metadata_sheet(reader: XlsxValuesReader) -> Tuple[List[date], Dict[str, List[AllocationItem]]]:
+    """
+    Plan state of files exported before it was stored in workbook properties
+    """
+    metadata_rows = []
+    for (row, column), value in reader.read_cells('Meta').items():
+        while len(metadata_rows) <= row:
+            metadata_rows.append([])
+        cells = metadata_rows[row]
+        cells.extend([None] * (column + 1 - len(cells)))
+        cells[column] = value
+
+    if not metadata_rows or not metadata_rows[0] or metadata_rows[0][0] != METADATA_HEADER:
+        raise ValueError('Invalid header in metadata section detected')
 
-    row_idx = 0
     team_calendar_flag = False
-
-    team_allocations = {}
-
-    team_sheet = None
     months_range = None
     current_team = None
+    items_by_team = {}
 
-    for row in metadata_sheet.rows:
-        if row_idx == 0:
-            if row[0].value != METADATA_HEADER:
-                raise ValueError('Invalid header in metadata section detected')
-
-        if row[0].value == 'Period':
-            start_date = dateutil.parser.parse(row[1].value)
-            end_date = dateutil.parser.parse(row[2].value)
+    for row in metadata_rows:
+        row = row + [None] * (6 - len(row))
+        if row[0] == 'Period':
+            start_date = dateutil.parser.parse(row[1])
+            end_date = dateutil.parser.parse(row[2])
             months_range = list(get_months_range(start_date, end_date))
 
-        if row[0].value == 'Team calendars':
+        if row[0] == 'Team calendars':
             team_calendar_flag = True
 
         if team_calendar_flag:
+            if row[0] == 'Team':
+                current_team = row[1]
+                items_by_team[current_team] = []
+            elif row[0] == 'Item':
+                items_by_team[current_team].append((row[1], row[2], row[3], row[5], None))
 
-            if row[0].value == 'Team':
-                current_team = row[1].value
-                team_allocations[current_team] = TeamAllocation(current_team)
-                team_sheet = workbook[current_team]
-
-            elif row[0].value == 'Item':
-                current_team_allocation = team_allocations[current_team]
+    return months_range, items_by_team
 
-                item_row, item_start_column, item_column_count = row[2].value, row[3].value, row[5].value
-                month_idx = 0
-                item_allocation = ItemAllocation(row[1].value)
 
-                item_cells = team_sheet[item_row + 1][item_start_column: item_start_column + item_column_count]
-                for cell in item_cells:
-                    item_allocation.allocations.append((months_range[month_idx], cell.value))
-                    month_idx += 1
-
-                current_team_allocation.items[item_allocation.name] = item_allocation
-
-        row_idx += 1
+def load_metadata(filename: str) -> Dict[str, TeamAllocation]:
+    """
+    Plan edits made in previously exported file, plan state and every team worksheet are read in a single pass
+    """
+    with ZipFile(filename) as package:
+        reader = XlsxValuesReader(package)
+        months_range, items_by_team = _load_plan_state(reader) or _load_metadata_sheet(reader)
+
+        team_allocations = {}
+        for team_name, items in items_by_team.items():
+            if team_name in reader.sheet_names:
+                team_cells = reader.read_cells(
+                    team_name,
+                    {
+                        (item_row, column)
+                        for _, item_row, item_start_column, item_column_count, _ in items
+                        for column in range(item_start_column, item_start_column + item_column_count)
+                    }
+                )
+            else:
+                # worksheet was renamed or removed, values written to it are used
+                team_cells = {
+                    (item_row, item_start_column + i): value
+                    for _, item_row, item_start_column, _, values in items for i, value in enumerate(values or [])
+                }
+
+            team_allocation = team_allocations[team_name] = TeamAllocation(team_name)
+            for item_name, item_row, item_start_column, item_column_count, _ in items:
+                item_allocation = ItemAllocation(item_name)
+                for month_idx in range(item_column_count):
+                    item_allocation.allocations.append(
+                        (months_range[month_idx], team_cells.get((item_row, item_start_column + month_idx)))
+                    )
+                team_allocation.items[item_allocation.name] = item_allocation
 
     return team_allocations
@@ -1,13 +1,16 @@
-from typing import Dict, List, Tuple
+from typing import List
 from enum import IntEnum
 
 from plan_b.team import Team, DevTeam
 from plan_b.plan import Project, Issue
-from plan_b.issue import seconds_to_man_weeks
-from plan_b.exporters.xlsx.utils import Pos, RelPos, write_row, Region
-from plan_b.exporters.xlsx.metadata import CellReference
+from plan_b.capacity import (
+    IssueCapacity, QaIssueCapacity, ProjectCapacity, is_number, INTEGRATION_RATE, TEST_AUTOMATION_RATE,
+    STABILIZATION_RATE
+)
+from plan_b.exporters.xlsx.utils import Pos, RelPos, write_row, Region, Formula, get_cell_value
+from plan_b.exporters.xlsx.layout import ProjectSheetLayout
 from plan_b.exporters.xlsx import formats
-from plan_b.exporters.xlsx.utils import merge_cells, merge_dicts
+from plan_b.exporters.xlsx.utils import merge_cells
 
 
 class BorderPos(IntEnum):
@@ -32,83 +35,73 @@ def _get_format_for_confidence_level(level: int, border_pos: BorderPos):
     return formats.get_format(format_desc)
 
 
-def _create_cells_for_issue(issue: Issue, teams: List[Team], offset: Pos) -> List:
-    dev_teams = [team for team in teams if team.is_dev()]
-
+def _create_cells_for_issue(
+    issue: Issue, capacity: IssueCapacity, dev_teams: List[Team], qa_teams: List[Team], offset: Pos
+) -> List:
     values = [
         [{'url': issue.issue_url, 'string': issue.issue_key}, 'write_url'],
         issue.issue_summary,
     ]
 
     # requirements confidence level
-    reqs_level = 0 if issue.owned_by_team and issue.owned_by_team.is_qa() else \
-        (max([item.reqs_level.value for item in issue.remaining_estimates_by_team.values() if item.reqs_level] or [2]))
-    values.append([reqs_level, _get_format_for_confidence_level(reqs_level, BorderPos.Left)])
+    values.append([capacity.reqs_level, _get_format_for_confidence_level(capacity.reqs_level, BorderPos.Left)])
     reqs_level_pos = RelPos(offset, column=len(values) - 1)
 
     # design confidence level
-    design_level = 0 if issue.owned_by_team and issue.owned_by_team.is_qa() else \
-        (
-            max(
-                [
-                    item.design_level.value
-                    for item in issue.remaining_estimates_by_team.values() if item.design_level]
-                or [2]
-            )
-        )
-    values.append([design_level, _get_format_for_confidence_level(design_level, BorderPos.Right)])
+    values.append([capacity.design_level, _get_format_for_confidence_level(capacity.design_level, BorderPos.Right)])
     design_level_pos = RelPos(offset, column=len(values) - 1)
 
-    arch_design = seconds_to_man_weeks(
-        sum(item.arch_design or 0 for item in issue.remaining_estimates_by_team.values())
-    )
-    values.append([arch_design, formats.numeric_format])
+    values.append([capacity.arch_design, formats.numeric_format])
     arch_design_pos = RelPos(offset, column=len(values) - 1)
 
     team_impl_pos = {}
     for i in range(len(dev_teams)):
         team = dev_teams[i]
         values.append([
-            seconds_to_man_weeks(issue.remaining_estimates_by_team[team.name].implementation or 0),
+            capacity.implementation_by_team[team.name],
             formats.numeric_border_left_format if i == 0 else formats.numeric_format
         ])
         team_impl_pos[team.name] = RelPos(offset, column=len(values) - 1)
     # total for impl and unit tests
     values.append([
-        f'=SUM('
-        f'{RelPos(offset, column=len(values) - len(dev_teams)).to_cell()}'
-        f':{RelPos(offset, column=len(values) - 1).to_cell()}'
-        f')',
+        Formula(
+            f'=SUM('
+            f'{RelPos(offset, column=len(values) - len(dev_teams)).to_cell()}'
+            f':{RelPos(offset, column=len(values) - 1).to_cell()}'
+            f')',
+            capacity.implementation
+        ),
         formats.numeric_border_right_format
     ])
     impl_total_pos = RelPos(offset, column=len(values) - 1)
 
-    values.append(f'={impl_total_pos.to_cell()} * 0.1')  # integration
+    values.append(Formula(f'={impl_total_pos.to_cell()} * {INTEGRATION_RATE}', capacity.integration))
     integration_pos = RelPos(offset, column=len(values) - 1)
 
-    values.append(f'={impl_total_pos.to_cell()} * 0.2')  # test automation
+    values.append(Formula(f'={impl_total_pos.to_cell()} * {TEST_AUTOMATION_RATE}', capacity.test_automation))
     test_automation_pos = RelPos(offset, column=len(values) - 1)
 
-    values.append(f'={impl_total_pos.to_cell()} * 0.3')  # stabilization
+    values.append(Formula(f'={impl_total_pos.to_cell()} * {STABILIZATION_RATE}', capacity.stabilization))
     stabilization_pos = RelPos(offset, column=len(values) - 1)
 
-    values.append(
-        seconds_to_man_weeks(sum(item.documentation or 0 for item in issue.remaining_estimates_by_team.values()))
-    )
+    values.append(capacity.documentation)
     documentation_pos = RelPos(offset, column=len(values) - 1)
 
     for i in range(len(dev_teams)):
         team = dev_teams[i]
         values.append([
-            seconds_to_man_weeks(issue.remaining_estimates_by_team[team.name].perf_design or 0),
+            capacity.perf_engineering_by_team[team.name],
             formats.numeric_border_left_format if i == 0 else formats.numeric_format
         ])
     # total for perf engineering
     values.append([
-        f'=SUM('
-        f'{RelPos(offset, column=len(values) - len(dev_teams)).to_cell()}'
-        f':{RelPos(offset, column=len(values) - 1).to_cell()}'
-        f')',
+        Formula(
+            f'=SUM('
+            f'{RelPos(offset, column=len(values) - len(dev_teams)).to_cell()}'
+            f':{RelPos(offset, column=len(values) - 1).to_cell()}'
+            f')',
+            capacity.perf_engineering
+        ),
         formats.numeric_border_right_format
     ])
     perf_engineering_pos = RelPos(offset, column=len(values) - 1)
@@ -119,48 +112,59 @@ def _create_cells_for_issue(issue: Issue, teams: List[Team], offset: Pos) -> Lis
         d = f'=IF({impl_total_pos.to_cell()}<>0,' \
             f'{totals_pos.to_cell()}*{team_impl_pos[team.name].to_cell()}/{impl_total_pos.to_cell()}' \
             f',0)'
-        values.append([d, formats.numeric_border_left_format if i == 0 else formats.numeric_format])
+        values.append([
+            Formula(d, capacity.feature_dev_by_team[team.name]),
+            formats.numeric_border_left_format if i == 0 else formats.numeric_format
+        ])
 
     # feature dev total
     values.append([
-        f'=('
-        f'{arch_design_pos.to_cell()}'
-        f'+{impl_total_pos.to_cell()}'
-        f'+{integration_pos.to_cell()}'
-        f'+{test_automation_pos.to_cell()}'
-        f'+{stabilization_pos.to_cell()}'
-        f'+{documentation_pos.to_cell()}'
-        f'+{perf_engineering_pos.to_cell()}'
-        f')'
-        f'*{reqs_level_pos.to_cell()}'
-        f'*{design_level_pos.to_cell()}',
+        Formula(
+            f'=('
+            f'{arch_design_pos.to_cell()}'
+            f'+{impl_total_pos.to_cell()}'
+            f'+{integration_pos.to_cell()}'
+            f'+{test_automation_pos.to_cell()}'
+            f'+{stabilization_pos.to_cell()}'
+            f'+{documentation_pos.to_cell()}'
+            f'+{perf_engineering_pos.to_cell()}'
+            f')'
+            f'*{reqs_level_pos.to_cell()}'
+            f'*{design_level_pos.to_cell()}',
+            capacity.feature_dev
+        ),
         formats.numeric_border_right_format
     ])
     feature_dev_total_pos = RelPos(offset, column=len(values) - 1)
 
     # qa effort
-    qa_teams = [team for team in teams if team.is_qa()]
     for i in range(len(qa_teams)):
         team = qa_teams[i]
         values.append([
-            seconds_to_man_weeks(issue.remaining_estimates_by_team[team.name].qa_effort or 0),
+            capacity.qa_effort_by_team[team.name],
             formats.numeric_border_left_format if i == 0 else formats.numeric_format
         ])
     # total for qa effort
     values.append([
-        f'=SUM('
-        f'{RelPos(offset, column=len(values) - len(qa_teams)).to_cell()}'
-        f':{RelPos(offset, column=len(values) - 1).to_cell()}'
-        f')',
+        Formula(
+            f'=SUM('
+            f'{RelPos(offset, column=len(values) - len(qa_teams)).to_cell()}'
+            f':{RelPos(offset, column=len(values) - 1).to_cell()}'
+            f')',
+            capacity.qa_effort
+        ),
         formats.numeric_border_right_format
     ])
     qa_effort_total_pos = RelPos(offset, column=len(values) - 1)
 
     # feature total
     values.append(
-        f'='
-        f'{feature_dev_total_pos.to_cell()}'
-        f'+{qa_effort_total_pos.to_cell()}'
+        Formula(
+            f'='
+            f'{feature_dev_total_pos.to_cell()}'
+            f'+{qa_effort_total_pos.to_cell()}',
+            capacity.total
+        )
     )
     return values
 
@@ -313,17 +317,27 @@ def _create_project_table_header(sheet, teams: List[Team], offset=Pos()) -> Regi
     return Region(RelPos(offset), 3, column_count)
 
 
-def _add_totals_row(sheet, region: Region, skip_columns: int = 0):
+def _add_column_values(column_sums: List[float], cells: List):
+    for column, item in enumerate(cells):
+        value = get_cell_value(item)
+        if is_number(value):
+            column_sums[column] += value
+
+
+def _add_totals_row(sheet, region: Region, column_sums: List[float], skip_columns: int = 0):
     totals = []
     for column in range(0, region.columns):
         if column == 0:
             totals.append('Total')
         elif column >= skip_columns:
             totals.append(
-                f'=SUM('
-                f'{RelPos(region.offset, column=column).to_cell()}'
-                f':{RelPos(region.offset, region.rows - 1, column).to_cell()}'
-                f')'
+                Formula(
+                    f'=SUM('
+                    f'{RelPos(region.offset, column=column).to_cell()}'
+                    f':{RelPos(region.offset, region.rows - 1, column).to_cell()}'
+                    f')',
+                    column_sums[column]
+                )
             )
         else:
             totals.append('')
@@ -332,58 +346,38 @@ def _add_totals_row(sheet, region: Region, skip_columns: int = 0):
 
 
 def _create_dev_activities_table(
-    sheet, project: Project, teams: List[Team], offset=Pos()
-) -> Tuple[Dict[Team, CellReference], Region]:
-    dev_owned_issues = [x for x in project.issues if x.owned_by_team is not None and x.owned_by_team.is_dev()]
-    if not dev_owned_issues:
-        return dict(), Region(offset, 1, 0)
+    sheet, dev_issues: List[Issue], capacity: List[IssueCapacity], teams: List[Team], table: Region
+):
+    if not dev_issues:
+        return
 
+    offset = table.offset
     header_table = _create_project_table_header(sheet, teams, offset)
 
-    for row in range(0, len(dev_owned_issues)):
-        issue = dev_owned_issues[row]
+    dev_teams = [team for team in teams if team.is_dev()]
+    qa_teams = [team for team in teams if team.is_qa()]
+
+    column_sums = [0] * header_table.columns
+    for row in range(0, len(dev_issues)):
+        issue = dev_issues[row]
         rel_offset = RelPos(header_table.pos_below(), row)
+        cells = _create_cells_for_issue(issue, capacity[row], dev_teams, qa_teams, rel_offset)
+        _add_column_values(column_sums, cells)
         write_row(
             sheet,
             rel_offset,
-            cell_generator=_create_cells_for_issue(issue, teams, rel_offset),
+            cell_generator=cells,
             cell_format=formats.numeric_format
         )
+        # rows above are complete, there is no need to keep them in memory
+        sheet.flush(rel_offset.row)
 
     # totals row
-    _add_totals_row(sheet, Region(header_table.pos_below(), len(dev_owned_issues), header_table.columns), 4)
+    _add_totals_row(sheet, Region(header_table.pos_below(), len(dev_issues), header_table.columns), column_sums, 4)
 
     # adjust column widths
-    sheet.set_column(
-        offset.column + 1, offset.column + 1,
-        max(int(len(x.issue_summary) * 0.75) for x in dev_owned_issues) if dev_owned_issues else 10
-    )
-    sheet.set_column(
-        offset.column, offset.column,
-        max(len(x.issue_key) for x in dev_owned_issues) if dev_owned_issues else 10
-    )
-
-    # cell references to totals for every team incl dev and qa
-    total_cells_by_team = {}
-    dev_teams = [x for x in teams if x.is_dev()]
-    team_column = header_table.offset.column + 11 + 2 * len(dev_teams)
-    for team in dev_teams:
-        total_cells_by_team[team] = CellReference(
-            RelPos(offset, header_table.pos_below().row + len(dev_owned_issues), team_column, project.name), project.name
-        )
-        team_column += 1
-
-    qa_teams = [x for x in teams if x.is_qa()]
-    team_column = header_table.offset.column + 12 + 3 * len(dev_teams)
-    for team in qa_teams:
-        total_cells_by_team[team] = CellReference(
-            RelPos(offset, header_table.pos_below().row + len(dev_owned_issues), team_column, project.name), f'{project.name} checks'
-        )
-        team_column += 1
-
-    return \
-        total_cells_by_team, \
-        Region(header_table.offset, header_table.rows + len(dev_owned_issues) + 1, header_table.columns)
+    sheet.set_column(offset.column + 1, offset.column + 1, max(int(len(x.issue_summary) * 0.75) for x in dev_issues))
+    sheet.set_column(offset.column, offset.column, max(len(x.issue_key) for x in dev_issues))
 
 
 def _create_known_bugs_table_header(sheet, offset: Pos) -> Region:
@@ -403,30 +397,13 @@ def _create_known_bugs_table_header(sheet, offset: Pos) -> Region:
     return Region(offset, 1, 5)
 
 
-def calculate_new_bugs_count_for_project(project: Project, team: Team) -> int:
-    new_bugs_count = 0
-    for issue in project.issues:
-        if issue.issue_status.lower() in ('closed', 'resolved', 'done'):
-            # all bugs should already be solved here
-            continue
-
-        estimate = issue.orig_estimates_by_team.get(team.name)
-        if estimate is not None:
-            new_bugs_count += \
-                seconds_to_man_weeks(estimate.qa_effort or 0) * 10 + \
-                seconds_to_man_weeks(estimate.implementation or 0) * 2.5
-
-    return int(new_bugs_count)
-
-
 def _create_known_bugs_table(
-    sheet, project: Project, teams: List[Team], offset=Pos()
-) -> Tuple[Dict[Team, CellReference], Region]:
+    sheet, project: Project, capacity: ProjectCapacity, teams: List[Team], table: Region
+):
     dev_teams: List[DevTeam] = [team for team in teams if team.is_dev()]
 
-    header_table = _create_known_bugs_table_header(sheet, offset)
+    header_table = _create_known_bugs_table_header(sheet, table.offset)
 
-    total_cells_by_teams = {}
     cells_offset = header_table.pos_below()
     row = 0
     for team in dev_teams:
@@ -436,26 +413,21 @@ def _create_known_bugs_table(
             cell_generator=[
                 team.name,
                 project.known_bugs_count[team],
-                calculate_new_bugs_count_for_project(project, team),
+                capacity.new_bugs_by_team[team.name],
                 [
-                    f'=SUM('
-                    f'{RelPos(cells_offset, row, 2).to_cell()}:{RelPos(cells_offset, row, 3).to_cell()}'
-                    f') * {team.bugfix_rate} / 5',
+                    Formula(
+                        f'=SUM('
+                        f'{RelPos(cells_offset, row, 2).to_cell()}:{RelPos(cells_offset, row, 3).to_cell()}'
+                        f') * {team.bugfix_rate} / 5',
+                        capacity.bugfix_by_team[team.name]
+                    ),
                     formats.bold_total_no_borders_format
                 ]
             ],
             cell_format=formats.numeric_format
         )
-        total_cells_by_teams[team] = CellReference(
-            RelPos(cells_offset, row, 4, sheet_name=project.name),
-            f'{project.name} bugfix'
-        )
         row += 1
 
-    return \
-        total_cells_by_teams, \
-        Region(header_table.offset, header_table.rows + len(dev_teams), header_table.columns)
-
 
 def _create_qa_activities_table_header(sheet, qa_teams: List[Team], offset: Pos) -> Region:
     merge_cells(sheet, RelPos(offset, 0, 0), RelPos(offset, 1, 0), 'Key', formats.centered_header_format)
@@ -483,7 +455,7 @@ def _create_qa_activities_table_header(sheet, qa_teams: List[Team], offset: Pos)
     return Region(offset, 2, 3 + len(qa_teams))
 
 
-def _create_cells_for_qa_issue(issue: Issue, qa_teams: List[Team], offset: Pos) -> List:
+def _create_cells_for_qa_issue(issue: Issue, capacity: QaIssueCapacity, qa_teams: List[Team], offset: Pos) -> List:
     values = [
         [{'url': issue.issue_url, 'string': issue.issue_key}, 'write_url'],
         issue.issue_summary
@@ -493,15 +465,18 @@ def _create_cells_for_qa_issue(issue: Issue, qa_teams: List[Team], offset: Pos)
     for i in range(len(qa_teams)):
         team = qa_teams[i]
         values.append([
-            seconds_to_man_weeks(issue.remaining_estimates_by_team[team.name].qa_effort or 0),
+            capacity.qa_effort_by_team[team.name],
             formats.numeric_border_left_format if i == 0 else formats.numeric_format
         ])
     # total for qa effort
     values.append([
-        f'=SUM('
-        f'{RelPos(offset, column=len(values) - len(qa_teams)).to_cell()}'
-        f':{RelPos(offset, column=len(values) - 1).to_cell()}'
-        f')',
+        Formula(
+            f'=SUM('
+            f'{RelPos(offset, column=len(values) - len(qa_teams)).to_cell()}'
+            f':{RelPos(offset, column=len(values) - 1).to_cell()}'
+            f')',
+            capacity.qa_effort
+        ),
         formats.numeric_border_right_format
     ])
 
@@ -509,57 +484,35 @@ def _create_cells_for_qa_issue(issue: Issue, qa_teams: List[Team], offset: Pos)
 
 
 def _create_qa_activities_table(
-    sheet, project: Project, teams: List[Team], offset: Pos
-) -> Tuple[Dict[Team, List[CellReference]], Region]:
-    qa_owned_issues = [x for x in project.issues if x.owned_by_team is not None and x.owned_by_team.is_qa()]
-    if not qa_owned_issues:
-        return dict(), Region(offset, 1, 0)
+    sheet, qa_issues: List[Issue], capacity: List[QaIssueCapacity], teams: List[Team], table: Region
+):
+    if not qa_issues:
+        return
 
     qa_teams = [team for team in teams if team.is_qa()]
 
-    header_table = _create_qa_activities_table_header(sheet, qa_teams, offset)
+    header_table = _create_qa_activities_table_header(sheet, qa_teams, table.offset)
 
-    total_cells_by_teams = {}
-    for row in range(0, len(qa_owned_issues)):
-        issue = qa_owned_issues[row]
+    column_sums = [0] * header_table.columns
+    for row in range(0, len(qa_issues)):
+        issue = qa_issues[row]
         rel_offset = RelPos(header_table.pos_below(), row)
+        cells = _create_cells_for_qa_issue(issue, capacity[row], qa_teams, rel_offset)
+        _add_column_values(column_sums, cells)
         write_row(
             sheet,
             rel_offset,
-            cell_generator=_create_cells_for_qa_issue(issue, qa_teams, rel_offset),
+            cell_generator=cells,
             cell_format=formats.numeric_format
         )
-
-        col = 2
-        for team in qa_teams:
-            if team not in total_cells_by_teams:
-                total_cells_by_teams[team] = []
-
-            total_cells_by_teams[team].append(
-                CellReference(RelPos(rel_offset, column=col, sheet_name=project.name), issue.issue_summary)
-            )
-            col += 1
+        sheet.flush(rel_offset.row)
 
     # totals row
-    _add_totals_row(sheet, Region(header_table.pos_below(), len(qa_owned_issues), header_table.columns), 2)
-
-    return \
-        total_cells_by_teams, \
-        Region(header_table.offset, header_table.rows + len(qa_owned_issues) + 1, header_table.columns)
-
+    _add_totals_row(sheet, Region(header_table.pos_below(), len(qa_issues), header_table.columns), column_sums, 2)
 
-def fill_project_worksheet(sheet, project: Project, teams: List[Team]) -> Dict[Team, List[CellReference]]:
-    total_cells_by_team, project_table = _create_dev_activities_table(sheet, project, teams)
 
-    total_bugs_by_dev_team, bugs_table = _create_known_bugs_table(
-        sheet, project, teams, RelPos(project_table.pos_below(), 2)
-    )
-
-    total_cells_by_qa_team, _ = _create_qa_activities_table(
-        sheet, project, teams, RelPos(bugs_table.pos_below(), 2)
-    )
-
-    return merge_dicts(
-        total_bugs_by_dev_team,
-        merge_dicts(total_cells_by_team, total_cells_by_qa_team)
-    )
+def fill_project_worksheet(sheet, project: Project, teams: List[Team], layout: ProjectSheetLayout):
+    capacity = layout.capacity
+    _create_dev_activities_table(sheet, layout.dev_issues, capacity.dev_issues, teams, layout.dev_table)
+    _create_known_bugs_table(sheet, project, capacity, teams, layout.bugs_table)
+    _create_qa_activities_table(sheet, layout.qa_issues, capacity.qa_issues, teams, layout.qa_table)
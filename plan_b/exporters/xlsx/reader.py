@@ -0,0 +1,214 @@
+import posixpath
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from xml.etree.ElementTree import iterparse
+from zipfile import ZipFile
+
+from xlsxwriter.utility import xl_rowcol_to_cell
+
+
+MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+RELATIONSHIPS_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PACKAGE_RELATIONSHIPS_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+OFFICE_DOCUMENT_REL_TYPE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument'
+CUSTOM_PROPERTIES_REL_TYPE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/custom-properties'
+CUSTOM_PROPERTIES_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/custom-properties}'
+
+ROW_TAG = f'{MAIN_NS}row'
+CELL_TAG = f'{MAIN_NS}c'
+VALUE_TAG = f'{MAIN_NS}v'
+FORMULA_TAG = f'{MAIN_NS}f'
+INLINE_STRING_TAG = f'{MAIN_NS}is'
+TEXT_TAG = f'{MAIN_NS}t'
+RICH_TEXT_RUN_TAG = f'{MAIN_NS}r'
+SHARED_STRING_TAG = f'{MAIN_NS}si'
+SHEET_TAG = f'{MAIN_NS}sheet'
+RELATIONSHIP_TAG = f'{PACKAGE_RELATIONSHIPS_NS}Relationship'
+PROPERTY_TAG = f'{CUSTOM_PROPERTIES_NS}property'
+
+CellPos = Tuple[int, int]  # zero based row and column
+
+
+def parse_cell_ref(ref: str) -> CellPos:
+    """
+    Zero based row and column of cell reference like AB12
+    """
+    column = 0
+    idx = 0
+    for idx, char in enumerate(ref):
+        if char.isdigit():
+            break
+        column = column * 26 + ord(char.upper()) - ord('A') + 1
+    return int(ref[idx:]) - 1, column - 1
+
+
+def _translate_shared_formula(formula: str, origin_ref: str, pos: CellPos) -> str:
+    # shared formulas are rare in plans, mostly they appear after cells are filled by dragging in Excel
+    from openpyxl.formula.translate import Translator
+
+    return Translator(f'={formula}', origin_ref).translate_formula(xl_rowcol_to_cell(*pos))
+
+
+def _read_text(element) -> str:
+    """
+    Text of shared or inline string, which is either plain or a sequence of rich text runs
+    """
+    result = []
+    for child in element:
+        if child.tag == TEXT_TAG:
+            result.append(child.text or '')
+        elif child.tag == RICH_TEXT_RUN_TAG:
+            result.extend(x.text or '' for x in child.iter(TEXT_TAG))
+    return ''.join(result)
+
+
+def _parse_number(value: str):
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+class XlsxValuesReader:
+    """
+    Reader of cell values from xlsx package, which streams worksheet XML instead of building
+    worksheet model, so that every worksheet is parsed at most once and only requested cells are kept.
+    Formulas are returned as text starting with '=', like openpyxl does by default
+    """
+
+    def __init__(self, package: ZipFile):
+        self._package: ZipFile = package
+
+        self._package_rels = self._read_relationships('')
+        workbook_path = next(
+            path for rel_type, path in self._package_rels.values() if rel_type == OFFICE_DOCUMENT_REL_TYPE
+        )
+        workbook_rels = self._read_relationships(workbook_path)
+        self._sheet_paths: Dict[str, str] = self._read_sheet_paths(workbook_path, workbook_rels)
+        self._shared_strings: List[str] = self._read_shared_strings(
+            next((path for rel_type, path in workbook_rels.values() if rel_type.endswith('/sharedStrings')), None)
+        )
+
+    def _read_relationships(self, part_path: str) -> Dict[str, Tuple[str, str]]:
+        """
+        Relationships of the part indexed by id: type and path of target part
+        """
+        part_dir, part_name = posixpath.split(part_path)
+        rels_path = posixpath.join(part_dir, '_rels', f'{part_name}.rels')
+        result = {}
+        with self._package.open(rels_path) as stream:
+            for _, element in iterparse(stream):
+                if element.tag == RELATIONSHIP_TAG:
+                    target = element.get('Target')
+                    if target.startswith('/'):
+                        target = target[1:]
+                    else:
+                        target = posixpath.normpath(posixpath.join(part_dir, target))
+                    result[element.get('Id')] = (element.get('Type'), target)
+        return result
+
+    def _read_sheet_paths(self, workbook_path: str, workbook_rels: Dict[str, Tuple[str, str]]) -> Dict[str, str]:
+        result = {}
+        with self._package.open(workbook_path) as stream:
+            for _, element in iterparse(stream):
+                if element.tag == SHEET_TAG:
+                    result[element.get('name')] = workbook_rels[element.get(f'{RELATIONSHIPS_NS}id')][1]
+        return result
+
+    def _read_shared_strings(self, path: Optional[str]) -> List[str]:
+        result = []
+        if path is None:
+            return result
+
+        with self._package.open(path) as stream:
+            for _, element in iterparse(stream):
+                if element.tag == SHARED_STRING_TAG:
+                    result.append(_read_text(element))
+                    element.clear()
+        return result
+
+    @property
+    def sheet_names(self) -> Iterable[str]:
+        return self._sheet_paths.keys()
+
+    def read_custom_properties(self) -> Dict[str, str]:
+        """
+        Custom document properties as text
+        """
+        path = next(
+            (path for rel_type, path in self._package_rels.values() if rel_type == CUSTOM_PROPERTIES_REL_TYPE), None
+        )
+        result = {}
+        if path is None:
+            return result
+
+        with self._package.open(path) as stream:
+            for _, element in iterparse(stream):
+                if element.tag == PROPERTY_TAG:
+                    result[element.get('name')] = ''.join(x.text or '' for x in element)
+        return result
+
+    def _get_cell_value(self, cell, pos: CellPos, shared_formulas: Dict[str, Tuple[str, str]]) -> Any:
+        cell_type = cell.get('t', 'n')
+        formula = cell.find(FORMULA_TAG)
+        if formula is not None:
+            if formula.text:
+                return f'={formula.text}'
+            if formula.get('t') == 'shared' and formula.get('si') in shared_formulas:
+                return _translate_shared_formula(*shared_formulas[formula.get('si')], pos)
+
+        if cell_type == 'inlineStr':
+            inline_string = cell.find(INLINE_STRING_TAG)
+            return _read_text(inline_string) if inline_string is not None else None
+
+        value = cell.findtext(VALUE_TAG)
+        if value is None:
+            return None
+        if cell_type == 's':
+            return self._shared_strings[int(value)]
+        if cell_type == 'n':
+            return _parse_number(value)
+        if cell_type == 'b':
+            return value == '1'
+        return value
+
+    def read_cells(self, sheet_name: str, cells: Optional[Set[CellPos]] = None) -> Dict[CellPos, Any]:
+        """
+        Values of the given cells of the worksheet or of all its cells if not set, empty cells are omitted
+        """
+        path = self._sheet_paths.get(sheet_name)
+        if path is None:
+            raise KeyError(f'Worksheet {sheet_name} does not exist')
+        if cells is not None and not cells:
+            return {}
+
+        last_row = max(x[0] for x in cells) if cells else None
+        result = {}
+        shared_formulas: Dict[str, Tuple[str, str]] = {}  # shared formula index -> formula and its cell
+        row, column = -1, -1
+        with self._package.open(path) as stream:
+            for event, element in iterparse(stream, events=('start', 'end')):
+                if event == 'start':
+                    if element.tag == ROW_TAG:
+                        row = int(element.get('r')) - 1 if element.get('r') else row + 1
+                        column = -1
+                        if last_row is not None and row > last_row:
+                            break
+                    continue
+
+                if element.tag == CELL_TAG:
+                    ref = element.get('r')
+                    row, column = parse_cell_ref(ref) if ref else (row, column + 1)
+
+                    formula = element.find(FORMULA_TAG)
+                    if formula is not None and formula.get('t') == 'shared' and formula.text:
+                        shared_formulas[formula.get('si')] = (formula.text, ref or xl_rowcol_to_cell(row, column))
+
+                    if cells is None or (row, column) in cells:
+                        value = self._get_cell_value(element, (row, column), shared_formulas)
+                        if value is not None:
+                            result[(row, column)] = value
+                    element.clear()
+                elif element.tag == ROW_TAG:
+                    element.clear()
+
+        return result
@@ -1,18 +1,19 @@
 from datetime import date
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 from plan_b.team import Team
-from plan_b.plan import Project
-from plan_b.date_utils import get_months_range, get_month_workdays_count
-from plan_b.exporters.xlsx.utils import Pos, Region, write_row, RelPos
+from plan_b.capacity import TeamCapacity, is_number, sum_numbers, WORKDAYS_PER_WEEK
+from plan_b.date_utils import get_months_range
+from plan_b.exporters.xlsx.utils import Pos, Region, write_row, RelPos, Formula
 
 from plan_b.exporters.xlsx.formats import MONTH_FORMAT
 from plan_b.exporters.xlsx import formats
-from plan_b.exporters.xlsx.metadata import TeamAllocation, CellReference
+from plan_b.exporters.xlsx.metadata import TeamAllocation
+from plan_b.exporters.xlsx.layout import TeamSheetLayout, CALENDAR_TABLE_HEADER_ROWS
 
 
 def _create_team_capacity_table(
-    sheet, start_date: date, end_date: date, team: Team, offset: Pos = Pos()
+    sheet, start_date: date, end_date: date, team: Team, capacity: TeamCapacity, offset: Pos = Pos()
 ) -> Region:
     sheet.write(offset.row, offset.column, 'People', formats.green_header_format)
     column_count = write_row(
@@ -37,8 +38,10 @@ def _create_team_capacity_table(
     write_row(
         sheet,
         RelPos(offset, len(team.members) + 1, 1),
-        cell_func=lambda col, _:
+        cell_func=lambda col, _: Formula(
             f'=SUM({RelPos(offset, 1, col).to_cell()}:{RelPos(offset, len(team.members), col).to_cell()})',
+            capacity.people[col - 1]
+        ),
         col_count=column_count,
         cell_format=formats.bold_total_format
     )
@@ -48,15 +51,15 @@ def _create_team_capacity_table(
 
 def _create_team_calendar_table(
     sheet,
-    capacity_table: Region,
+    layout: TeamSheetLayout,
     start_date: date,
     end_date: date,
-    production_calendar: dict,
-    projects: List[Project],
-    total_cells: List[CellReference]
-) -> Dict[str, Region]:
-
-    offset = RelPos(capacity_table.pos_below(), 1)
+    projects_count: int,
+    allocations: List[List]
+):
+    capacity_table = layout.capacity_table
+    capacity = layout.capacity
+    offset = layout.calendar_offset
 
     sheet.write(offset.row, offset.column, '', formats.green_header_format)
     column_count = write_row(
@@ -70,18 +73,18 @@ def _create_team_calendar_table(
     write_row(
         sheet,
         RelPos(offset, 1, 1),
-        cell_func=lambda col, _: f'={Pos(capacity_table.pos_below().row - 1, col).to_cell()}',
+        cell_func=lambda col, _: Formula(
+            f'={Pos(capacity_table.pos_below().row - 1, col).to_cell()}', capacity.people[col - 1]
+        ),
         col_count=column_count,
         cell_format=formats.numeric_format
     )
 
     sheet.write(offset.row + 2, offset.column, 'Working days')
-    workdays_count = get_month_workdays_count(start_date, end_date, production_calendar)
     write_row(
         sheet,
         RelPos(offset, 2, 1),
-        cell_generator=get_months_range(start_date, end_date),
-        cell_func=lambda _, d: workdays_count[d],
+        cell_generator=capacity.workdays,
         col_count=column_count
     )
 
@@ -89,7 +92,9 @@ def _create_team_calendar_table(
     write_row(
         sheet,
         RelPos(offset, 3, 1),
-        cell_func=lambda col, _: f'={Pos(offset.row + 2, col).to_cell()} / 5',
+        cell_func=lambda col, _: Formula(
+            f'={Pos(offset.row + 2, col).to_cell()} / {WORKDAYS_PER_WEEK}', capacity.weeks[col - 1]
+        ),
         col_count=column_count
     )
 
@@ -97,7 +102,9 @@ def _create_team_calendar_table(
     write_row(
         sheet,
         RelPos(offset, 4, 1),
-        cell_func=lambda c, _: f'={Pos(offset.row + 1, c).to_cell()} * {Pos(offset.row + 3, c).to_cell()}',
+        cell_func=lambda c, _: Formula(
+            f'={Pos(offset.row + 1, c).to_cell()} * {Pos(offset.row + 3, c).to_cell()}', capacity.man_weeks[c - 1]
+        ),
         col_count=column_count,
         cell_format=formats.numeric_format
     )
@@ -109,7 +116,9 @@ def _create_team_calendar_table(
     write_row(
         sheet,
         RelPos(offset, 5, 1),
-        cell_func=lambda c, _: f'={Pos(calendar_table_totals_row, c).to_cell()} * 5 / 12',
+        cell_func=lambda c, _: Formula(
+            f'={Pos(calendar_table_totals_row, c).to_cell()} * 5 / 12', capacity.vacations[c - 1]
+        ),
         col_count=column_count,
         cell_format=formats.numeric_format
     )
@@ -118,7 +127,7 @@ def _create_team_calendar_table(
     write_row(
         sheet,
         RelPos(offset, 6, 1),
-        cell_func=lambda c, _: 1.5,
+        cell_generator=capacity.support,
         col_count=column_count,
         cell_format=formats.numeric_format
     )
@@ -127,62 +136,84 @@ def _create_team_calendar_table(
     write_row(
         sheet,
         RelPos(offset, 7, 1),
-        cell_func=lambda c, _:
+        cell_func=lambda c, _: Formula(
             f'={Pos(offset.row + 4, c).to_cell()}'
             f'-{Pos(offset.row + 5, c).to_cell()}'
             f'-{Pos(offset.row + 6, c).to_cell()}',
+            capacity.remaining[c - 1]
+        ),
         col_count=column_count,
         cell_format=formats.bold_total_format
     )
     sheet.set_column(0, 0, width=15)
 
     # allocations region
-    offset = RelPos(offset, 8)
-    time_allocation_cells_by_item: Dict[str, Region] = {}
+    offset = RelPos(offset, CALENDAR_TABLE_HEADER_ROWS)
 
     row_count = 0
-    for cell_ref in total_cells:
+    for cell_ref in layout.total_cells:
         allocation_pos = RelPos(offset, row_count)
         sheet.write(allocation_pos.row, allocation_pos.column, cell_ref.title)
-        time_allocation_cells_by_item[cell_ref.title] = Region(allocation_pos, 1, column_count)
         row_count += 1
 
     # difference between total available and allocated resources
+    remaining_row = layout.calendar_offset.row + CALENDAR_TABLE_HEADER_ROWS - 1
+    difference = capacity.calculate_difference(allocations)
     offset = RelPos(offset, row_count)
     sheet.write(offset.row, 0, 'Difference', formats.bold_total_format)
-    for i in range(1, column_count + 1):
-        sheet.write(
-            offset.row,
-            offset.column + i,
-            f'={RelPos(offset, - len(projects) - 1, i).to_cell()}'
-            f'-SUM({RelPos(offset, - len(projects), i).to_cell()}:{RelPos(offset, - 1, i).to_cell()})',
-            formats.bold_total_format
-        )
+    write_row(
+        sheet,
+        RelPos(offset, column=1),
+        cell_func=lambda c, _: Formula(
+            f'={Pos(remaining_row, c).to_cell()}'
+            f'-SUM({RelPos(offset, - row_count, c).to_cell()}:{RelPos(offset, - 1, c).to_cell()})',
+            difference[c - 1]
+        ),
+        col_count=column_count,
+        cell_format=formats.bold_total_format
+    )
 
     # summary by project rows
-    offset = RelPos(offset, len(projects))
+    offset = RelPos(offset, projects_count)
     write_row(
         sheet, offset, cell_generator=['Item', 'Needed', 'Allocated', 'Diff'], cell_format=formats.green_header_format
     )
     offset = RelPos(offset, 1)
     row_count = 0
-    for cell_ref in total_cells:
+    for cell_ref, allocation in zip(layout.total_cells, allocations):
         row_offset = RelPos(offset, row_count)
-        allocation_pos = time_allocation_cells_by_item[cell_ref.title].offset
+        allocation_pos = layout.allocation_regions[cell_ref.title].offset
+        allocated = sum_numbers(allocation)
         write_row(
             sheet,
             row_offset,
             cell_generator=[
                 cell_ref.title,
-                f'={cell_ref.pos.to_cell()}',
-                f'=SUM({allocation_pos.to_cell()}:{RelPos(allocation_pos, column=column_count).to_cell()})',
-                f'={RelPos(row_offset, column=2).to_cell()}-{RelPos(row_offset, column=1).to_cell()}'
+                Formula(f'={cell_ref.pos.to_cell()}', cell_ref.value),
+                Formula(
+                    f'=SUM({allocation_pos.to_cell()}:{RelPos(allocation_pos, column=column_count).to_cell()})',
+                    allocated
+                ),
+                Formula(
+                    f'={RelPos(row_offset, column=2).to_cell()}-{RelPos(row_offset, column=1).to_cell()}',
+                    allocated - cell_ref.value if is_number(cell_ref.value) else None
+                )
             ],
             cell_format=formats.numeric_format
         )
         row_count += 1
 
-    return time_allocation_cells_by_item
+
+def _get_allocations(layout: TeamSheetLayout, previous_data: Optional[TeamAllocation]) -> List[List]:
+    """
+    Values of allocation regions, which are empty unless there are plan edits
+    """
+    months_count = len(layout.capacity.months)
+    result = []
+    for cell_ref in layout.total_cells:
+        item = previous_data.items.get(cell_ref.title) if previous_data else None
+        result.append([x[1] for x in item.allocations] if item else [None] * months_count)
+    return result
 
 
 def fill_calendar_plan_worksheet(
@@ -190,22 +221,24 @@ def fill_calendar_plan_worksheet(
     start_date: date,
     end_date: date,
     team: Team,
-    production_calendar: dict,
-    projects: List[Project],
-    total_cells: List[CellReference]
-) -> Dict[str, Region]:
-    capacity_table = _create_team_capacity_table(sheet, start_date, end_date, team)
+    projects_count: int,
+    layout: TeamSheetLayout,
+    previous_data: Optional[TeamAllocation] = None
+):
+    _create_team_capacity_table(sheet, start_date, end_date, team, layout.capacity, layout.capacity_table.offset)
 
-    return _create_team_calendar_table(
+    _create_team_calendar_table(
         sheet,
-        capacity_table,
+        layout,
         start_date,
         end_date,
-        production_calendar,
-        projects,
-        total_cells
+        projects_count,
+        _get_allocations(layout, previous_data)
     )
 
+    if previous_data is not None:
+        apply_plan_edits_to_team_calendar(sheet, previous_data, layout.allocation_regions)
+
 
 def apply_plan_edits_to_team_calendar(
     sheet, previous_data: TeamAllocation, releases_pos: Dict[str, Region]
@@ -1,3 +1,6 @@
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
 from xlsxwriter.utility import xl_rowcol_to_cell
 
 
@@ -32,6 +35,102 @@ class Region:
         return RelPos(self.offset, self.rows, 0)
 
 
+def register_merged_range(sheet, first_row: int, first_col: int, last_row: int, last_col: int):
+    """
+    Add merged range to xlsxwriter worksheet without writing its cells, which are expected to be written already.
+    Worksheet has no public method for this, so the list of ranges it writes to XML is extended directly
+    """
+    merged_ranges = getattr(sheet, 'merge', None)
+    if not isinstance(merged_ranges, list):
+        raise RuntimeError(
+            f'Merged ranges of worksheet {sheet.name} could not be registered, '
+            f'installed XlsxWriter version is not supported in constant_memory mode'
+        )
+    merged_ranges.append([first_row, first_col, last_row, last_col])
+
+
+class RowOrderedSheet:
+    """
+    Worksheet wrapper which buffers written cells and passes them to the worksheet in the order of rows on flush,
+    so that tables can be filled in any order while the workbook is created in constant_memory mode,
+    where xlsxwriter ignores cells written to rows above the last written one
+    """
+
+    def __init__(self, sheet):
+        self.sheet = sheet
+        self.name: str = sheet.name
+        self._cells_by_row: Dict[int, List[Tuple[int, str, tuple, dict]]] = defaultdict(list)
+        self._merged_ranges_by_row: Dict[int, List[Tuple[int, int, int, int]]] = defaultdict(list)
+        self._flushed_rows: int = 0  # rows above are already passed to worksheet
+
+    def _add_cell(self, method: str, row: int, column: int, args: tuple, kwargs: dict):
+        if row < self._flushed_rows:
+            raise RuntimeError(f'Row {row} of worksheet {self.name} is already written')
+        self._cells_by_row[row].append((column, method, args, kwargs))
+
+    def write(self, row: int, column: int, *args, **kwargs):
+        self._add_cell('write', row, column, args, kwargs)
+
+    def write_formula(self, row: int, column: int, *args, **kwargs):
+        self._add_cell('write_formula', row, column, args, kwargs)
+
+    def write_url(self, row: int, column: int, *args, **kwargs):
+        self._add_cell('write_url', row, column, args, kwargs)
+
+    def write_blank(self, row: int, column: int, *args, **kwargs):
+        self._add_cell('write_blank', row, column, args, kwargs)
+
+    def merge_range(self, first_row: int, first_col: int, last_row: int, last_col: int, data, cell_format=None):
+        # same as worksheet.merge_range does: value in the first cell and formatted blanks in the others
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                if row == first_row and col == first_col:
+                    self.write(row, col, data, cell_format)
+                else:
+                    self.write_blank(row, col, None, cell_format)
+        self._merged_ranges_by_row[first_row].append((first_row, first_col, last_row, last_col))
+
+    def set_column(self, *args, **kwargs):
+        return self.sheet.set_column(*args, **kwargs)
+
+    def flush(self, before_row: int = None):
+        """
+        Pass buffered cells of rows above given one (all rows if not set) to worksheet
+        """
+        rows = sorted(x for x in self._cells_by_row.keys() if before_row is None or x < before_row)
+        for row in rows:
+            # merged cells are already written in row order above, so the range is only registered
+            # instead of calling merge_range, which writes all rows of the range at once
+            for merged_range in self._merged_ranges_by_row.pop(row, []):
+                register_merged_range(self.sheet, *merged_range)
+            for column, method, args, kwargs in self._cells_by_row.pop(row):
+                getattr(self.sheet, method)(row, column, *args, **kwargs)
+
+        if before_row is None:
+            before_row = rows[-1] + 1 if rows else 0
+        self._flushed_rows = max(self._flushed_rows, before_row)
+
+
+class Formula:
+    """
+    Formula with its value calculated in advance, the value is stored as cached result of formula cell,
+    so that the file could be read without recalculation
+    """
+
+    def __init__(self, text: str, value=None):
+        self.text: str = text
+        self.value = value
+
+
+def get_cell_value(item):
+    """
+    Value of the cell described as accepted by write_row
+    """
+    if isinstance(item, list):
+        item = item[0]
+    return item.value if isinstance(item, Formula) else item
+
+
 def write_row(
     sheet,
     offset: Pos,
@@ -74,7 +173,12 @@ def write_row(
             current_cell_format = cell_format
 
         cell_value = cell_func(column, value) if cell_func else value
-        if isinstance(cell_value, str) and cell_value.startswith('='):
+        if isinstance(cell_value, Formula):
+            if cell_value.value is None:
+                sheet.write_formula(offset.row, column, cell_value.text, current_cell_format)
+            else:
+                sheet.write_formula(offset.row, column, cell_value.text, current_cell_format, cell_value.value)
+        elif isinstance(cell_value, str) and cell_value.startswith('='):
             sheet.write_formula(offset.row, column, cell_value, current_cell_format)
         else:
             if isinstance(cell_value, dict):
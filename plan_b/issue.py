@@ -1,9 +1,9 @@
+import itertools
 import re
 from enum import Enum
 from typing import Optional, List, Tuple, Dict
-from collections import defaultdict
 
-from plan_b.team import Team, match_team_by_worker_name
+from plan_b.team import Team, TeamDirectory
 
 
 class ConfidenceLevel(Enum):
@@ -13,6 +13,9 @@ class ConfidenceLevel(Enum):
 
 
 class WorkEstimate:
+    __slots__ = (
+        'reqs_level', 'design_level', 'arch_design', 'perf_design', 'implementation', 'documentation', 'qa_effort'
+    )
 
     def __init__(
         self,
@@ -34,6 +37,19 @@ class WorkEstimate:
 
 
 class Issue:
+    """
+    Work item of the plan, estimates of teams missing in dicts of estimates are looked up with get,
+    so that dicts are not filled with empty estimates
+    """
+    __slots__ = (
+        'issue_key',
+        'issue_summary',
+        'issue_url',
+        'issue_status',
+        'owned_by_team',
+        'orig_estimates_by_team',
+        'remaining_estimates_by_team'
+    )
 
     def __init__(
         self,
@@ -43,7 +59,7 @@ class Issue:
         issue_url: str = None,
         issue_status: str = None,
         owned_by_team: Team = None,
-        work_estimates: defaultdict = None
+        work_estimates: Dict[str, WorkEstimate] = None
     ):
         self.issue_key: str = issue_key
         self.issue_summary: str = issue_summary
@@ -51,10 +67,10 @@ class Issue:
         self.issue_status: str = issue_status
         self.owned_by_team: Team = owned_by_team
 
-        self.orig_estimates_by_team: Dict[str, WorkEstimate] = work_estimates or defaultdict(WorkEstimate)
-        self.remaining_estimates_by_team: Dict[str, WorkEstimate] = defaultdict(WorkEstimate)
+        self.orig_estimates_by_team: Dict[str, WorkEstimate] = work_estimates or {}
 
         if self.issue_status is not None and self.issue_status.lower() in ('closed', 'resolved', 'done'):
+            self.remaining_estimates_by_team: Dict[str, WorkEstimate] = {}
             for team_name, estimates in self.orig_estimates_by_team.items():
                 self.remaining_estimates_by_team[team_name] = WorkEstimate(
                     reqs_level=estimates.reqs_level,
@@ -69,13 +85,17 @@ class Issue:
             self.remaining_estimates_by_team = self.orig_estimates_by_team
 
 
-SEPARATORS_RX = re.compile('[;\n]')
-
-
 def seconds_to_man_weeks(seconds: int) -> float:
     return seconds / (60 * 60 * 8 * 5)
 
 
+class EstimateParseError(ValueError):
+
+    def __init__(self, message: str, position: int):
+        super().__init__(f'{message} (at position {position})')
+        self.position: int = position
+
+
 def _parse_confidence_level(level: str) -> ConfidenceLevel:
     if level in ['hi', 'high']:
         return ConfidenceLevel.High
@@ -88,6 +108,8 @@ def _parse_confidence_level(level: str) -> ConfidenceLevel:
 
 
 def _parse_estimation(value: str) -> int:
+    if not value:
+        raise ValueError('Empty estimation specification')
     unit_spec = value[-1]
     if unit_spec not in ['h', 'd', 'w']:
         raise ValueError(f'Incorrect estimation specification {value}, it must end with a unit spec, e.g. h, d or w')
@@ -100,22 +122,6 @@ def _parse_estimation(value: str) -> int:
         return int(value * 5 * 8 * 60 * 60)
 
 
-def _set_property(
-    estimate: WorkEstimate,
-    property_name: str,
-    possible_names: List[str],
-    data_name: str,
-    data_value: str,
-    value_parser
-) -> bool:
-    if data_name in possible_names:
-        if getattr(estimate, property_name) is not None:
-            raise RuntimeError(f'{property_name} already specified in comment')
-        setattr(estimate, property_name, value_parser(data_value))
-        return True
-    return False
-
-
 POSSIBLE_REQS_LEVEL_TOKENS = ['reqs', 'requirements', 'requirements confidence', 'reqs confidence', 'reqs level']
 POSSIBLE_DESIGN_LEVEL_TOKENS = ['design', 'design confidence', 'design level']
 POSSIBLE_ARCH_DESIGN_TOKENS = ['arch', 'architecture', 'arch design', 'architecture design']
@@ -135,54 +141,106 @@ POSSIBLE_TOKENS = \
         + POSSIBLE_TEAM_TOKENS \
         + POSSIBLE_QA_EFFORT_TOKENS
 
+# estimate property name and value parser by every possible token
+ESTIMATE_PROPERTY_BY_TOKEN = {
+    token: (property_name, value_parser)
+    for tokens, property_name, value_parser in (
+        (POSSIBLE_REQS_LEVEL_TOKENS, 'reqs_level', _parse_confidence_level),
+        (POSSIBLE_DESIGN_LEVEL_TOKENS, 'design_level', _parse_confidence_level),
+        (POSSIBLE_ARCH_DESIGN_TOKENS, 'arch_design', _parse_estimation),
+        (POSSIBLE_PERF_DESIGN_TOKENS, 'perf_design', _parse_estimation),
+        (POSSIBLE_IMPL_TOKENS, 'implementation', _parse_estimation),
+        (POSSIBLE_DOCUMENTATION_TOKENS, 'documentation', _parse_estimation),
+        (POSSIBLE_QA_EFFORT_TOKENS, 'qa_effort', _parse_estimation),
+    )
+    for token in tokens
+}
+
+# version of #plan comments parsing rules, must be changed when parsing results could change
+PARSER_VERSION = 3
+
+PLAN_TAG_RX = re.compile(r'\s*#plan')
+
+# Every item of comment is a text between separators (comma, semicolon or line break),
+# only items starting with one of possible tokens and containing a colon are matched as "key: value" pairs
+PLAN_ITEM_PATTERN = \
+    r'[^\S\n]*' \
+    r'(?P<key>(?:' + '|'.join(re.escape(x) for x in sorted(POSSIBLE_TOKENS, key=len, reverse=True)) + r')[^:,;\n]*)' \
+    r':(?P<value>[^,;\n]*)'
+
+# the first item directly follows the leading tag, others follow separators,
+# so that #plan quoted later in the text does not start an item
+PLAN_FIRST_ITEM_RX = re.compile(PLAN_ITEM_PATTERN)
+PLAN_ITEM_RX = re.compile(r'(?<=[,;\n])' + PLAN_ITEM_PATTERN)
+
+
+def _get_value_position(item, offset: int = 0) -> int:
+    raw_value = item.group('value')
+    return item.start('value') + len(raw_value) - len(raw_value.lstrip()) + offset
+
+
+def is_plan_comment(text: str) -> bool:
+    return PLAN_TAG_RX.match(text) is not None
+
 
 def parse_work_estimate_text(
     text: str,
     author_name: str,
-    team_by_name: dict
+    team_by_name: dict,
+    team_directory: TeamDirectory = None
 ) -> Tuple[Optional[WorkEstimate], Optional[str]]:
-    text = text.strip()
-
-    if not text.startswith('#plan'):
+    """
+    Parse #plan comment in a single pass over its text,
+    EstimateParseError with position of invalid value in the text is raised for malformed comments
+    """
+    tag = PLAN_TAG_RX.match(text)
+    if not tag:
         return None, None
 
-    text = text.replace('#plan', '').strip()
-
-    text = re.sub(SEPARATORS_RX, ',', text)
-
-    lines = [t for t in [x.strip() for x in text.split(',')] if t]
-    # TODO do it smarter
-    tokens = []
-    for l in lines:
-        for start in POSSIBLE_TOKENS:
-            if l.startswith(start):
-                tokens.append(l)
-                break
-
-    kv = {k.strip().lower(): v.strip().lower() for k, v in [x.split(':') for x in tokens if ':' in x]}
+    # values by key, the last one wins when the same key is repeated
+    if text.find('#plan', tag.end()) != -1:
+        # tags quoted later in the comment are ignored, error positions then refer to the text without them
+        text = text[:tag.end()] + text[tag.end():].replace('#plan', '')
+
+    values = {}
+    first_item = PLAN_FIRST_ITEM_RX.match(text, tag.end())
+    items = PLAN_ITEM_RX.finditer(text, tag.end())
+    for item in itertools.chain([first_item] if first_item else [], items):
+        key, value = item.group('key', 'value')
+        value = value.strip().lower()
+        if ':' in value:
+            raise EstimateParseError(
+                f'Unexpected colon in value of "{key.strip()}"', _get_value_position(item, value.index(':'))
+            )
+        values[key.strip().lower()] = value, item
 
     matching_team_name = None
     result = WorkEstimate()
-    for k, v in kv.items():
-        (
-            _set_property(result, 'reqs_level', POSSIBLE_REQS_LEVEL_TOKENS, k, v, _parse_confidence_level)
-            or _set_property(result, 'design_level', POSSIBLE_DESIGN_LEVEL_TOKENS, k, v, _parse_confidence_level)
-            or _set_property(result, 'arch_design', POSSIBLE_ARCH_DESIGN_TOKENS, k, v, _parse_estimation)
-            or _set_property(result, 'perf_design', POSSIBLE_PERF_DESIGN_TOKENS, k, v, _parse_estimation)
-            or _set_property(result, 'implementation', POSSIBLE_IMPL_TOKENS, k, v, _parse_estimation)
-            or _set_property(result, 'documentation', POSSIBLE_DOCUMENTATION_TOKENS, k, v, _parse_estimation)
-            or _set_property(result, 'qa_effort', POSSIBLE_QA_EFFORT_TOKENS, k, v, _parse_estimation)
-        )
+    specified_by: Dict[str, str] = {}
+    for key, (value, item) in values.items():
+        estimate_property = ESTIMATE_PROPERTY_BY_TOKEN.get(key)
+        if estimate_property is not None:
+            property_name, value_parser = estimate_property
+            if property_name in specified_by:
+                raise EstimateParseError(
+                    f'{property_name} already specified in comment as "{specified_by[property_name]}"',
+                    _get_value_position(item)
+                )
+            specified_by[property_name] = key
+            try:
+                setattr(result, property_name, value_parser(value))
+            except ValueError as e:
+                raise EstimateParseError(str(e), _get_value_position(item)) from e
 
         # TODO: implement better matching
-        if k in POSSIBLE_TEAM_TOKENS:
+        elif key in POSSIBLE_TEAM_TOKENS:
             for team_name in team_by_name.keys():
-                if v in team_name.lower():
+                if value in team_name.lower():
                     matching_team_name = team_name
 
     if matching_team_name is None:
         # if no explicit team specified, try to match by comment author
-        team = match_team_by_worker_name(author_name, [x for x in team_by_name.values()])
+        team = (team_directory or TeamDirectory(list(team_by_name.values()))).match(author_name)
         if team:
             matching_team_name = team.name
 
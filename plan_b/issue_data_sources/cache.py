@@ -0,0 +1,208 @@
+import hashlib
+import json
+import logging
+import sqlite3
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+
+CACHE_SCHEMA_VERSION = 1
+
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+KEYS_PER_STATEMENT = 500  # below default SQLite limit of host parameters
+
+# parsing results of contexts not used for this long (e.g. previous team configuration) are removed
+PARSE_CONTEXT_TTL = timedelta(days=30)
+
+CacheRecord = Tuple[str, dict, Optional[list]]  # issue key, issue fields, comments (None if not loaded yet)
+
+
+class IssuesCache:
+    """
+    On-disk SQLite storage of normalized issues and their comments,
+    remembers which issues matched every data query and when the query was synchronized last time
+    """
+
+    def __init__(self, path: str):
+        self.path: str = path
+        self._lock = Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._init_schema()
+
+    def _init_schema(self):
+        with self._lock, self._connection:
+            version = self._connection.execute('PRAGMA user_version').fetchone()[0]
+            if version not in (0, CACHE_SCHEMA_VERSION):
+                log.info('Issues cache %s has outdated schema version %d, recreating it', self.path, version)
+                for table in ('issue', 'query_issue', 'query_sync'):
+                    self._connection.execute(f'DROP TABLE IF EXISTS {table}')
+
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS issue (key TEXT PRIMARY KEY, data TEXT NOT NULL, comments TEXT)'
+            )
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS query_issue ('
+                'query TEXT NOT NULL, position INTEGER NOT NULL, key TEXT NOT NULL, PRIMARY KEY (query, position))'
+            )
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS query_sync (query TEXT PRIMARY KEY, synced_at TEXT NOT NULL)'
+            )
+            self._connection.execute(f'PRAGMA user_version = {CACHE_SCHEMA_VERSION}')
+
+    def last_sync(self, query: str) -> Optional[datetime]:
+        with self._lock:
+            row = self._connection.execute('SELECT synced_at FROM query_sync WHERE query = ?', (query,)).fetchone()
+        return datetime.strptime(row[0], DATETIME_FORMAT) if row else None
+
+    def set_last_sync(self, query: str, synced_at: datetime):
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO query_sync (query, synced_at) VALUES (?, ?)',
+                (query, synced_at.strftime(DATETIME_FORMAT))
+            )
+
+    def store_issues(self, records: Iterable[CacheRecord]):
+        with self._lock, self._connection:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO issue (key, data, comments) VALUES (?, ?, ?)',
+                (
+                    (key, json.dumps(data, default=str), json.dumps(comments) if comments is not None else None)
+                    for key, data, comments in records
+                )
+            )
+
+    def set_query_keys(self, query: str, keys: List[str]):
+        """
+        Remember issues matching the query in the order they were returned by data source
+        """
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM query_issue WHERE query = ?', (query,))
+            self._connection.executemany(
+                'INSERT INTO query_issue (query, position, key) VALUES (?, ?, ?)',
+                ((query, position, key) for position, key in enumerate(keys))
+            )
+
+    def get_missing_keys(self, keys: List[str]) -> List[str]:
+        cached_keys = set()
+        with self._lock:
+            for i in range(0, len(keys), KEYS_PER_STATEMENT):
+                chunk = keys[i:i + KEYS_PER_STATEMENT]
+                cached_keys.update(
+                    x[0] for x in self._connection.execute(
+                        f'SELECT key FROM issue WHERE key IN ({",".join("?" * len(chunk))})', chunk
+                    )
+                )
+        return [x for x in keys if x not in cached_keys]
+
+    def get_issues(self, query: str, page_size: int) -> Iterator[List[CacheRecord]]:
+        """
+        Read cached issues matching the query page by page
+        """
+        position = 0
+        while True:
+            with self._lock:
+                rows = self._connection.execute(
+                    'SELECT query_issue.position, issue.key, issue.data, issue.comments '
+                    'FROM query_issue JOIN issue ON issue.key = query_issue.key '
+                    'WHERE query_issue.query = ? AND query_issue.position >= ? '
+                    'ORDER BY query_issue.position LIMIT ?',
+                    (query, position, page_size)
+                ).fetchall()
+            if not rows:
+                break
+
+            yield [(key, json.loads(data), json.loads(comments) if comments is not None else None)
+                   for _, key, data, comments in rows]
+            position = rows[-1][0] + 1
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class ParsedCommentsCache:
+    """
+    On-disk SQLite storage of comments parsing results addressed by hash of comment and parsing context.
+    Several plans with different teams could share the storage, entries of contexts not used
+    for PARSE_CONTEXT_TTL (e.g. previous team configuration or parser version) are removed
+    """
+
+    def __init__(self, path: str, context_ttl: timedelta = PARSE_CONTEXT_TTL):
+        self.path: str = path
+        self.context_ttl: timedelta = context_ttl
+        self._lock = Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._entries: Dict[str, Dict[str, list]] = {}
+        self._new_entries: List[Tuple[str, str, str]] = []
+
+        with self._lock, self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS parsed_comment (key TEXT PRIMARY KEY, context TEXT NOT NULL, result TEXT)'
+            )
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS parse_context (context TEXT PRIMARY KEY, last_used TEXT NOT NULL)'
+            )
+
+    def _touch_context(self, context: str):
+        """
+        Remember when the context was used and remove entries of stale contexts,
+        entries stored before contexts usage was tracked are stale as well
+        """
+        now = datetime.now()
+        with self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO parse_context (context, last_used) VALUES (?, ?)',
+                (context, now.strftime(DATETIME_FORMAT))
+            )
+            self._connection.execute(
+                'DELETE FROM parse_context WHERE last_used < ?', ((now - self.context_ttl).strftime(DATETIME_FORMAT),)
+            )
+            deleted = self._connection.execute(
+                'DELETE FROM parsed_comment WHERE context NOT IN (SELECT context FROM parse_context)'
+            ).rowcount
+        if deleted:
+            log.info('Removed %d outdated parsed comments from cache %s', deleted, self.path)
+
+    def _load_context(self, context: str) -> Dict[str, list]:
+        with self._lock:
+            entries = self._entries.get(context)
+            if entries is None:
+                self._touch_context(context)
+                entries = self._entries[context] = {
+                    key: json.loads(result) for key, result in self._connection.execute(
+                        'SELECT key, result FROM parsed_comment WHERE context = ?', (context,)
+                    )
+                }
+            return entries
+
+    @staticmethod
+    def make_key(context: str, *values: str) -> str:
+        digest = hashlib.sha256(context.encode())
+        for value in values:
+            digest.update(b'\0')
+            digest.update(value.encode())
+        return digest.hexdigest()
+
+    def get(self, context: str, key: str) -> Optional[list]:
+        return self._load_context(context).get(key)
+
+    def put(self, context: str, key: str, result: list):
+        self._load_context(context)[key] = result
+        with self._lock:
+            self._new_entries.append((key, context, json.dumps(result)))
+
+    def flush(self):
+        with self._lock, self._connection:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO parsed_comment (key, context, result) VALUES (?, ?, ?)', self._new_entries
+            )
+            self._new_entries = []
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._connection.close()
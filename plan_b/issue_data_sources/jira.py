@@ -1,14 +1,22 @@
+import hashlib
+import json
 import logging
-from collections import namedtuple, defaultdict
-from typing import Dict, List, Tuple
+import re
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, Future
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Dict, Iterator, List, Optional, Tuple
 
-import jira
-from dateutil import parser
 from yarl import URL
 
-from plan_b.issue import parse_work_estimate_text, Issue, Team, WorkEstimate
-from plan_b.plan import IssuesDataSource
-from plan_b.team import match_team_by_worker_name
+from plan_b import profiling
+from plan_b.issue import (
+    parse_work_estimate_text, is_plan_comment, Issue, Team, WorkEstimate, ConfidenceLevel, PARSER_VERSION
+)
+from plan_b.issue_data_sources.cache import IssuesCache, CacheRecord, ParsedCommentsCache
+from plan_b.plan import IssuesDataSource, DEFAULT_QUERY_CONCURRENCY
+from plan_b.team import TeamDirectory
 
 log = logging.getLogger(__name__)
 
@@ -36,62 +44,260 @@ JiraIssue = namedtuple(
         'epic_link',
         'comments',
         'aggregated_orig_estimate',
-        'orig_estimate',
-        'raw_issue'
+        'orig_estimate'
     ]
 )
 
 
 JiraComment = namedtuple('JiraComment', ['author', 'body'])
 
+# normalized issue with estimates of teams parsed from its #plan comments
+IssueRecord = namedtuple('IssueRecord', ['jira_issue', 'estimates'])
+
 
 WORKDAY_SECONDS = 28800  # 8 * 60 * 60
 
+DEFAULT_COMMENTS_CONCURRENCY = 8
+
+DEFAULT_PAGE_SIZE = 100
+
+# Jira evaluates dates in JQL in the timezone of user profile, so incremental sync
+# requests a bit more than needed to cover any difference with local time
+CACHE_SYNC_OVERLAP = timedelta(days=2)
+
+JQL_DATETIME_FORMAT = '%Y/%m/%d %H:%M'
+
+KEYS_PER_QUERY = 100
+
+WORK_ITEM_TYPES = ('Epic', 'Story')
+BUG_TYPES = ('Bug', 'Bug US')
+OPEN_BUG_STATUSES = ('open', 'in progress')
+
+ORDER_BY_RX = re.compile(r'\s+order\s+by\s+.*$', re.IGNORECASE | re.DOTALL)
+
+
+def add_jql_condition(data_query: str, condition: str) -> str:
+    """
+    Narrow down JQL query with additional condition, keeping ordering clause of the original query in place
+    """
+    order_by = ORDER_BY_RX.search(data_query)
+    if order_by:
+        return f'({data_query[:order_by.start()]}) AND {condition}{order_by.group(0)}'
+    return f'({data_query}) AND {condition}'
+
+
+def _jql_list(values) -> str:
+    return ', '.join(f'"{x}"' for x in values)
 
-def make_jira_issue_from_raw_data(raw_issue, comments=tuple()) -> JiraIssue:
+
+# fields read by make_jira_issue_from_raw_data, used to limit search results payload
+JIRA_ISSUE_FIELDS = (
+    'issuetype',
+    'summary',
+    'assignee',
+    'reporter',
+    'created',
+    'resolutiondate',
+    'duedate',
+    'aggregatetimespent',
+    'customfield_10073',
+    'priority',
+    'components',
+    'customfield_10180',
+    'customfield_16390',
+    'status',
+    'resolution',
+    'customfield_13694',
+    'aggregatetimeoriginalestimate',
+    'timeoriginalestimate',
+)
+
+JIRA_COMMENT_FIELD = 'comment'
+
+
+def get_inline_comments(raw_issue) -> Optional[Tuple[JiraComment, ...]]:
+    """
+    Extract comments returned inline with issue fields, None is returned when comments
+    were not requested or Jira truncated them, so they have to be loaded separately
+    """
+    comment_field = getattr(raw_issue.fields, JIRA_COMMENT_FIELD, None)
+    if comment_field is None:
+        return None
+
+    comments = comment_field.comments
+    if getattr(comment_field, 'total', len(comments)) > len(comments):
+        return None
+
+    return tuple(JiraComment(x.author.name, x.body) for x in comments)
+
+
+def _get_name(value) -> Optional[str]:
+    return getattr(value, 'name', None) if value is not None else None
+
+
+def _get_issue_url(raw_issue) -> str:
     jira_server = getattr(raw_issue, '_options', {'server': 'https://jira.domain'})['server']
+    return f'{jira_server}/browse/{raw_issue.key}'
+
 
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    # dateutil is imported on first use, it is not needed to start the app or to validate its config
+    from dateutil import parser
+
+    return parser.parse(value)
+
+
+def make_jira_issue_from_raw_data(raw_issue, comments: Tuple[JiraComment, ...] = None) -> JiraIssue:
     return JiraIssue(
         key=raw_issue.key,
-        url=f'{jira_server}/browse/{raw_issue.key}',
+        url=_get_issue_url(raw_issue),
         type=raw_issue.fields.issuetype.name,
         summary=raw_issue.fields.summary,
-        assignee=raw_issue.fields.assignee,
-        reporter=raw_issue.fields.reporter,
-        created=parser.parse(raw_issue.fields.created) if raw_issue.fields.created else None,
-        resolved=parser.parse(raw_issue.fields.resolutiondate) if raw_issue.fields.resolutiondate else None,
-        due=parser.parse(raw_issue.fields.duedate) if raw_issue.fields.duedate else None,
+        assignee=_get_name(raw_issue.fields.assignee),
+        reporter=_get_name(raw_issue.fields.reporter),
+        created=_parse_datetime(raw_issue.fields.created),
+        resolved=_parse_datetime(raw_issue.fields.resolutiondate),
+        due=_parse_datetime(raw_issue.fields.duedate),
         time_spent=raw_issue.fields.aggregatetimespent,
         severity=raw_issue.fields.customfield_10073.value
             if hasattr(raw_issue.fields, 'customfield_10073') and raw_issue.fields.customfield_10073 is not None
             else None,
-        priority=raw_issue.fields.priority,
+        priority=_get_name(raw_issue.fields.priority),
         components=str(raw_issue.fields.components),
         tags=str(raw_issue.fields.customfield_10180),
         qa_advice=raw_issue.fields.customfield_16390
             if hasattr(raw_issue.fields, 'customfield_16390') and raw_issue.fields.customfield_16390 is not None
             else None,
         status=raw_issue.fields.status.name,
-        resolution=raw_issue.fields.resolution,
+        resolution=_get_name(raw_issue.fields.resolution),
         epic_link=raw_issue.fields.customfield_13694 if raw_issue.fields.customfield_13694 else None,
         comments=comments,
         aggregated_orig_estimate=raw_issue.fields.aggregatetimeoriginalestimate,
-        orig_estimate=raw_issue.fields.timeoriginalestimate,
-        raw_issue=raw_issue
+        orig_estimate=raw_issue.fields.timeoriginalestimate
+    )
+
+
+DATETIME_FIELDS = ('created', 'resolved', 'due')
+
+
+def jira_issue_to_cache_record(issue: JiraIssue) -> CacheRecord:
+    data = issue._asdict()
+    for name in ('key', 'comments'):
+        del data[name]
+    for name in DATETIME_FIELDS:
+        data[name] = data[name].isoformat() if data[name] else None
+    return issue.key, data, [list(x) for x in issue.comments] if issue.comments is not None else None
+
+
+def jira_issue_from_cache_record(record: CacheRecord) -> JiraIssue:
+    key, data, comments = record
+    for name in DATETIME_FIELDS:
+        data[name] = _parse_datetime(data[name])
+    return JiraIssue(
+        key=key,
+        comments=tuple(JiraComment(*x) for x in comments) if comments is not None else None,
+        **data
+    )
+
+
+ESTIMATE_LEVEL_FIELDS = ('reqs_level', 'design_level')
+ESTIMATE_EFFORT_FIELDS = ('arch_design', 'perf_design', 'implementation', 'documentation', 'qa_effort')
+
+
+def make_parse_context(teams: List[Team]) -> str:
+    """
+    Hash of everything besides comment itself that affects comment parsing results
+    """
+    teams_description = [[x.name, [[w.name] + w.aliases for w in x.members]] for x in teams]
+    return hashlib.sha256(json.dumps([PARSER_VERSION, teams_description]).encode()).hexdigest()
+
+
+def parsing_result_to_cache_entry(estimate: WorkEstimate, team_name: Optional[str]) -> list:
+    return \
+        [getattr(estimate, x).name if getattr(estimate, x) else None for x in ESTIMATE_LEVEL_FIELDS] \
+        + [getattr(estimate, x) for x in ESTIMATE_EFFORT_FIELDS] \
+        + [team_name]
+
+
+def parsing_result_from_cache_entry(entry: list) -> Tuple[WorkEstimate, Optional[str]]:
+    levels = entry[:len(ESTIMATE_LEVEL_FIELDS)]
+    efforts = entry[len(ESTIMATE_LEVEL_FIELDS):-1]
+    estimate = WorkEstimate(
+        *[ConfidenceLevel[x] if x else None for x in levels],
+        **dict(zip(ESTIMATE_EFFORT_FIELDS, efforts))
     )
+    return estimate, entry[-1]
 
 
 class JiraIssuesDataSource(IssuesDataSource):
 
-    def __init__(self, name: str, url: URL):
-        super().__init__(name, url)
+    def __init__(
+        self,
+        name: str,
+        url: URL,
+        comments_concurrency: int = DEFAULT_COMMENTS_CONCURRENCY,
+        inline_comments: bool = False,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        cache_path: str = None,
+        query_concurrency: int = DEFAULT_QUERY_CONCURRENCY,
+        count_bugs_on_server: bool = False,
+        parse_cache_path: str = None
+    ):
+        super().__init__(name, url, query_concurrency)
         self.jira_client = None
+        self.comments_concurrency: int = comments_concurrency
+        self.inline_comments: bool = inline_comments
+        self.page_size: int = page_size
+        self.cache_path: Optional[str] = cache_path
+        self.count_bugs_on_server: bool = count_bugs_on_server
+        self.parse_cache_path: Optional[str] = parse_cache_path
 
-    @staticmethod
-    def _find_and_parse_plan_comment(jira_issue: JiraIssue, team_by_name: dict) -> defaultdict:
-        estimates_by_team = defaultdict(WorkEstimate)
+        # comments are loaded once per issue key for all queries processed until data source is closed
+        self._lock = Lock()
+        self._comments_executor: ThreadPoolExecutor = None
+        self._comments_by_key: Dict[str, Future] = {}
+
+        # cache files are opened on first export, so that data source does not touch them until it is used
+        self._cache: Optional[IssuesCache] = None
+        self._parse_cache: Optional[ParsedCommentsCache] = None
+
+    @property
+    def cache(self) -> Optional[IssuesCache]:
+        with self._lock:
+            if self._cache is None and self.cache_path:
+                self._cache = IssuesCache(self.cache_path)
+            return self._cache
+
+    @property
+    def parse_cache(self) -> Optional[ParsedCommentsCache]:
+        with self._lock:
+            if self._parse_cache is None and self.parse_cache_path:
+                self._parse_cache = ParsedCommentsCache(self.parse_cache_path)
+            return self._parse_cache
+
+    def _parse_comment(
+        self, comment: JiraComment, team_by_name: dict, team_directory: TeamDirectory, parse_context: str
+    ) -> Tuple[Optional[WorkEstimate], Optional[str]]:
+        if not self.parse_cache or not is_plan_comment(comment.body):
+            return parse_work_estimate_text(comment.body, comment.author, team_by_name, team_directory)
+
+        key = self.parse_cache.make_key(parse_context, comment.author, comment.body)
+        entry = self.parse_cache.get(parse_context, key)
+        if entry is not None:
+            return parsing_result_from_cache_entry(entry)
+
+        estimate, team_name = parse_work_estimate_text(comment.body, comment.author, team_by_name, team_directory)
+        self.parse_cache.put(parse_context, key, parsing_result_to_cache_entry(estimate, team_name))
+        return estimate, team_name
+
+    def _find_and_parse_plan_comment(
+        self, jira_issue: JiraIssue, team_by_name: dict, team_directory: TeamDirectory, parse_context: str = None
+    ) -> Dict[str, WorkEstimate]:
+        estimates_by_team = {}
         for comment in jira_issue.comments:
-            estimate, team_name = parse_work_estimate_text(comment.body, comment.author, team_by_name)
+            estimate, team_name = self._parse_comment(comment, team_by_name, team_directory, parse_context)
             if estimate is None:
                 continue
             if team_name is None:
@@ -100,46 +306,258 @@ class JiraIssuesDataSource(IssuesDataSource):
 
         return estimates_by_team
 
-    def export_issues(self, data_query: str, teams: List[Team]) -> Tuple[List[Issue], Dict[Team, int]]:
-        if not self.jira_client:
-            self.jira_client = jira.JIRA(
-                {
-                    'server': str(URL.build(scheme=self.url.scheme, host=self.url.host))
-                },
-                basic_auth=(self.url.user, self.url.password)
+    def _connect(self):
+        # jira client library is heavy to import, it is loaded only when connection to server is needed
+        import jira
+
+        with self._lock:
+            if not self.jira_client:
+                self.jira_client = jira.JIRA(
+                    {
+                        'server': str(self.url.origin())
+                    },
+                    basic_auth=(self.url.user, self.url.password)
+                )
+
+    def _load_comments(self, issue_key: str) -> Tuple[JiraComment, ...]:
+        log.debug('loading comments for issue %s', issue_key)
+        profiling.increment('jira.comments_requests')
+        comments = self.jira_client.comments(issue_key)
+        return tuple(JiraComment(x.author.name, x.body) for x in comments)
+
+    def _get_comments_future(self, issue_key: str) -> Future:
+        with self._lock:
+            future = self._comments_by_key.get(issue_key)
+            if future is None:
+                if self._comments_executor is None:
+                    self._comments_executor = ThreadPoolExecutor(max_workers=self.comments_concurrency)
+                future = self._comments_executor.submit(self._load_comments, issue_key)
+                self._comments_by_key[issue_key] = future
+            return future
+
+    def _load_comments_for_issues(self, issues: List[JiraIssue]) -> List[JiraIssue]:
+        """
+        Load comments for given issues using a bounded pool of workers shared by all queries,
+        issues which already have comments are left as is, result keeps the order of issues passed in
+        """
+        futures = [self._get_comments_future(issue.key) if issue.comments is None else None for issue in issues]
+
+        result = []
+        failed_issues = []
+        first_error = None
+        for issue, future in zip(issues, futures):
+            if future is None:
+                result.append(issue)
+                continue
+            try:
+                result.append(issue._replace(comments=future.result()))
+            except Exception as e:
+                log.error('Failed to load comments for issue %s: %s', issue.url, e)
+                failed_issues.append(issue.key)
+                first_error = first_error or e
+
+        if failed_issues:
+            raise RuntimeError(
+                f'Failed to load comments for {len(failed_issues)} issue(s): {", ".join(failed_issues)}'
+            ) from first_error
+
+        return result
+
+    def _search_issues_pages(self, data_query: str, fields: str = None) -> Iterator[list]:
+        """
+        Search issues page by page, so only one page of raw issues is kept in memory at a time
+        """
+        start_at = 0
+        while True:
+            profiling.increment('jira.search_requests')
+            page = self.jira_client.search_issues(
+                data_query, startAt=start_at, maxResults=self.page_size, fields=fields
+            )
+            if not page:
+                break
+
+            log.debug('Got %d issues starting from %d for query "%s"', len(page), start_at, data_query)
+            yield page
+
+            start_at += len(page)
+            # server may limit page size below requested, so rely on total when it is known
+            total = getattr(page, 'total', None)
+            if (total is not None and start_at >= total) or (total is None and len(page) < self.page_size):
+                break
+
+    def _search_jira_issues(self, data_query: str) -> Iterator[List[JiraIssue]]:
+        fields = ','.join(JIRA_ISSUE_FIELDS + (JIRA_COMMENT_FIELD,)) if self.inline_comments else None
+        for raw_issues in self._search_issues_pages(data_query, fields):
+            yield [
+                make_jira_issue_from_raw_data(
+                    raw_issue, get_inline_comments(raw_issue) if self.inline_comments else None
+                )
+                for raw_issue in raw_issues
+            ]
+
+    def _sync_cached_issues(self, data_query: str) -> Iterator[List[JiraIssue]]:
+        """
+        Download issues updated since last synchronization of the query to cache,
+        then read all issues matching the query from cache page by page
+        """
+        sync_started = datetime.now()
+        last_sync = self.cache.last_sync(data_query)
+
+        if last_sync is None:
+            log.info('No cached issues found for query "%s", downloading all of them', data_query)
+            keys = []
+            for issues in self._search_jira_issues(data_query):
+                self.cache.store_issues(jira_issue_to_cache_record(x) for x in issues)
+                keys.extend(x.key for x in issues)
+        else:
+            updated_since = (last_sync - CACHE_SYNC_OVERLAP).strftime(JQL_DATETIME_FORMAT)
+            log.info('Downloading issues updated since %s for query "%s"', updated_since, data_query)
+            updated_keys = set()
+            for issues in self._search_jira_issues(add_jql_condition(data_query, f'updated >= "{updated_since}"')):
+                self.cache.store_issues(jira_issue_to_cache_record(x) for x in issues)
+                updated_keys.update(x.key for x in issues)
+
+            # issues could leave or enter query results without being updated, so refresh the list of keys
+            keys = [x.key for page in self._search_issues_pages(data_query, 'key') for x in page]
+            missing_keys = self.cache.get_missing_keys(keys)
+            for i in range(0, len(missing_keys), KEYS_PER_QUERY):
+                for issues in self._search_jira_issues(f'key in ({",".join(missing_keys[i:i + KEYS_PER_QUERY])})'):
+                    self.cache.store_issues(jira_issue_to_cache_record(x) for x in issues)
+            log.info(
+                'Updated %d and added %d cached issues for query "%s"',
+                len(updated_keys), len(missing_keys), data_query
             )
 
+        self.cache.set_query_keys(data_query, keys)
+        self.cache.set_last_sync(data_query, sync_started)
+
+        for records in self.cache.get_issues(data_query, self.page_size):
+            yield [jira_issue_from_cache_record(x) for x in records]
+
+    @staticmethod
+    def _count_known_bug(
+        assignee: str, url: str, team_directory: TeamDirectory, known_bugs_count: Dict[Team, int]
+    ):
+        if not assignee:
+            log.warning(f'Empty or invalid assignee for bug %s', url)
+            return
+
+        bug_owner_team = team_directory.match(assignee)
+        if bug_owner_team:
+            if bug_owner_team.is_dev():
+                known_bugs_count[bug_owner_team] += 1
+            else:
+                log.warning('Invalid owner team for bug %s', url)
+
+    def _count_known_bugs_on_server(
+        self, data_query: str, team_directory: TeamDirectory, known_bugs_count: Dict[Team, int]
+    ):
+        """
+        Count open bugs by team requesting only assignee and status of every bug from Jira.
+        Statuses are checked here, because Jira rejects the whole query if any status in it is unknown
+        """
+        bugs_query = add_jql_condition(data_query, f'issuetype in ({_jql_list(BUG_TYPES)})')
+        log.debug('Counting known bugs with query "%s"', bugs_query)
+        for raw_issues in self._search_issues_pages(bugs_query, 'assignee,status'):
+            for raw_issue in raw_issues:
+                status = _get_name(raw_issue.fields.status)
+                if not status or status.lower() not in OPEN_BUG_STATUSES:
+                    continue
+                self._count_known_bug(
+                    _get_name(raw_issue.fields.assignee), _get_issue_url(raw_issue), team_directory, known_bugs_count
+                )
+
+    def close(self):
+        with self._lock:
+            if self._comments_executor is not None:
+                self._comments_executor.shutdown()
+                self._comments_executor = None
+            self._comments_by_key = {}
+            caches, self._cache, self._parse_cache = (self._cache, self._parse_cache), None, None
+        for cache in caches:
+            if cache is not None:
+                cache.close()
+
+    def _export_work_items(
+        self, data_query: str, teams: List[Team], team_directory: TeamDirectory
+    ) -> Tuple[List[JiraIssue], Dict[Team, int]]:
+        """
+        Epics and stories of the query with comments loaded, along with known bugs count by team
+        """
+        self._connect()
+
         epics_and_stories = []
-        known_bugs = []
         epics = set()
+        known_bugs_count = {x: 0 for x in teams if x.is_dev()}
 
-        log.debug('Searching issues for project with query "%s"', data_query)
-        raw_issues = self.jira_client.search_issues(data_query, maxResults=10000)
-        for raw_issue in raw_issues:
-            jira_issue = make_jira_issue_from_raw_data(raw_issue)
-            if jira_issue.type == 'Epic':
-                epics.add(jira_issue.key)
-            if jira_issue.type in ('Epic', 'Story'):
-                epics_and_stories.append(jira_issue)
-            if jira_issue.type in ('Bug', 'Bug US') and jira_issue.status.lower() in ['open', 'in progress']:
-                known_bugs.append(jira_issue)
-
-        filtered_epics_and_stories = []
-        for issue in epics_and_stories:
-            if issue.type == 'Story' and issue.epic_link in epics:
-                continue  # skip stories that are already in epics assigned to teams from plan
-            log.debug('loading comments for issue %s', issue.key)
-            comments = self.jira_client.comments(issue.raw_issue)
-            issue = issue._replace(comments=tuple(JiraComment(x.author.name, x.body) for x in comments))
-            filtered_epics_and_stories.append(issue)
+        work_items_query = data_query
+        if self.count_bugs_on_server:
+            with profiling.span('jira.count_known_bugs'):
+                self._count_known_bugs_on_server(data_query, team_directory, known_bugs_count)
+            work_items_query = add_jql_condition(data_query, f'issuetype in ({_jql_list(WORK_ITEM_TYPES)})')
+
+        log.debug('Searching issues for project with query "%s"', work_items_query)
+        with profiling.span('jira.search_issues'):
+            if self.cache:
+                pages = self._sync_cached_issues(work_items_query)
+            else:
+                pages = self._search_jira_issues(work_items_query)
+            for jira_issues in pages:
+                profiling.increment('jira.issues', len(jira_issues))
+                for jira_issue in jira_issues:
+                    if jira_issue.type == 'Epic':
+                        epics.add(jira_issue.key)
+                    if jira_issue.type in WORK_ITEM_TYPES:
+                        epics_and_stories.append(jira_issue)
+                    if jira_issue.type in BUG_TYPES and jira_issue.status.lower() in OPEN_BUG_STATUSES:
+                        self._count_known_bug(jira_issue.assignee, jira_issue.url, team_directory, known_bugs_count)
+
+        # skip stories that are already in epics assigned to teams from plan
+        epics_and_stories = [x for x in epics_and_stories if not (x.type == 'Story' and x.epic_link in epics)]
+        with profiling.span('jira.load_comments'):
+            filtered_epics_and_stories = self._load_comments_for_issues(epics_and_stories)
+            if self.cache:
+                self.cache.store_issues(
+                    jira_issue_to_cache_record(x)
+                    for x, y in zip(filtered_epics_and_stories, epics_and_stories) if y.comments is None
+                )
 
+        return filtered_epics_and_stories, known_bugs_count
+
+    def export_issues(self, data_query: str, teams: List[Team]) -> Tuple[List[Issue], Dict[Team, int]]:
+        team_directory = TeamDirectory(teams)
+        jira_issues, known_bugs_count = self._export_work_items(data_query, teams, team_directory)
+
+        with profiling.span('jira.parse_comments'):
+            return self._make_issues(jira_issues, teams, team_directory), known_bugs_count
+
+    def export_issue_records(self, data_query: str, teams: List[Team]) -> List[IssueRecord]:
+        """
+        Epics and stories of the query with all normalized fields and estimates parsed from comments,
+        as they are stored in issues history
+        """
+        team_directory = TeamDirectory(teams)
+        jira_issues, _ = self._export_work_items(data_query, teams, team_directory)
+
+        teams_by_name = {x.name: x for x in teams}
+        parse_context = make_parse_context(teams) if self.parse_cache else None
+        with profiling.span('jira.parse_comments'):
+            return [
+                IssueRecord(x, self._find_and_parse_plan_comment(x, teams_by_name, team_directory, parse_context))
+                for x in jira_issues
+            ]
+
+    def _make_issues(
+        self, jira_issues: List[JiraIssue], teams: List[Team], team_directory: TeamDirectory
+    ) -> List[Issue]:
         epics_and_stories = []
         teams_by_name = {x.name: x for x in teams}
-        for issue in filtered_epics_and_stories:
+        parse_context = make_parse_context(teams) if self.parse_cache else None
+        for issue in jira_issues:
             log.debug('Scanning for #plan comment in issue %s', issue.key)
-            estimates = self._find_and_parse_plan_comment(issue, teams_by_name)
+            estimates = self._find_and_parse_plan_comment(issue, teams_by_name, team_directory, parse_context)
 
-            owner_team = match_team_by_worker_name(issue.assignee.name, teams)
+            owner_team = team_directory.match(issue.assignee) if issue.assignee else None
             if owner_team is None:
                 log.warning('Owner team is not a team from plan for %s', issue.url)
             epics_and_stories.append(
@@ -153,17 +571,4 @@ class JiraIssuesDataSource(IssuesDataSource):
                 )
             )
 
-        known_bugs_count = {x: 0 for x in teams if x.is_dev()}
-        for bug in known_bugs:
-            if not bug.assignee:
-                log.warning(f'Empty or invalid assignee for bug %s', bug.url)
-                continue
-
-            bug_owner_team = match_team_by_worker_name(bug.assignee.name, teams)
-            if bug_owner_team:
-                if bug_owner_team.is_dev():
-                    known_bugs_count[bug_owner_team] += 1
-                else:
-                    log.warning('Invalid owner team for bug %s', bug.url)
-
-        return epics_and_stories, known_bugs_count
+        return epics_and_stories
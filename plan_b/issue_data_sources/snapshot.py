@@ -0,0 +1,156 @@
+import json
+import logging
+import os
+import struct
+import zlib
+from datetime import datetime
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+from plan_b.issue import Issue
+from plan_b.issue_data_sources.jira import parsing_result_to_cache_entry, parsing_result_from_cache_entry
+from plan_b.plan import IssuesDataSource
+from plan_b.team import Team
+
+log = logging.getLogger(__name__)
+
+
+SNAPSHOT_MAGIC = b'PLANBSNP'
+
+SNAPSHOT_VERSION = 1
+
+# magic, format version
+SNAPSHOT_HEADER = struct.Struct('>8sH')
+
+
+def _issue_to_entry(issue: Issue) -> list:
+    return [
+        issue.issue_key,
+        issue.issue_summary,
+        issue.issue_url,
+        issue.issue_status,
+        issue.owned_by_team.name if issue.owned_by_team else None,
+        [
+            parsing_result_to_cache_entry(estimate, team_name)
+            for team_name, estimate in issue.orig_estimates_by_team.items()
+        ]
+    ]
+
+
+def _issue_from_entry(entry: list, team_by_name: Dict[str, Team]) -> Issue:
+    key, summary, url, status, owner_team_name, estimates = entry
+    work_estimates = {}
+    for x in estimates:
+        estimate, team_name = parsing_result_from_cache_entry(x)
+        work_estimates[team_name] = estimate
+    return Issue(
+        key,
+        summary,
+        url,
+        status,
+        owned_by_team=team_by_name.get(owner_team_name) if owner_team_name else None,
+        work_estimates=work_estimates
+    )
+
+
+def write_snapshot(path: str, queries: Dict[str, dict]):
+    """
+    Write exported issues and known bugs counts of data queries as zlib compressed JSON
+    prefixed with magic and format version. The file is written next to the target and moved in place,
+    so that a failed write keeps previous snapshot intact
+    """
+    data = json.dumps(
+        {'created': datetime.now().isoformat(), 'queries': queries}, separators=(',', ':')
+    ).encode()
+    temp_path = f'{path}.tmp'
+    try:
+        with open(temp_path, 'wb') as snapshot_file:
+            snapshot_file.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION))
+            snapshot_file.write(zlib.compress(data))
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def read_snapshot(path: str) -> dict:
+    with open(path, 'rb') as snapshot_file:
+        header = snapshot_file.read(SNAPSHOT_HEADER.size)
+        if len(header) != SNAPSHOT_HEADER.size or header[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            raise RuntimeError(f'File {path} is not an issues snapshot')
+        _, version = SNAPSHOT_HEADER.unpack(header)
+        if version != SNAPSHOT_VERSION:
+            raise RuntimeError(
+                f'Issues snapshot {path} has unsupported format version {version}, '
+                f'expected {SNAPSHOT_VERSION}, it has to be recorded again'
+            )
+        return json.loads(zlib.decompress(snapshot_file.read()).decode())
+
+
+class RecordingIssuesDataSource(IssuesDataSource):
+    """
+    Pass export requests to wrapped data source and record results,
+    snapshot file is written by save once all data queries have succeeded
+    """
+
+    def __init__(self, data_source: IssuesDataSource, path: str):
+        super().__init__(data_source.name, data_source.url, data_source.query_concurrency)
+        self.data_source: IssuesDataSource = data_source
+        self.path: str = path
+        self._lock = Lock()
+        self._queries: Dict[str, dict] = {}
+
+    def export_issues(self, data_query: str, teams: List[Team]) -> Tuple[List[Issue], Dict[Team, int]]:
+        issues, known_bugs_count = self.data_source.export_issues(data_query, teams)
+        entry = {
+            'issues': [_issue_to_entry(x) for x in issues],
+            'known_bugs_count': {team.name: count for team, count in known_bugs_count.items()}
+        }
+        with self._lock:
+            self._queries[data_query] = entry
+        return issues, known_bugs_count
+
+    def close(self):
+        self.data_source.close()
+
+    def save(self):
+        with self._lock:
+            if not self._queries:
+                return
+            write_snapshot(self.path, self._queries)
+            log.info('Issues of %d data query(ies) recorded to snapshot %s', len(self._queries), self.path)
+
+
+class SnapshotIssuesDataSource(IssuesDataSource):
+    """
+    Replay issues recorded by RecordingIssuesDataSource without connecting to original data source.
+    Snapshot keeps teams matched at the time of recording, owners and bugs counts of teams
+    missing from the plan are ignored
+    """
+
+    def __init__(self, path: str, name: str = None):
+        super().__init__(name or path)
+        self.path: str = path
+        self._lock = Lock()
+        self._snapshot: Optional[dict] = None
+
+    def _get_snapshot(self) -> dict:
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = read_snapshot(self.path)
+                log.info('Replaying issues from snapshot %s created at %s', self.path, self._snapshot['created'])
+            return self._snapshot
+
+    def export_issues(self, data_query: str, teams: List[Team]) -> Tuple[List[Issue], Dict[Team, int]]:
+        entry = self._get_snapshot()['queries'].get(data_query)
+        if entry is None:
+            raise RuntimeError(f'Issues snapshot {self.path} has no data for query "{data_query}"')
+
+        team_by_name = {x.name: x for x in teams}
+        known_bugs_count = {x: 0 for x in teams if x.is_dev()}
+        for team_name, count in entry['known_bugs_count'].items():
+            team = team_by_name.get(team_name)
+            if team in known_bugs_count:
+                known_bugs_count[team] = count
+        return [_issue_from_entry(x, team_by_name) for x in entry['issues']], known_bugs_count
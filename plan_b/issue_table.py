@@ -0,0 +1,124 @@
+from array import array
+from typing import Dict, List
+
+from plan_b.team import Team
+from plan_b.issue import Issue, WorkEstimate, seconds_to_man_weeks
+
+DEFAULT_CONFIDENCE_LEVEL = 2
+CLOSED_STATUSES = ('closed', 'resolved', 'done')
+
+
+def _team_columns(teams: List[Team]) -> Dict[str, array]:
+    return {team.name: array('d') for team in teams}
+
+
+class IssueTable:
+    """
+    Estimates of project issues stored by columns, one value per issue in every column.
+    The table is built in a single pass over issues, so that per issue maxima and sums are calculated once
+    and are shared by all tables of the exported plan and by bugs forecast.
+    Efforts are in man-weeks
+    """
+
+    def __init__(self, issues: List[Issue], teams: List[Team]):
+        self.issues: List[Issue] = issues
+        self.dev_teams: List[Team] = [x for x in teams if x.is_dev()]
+        self.qa_teams: List[Team] = [x for x in teams if x.is_qa()]
+
+        # indices of issues owned by dev and qa teams, issues of other teams are not exported
+        self.dev_rows: List[int] = []
+        self.qa_rows: List[int] = []
+
+        # remaining effort of every team
+        self.implementation: Dict[str, array] = _team_columns(self.dev_teams)
+        self.perf_design: Dict[str, array] = _team_columns(self.dev_teams)
+        self.qa_effort: Dict[str, array] = _team_columns(self.qa_teams)
+
+        # original effort of every team, used to forecast new bugs of open issues
+        self.orig_implementation: Dict[str, array] = _team_columns(teams)
+        self.orig_qa_effort: Dict[str, array] = _team_columns(teams)
+
+        # aggregates of remaining estimates by issue
+        self.reqs_level: array = array('d')
+        self.design_level: array = array('d')
+        self.arch_design: array = array('d')
+        self.documentation: array = array('d')
+        self.implementation_total: array = array('d')
+        self.perf_design_total: array = array('d')
+        self.qa_effort_total: array = array('d')
+        self.is_open: array = array('b')
+
+        for row, issue in enumerate(issues):
+            self._add_issue(row, issue)
+
+    def __len__(self) -> int:
+        return len(self.issues)
+
+    def _add_issue(self, row: int, issue: Issue):
+        if issue.owned_by_team is not None:
+            if issue.owned_by_team.is_dev():
+                self.dev_rows.append(row)
+            elif issue.owned_by_team.is_qa():
+                self.qa_rows.append(row)
+
+        estimates = issue.remaining_estimates_by_team
+        orig_estimates = issue.orig_estimates_by_team
+
+        implementation_total = 0
+        perf_design_total = 0
+        for team in self.dev_teams:
+            estimate = estimates.get(team.name) or WorkEstimate()
+            implementation = seconds_to_man_weeks(estimate.implementation or 0)
+            perf_design = seconds_to_man_weeks(estimate.perf_design or 0)
+            self.implementation[team.name].append(implementation)
+            self.perf_design[team.name].append(perf_design)
+            implementation_total += implementation
+            perf_design_total += perf_design
+
+        qa_effort_total = 0
+        for team in self.qa_teams:
+            estimate = estimates.get(team.name) or WorkEstimate()
+            qa_effort = seconds_to_man_weeks(estimate.qa_effort or 0)
+            self.qa_effort[team.name].append(qa_effort)
+            qa_effort_total += qa_effort
+
+        for team_name, column in self.orig_implementation.items():
+            orig_estimate = orig_estimates.get(team_name) or WorkEstimate()
+            column.append(seconds_to_man_weeks(orig_estimate.implementation or 0))
+            self.orig_qa_effort[team_name].append(seconds_to_man_weeks(orig_estimate.qa_effort or 0))
+
+        self.implementation_total.append(implementation_total)
+        self.perf_design_total.append(perf_design_total)
+        self.qa_effort_total.append(qa_effort_total)
+
+        # confidence levels are not applicable to efforts of qa owned issues
+        owned_by_qa = issue.owned_by_team is not None and issue.owned_by_team.is_qa()
+        reqs_level = 0
+        design_level = 0
+        if not owned_by_qa:
+            reqs_level = max(
+                [x.reqs_level.value for x in estimates.values() if x.reqs_level] or [DEFAULT_CONFIDENCE_LEVEL]
+            )
+            design_level = max(
+                [x.design_level.value for x in estimates.values() if x.design_level] or [DEFAULT_CONFIDENCE_LEVEL]
+            )
+        self.reqs_level.append(reqs_level)
+        self.design_level.append(design_level)
+
+        # estimates of all teams are taken into account, even of teams not included in the plan
+        self.arch_design.append(seconds_to_man_weeks(sum(x.arch_design or 0 for x in estimates.values())))
+        self.documentation.append(seconds_to_man_weeks(sum(x.documentation or 0 for x in estimates.values())))
+
+        self.is_open.append(issue.issue_status is None or issue.issue_status.lower() not in CLOSED_STATUSES)
+
+    def new_bugs_count(self, team: Team) -> int:
+        """
+        Forecast of bugs to be found by the team in open issues
+        """
+        new_bugs_count = 0
+        for is_open, qa_effort, implementation in zip(
+            self.is_open, self.orig_qa_effort[team.name], self.orig_implementation[team.name]
+        ):
+            if is_open:
+                new_bugs_count += qa_effort * 10 + implementation * 2.5
+        return int(new_bugs_count)
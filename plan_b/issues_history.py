@@ -0,0 +1,333 @@
+"""
+Bulk loading of normalized issues and their parsed estimates into temporal tables of the database.
+Every table row is a version valid from begin_datetime until end_datetime, current versions have no end.
+Only changed rows get new versions, all versions they supersede are closed with a single UPDATE per table
+"""
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import (
+    MetaData, Table, Column, BigInteger, Integer, String, Float, DateTime, Date, Text, ForeignKey, create_engine,
+    select, tuple_
+)
+from sqlalchemy.engine import Connection
+
+from plan_b.issue import Issue, WorkEstimate, seconds_to_man_weeks
+from plan_b.issue_data_sources.jira import IssueRecord
+from plan_b.plan import CapacityPlan
+from plan_b.team import Team
+
+log = logging.getLogger(__name__)
+
+
+metadata = MetaData()
+
+team_table = Table(
+    'team', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('name', String(255), nullable=False),
+    Column('bugfix_rate', Float, nullable=False),
+)
+
+person_table = Table(
+    'person', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('firstname', String(255), nullable=False),
+    Column('lastname', String(255), nullable=False),
+    Column('issue_tracker_name', String(255), nullable=False),
+)
+
+issue_type_table = Table(
+    'issue_type', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('name', String(255), nullable=False),
+)
+
+implementation_type_table = Table(
+    'implementation_type', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('name', String(255), nullable=False),
+)
+
+issue_table = Table(
+    'issue', metadata,
+    Column('id', BigInteger, primary_key=True),
+    Column('key', String(64), nullable=False),
+    Column('url', String(255), nullable=False),
+    Column('created', DateTime, nullable=False),
+)
+
+issue_history_table = Table(
+    'issue_history', metadata,
+    Column('begin_datetime', DateTime, nullable=False),
+    Column('end_datetime', DateTime),
+    Column('issue_id', BigInteger, ForeignKey('issue.id'), nullable=False),
+    Column('type_id', Integer, ForeignKey('issue_type.id'), nullable=False),
+    Column('resolved', DateTime),
+    Column('due', Date),
+    Column('summary', String(255), nullable=False),
+    Column('components', String(255)),
+    Column('assignee_id', Integer, ForeignKey('person.id'), nullable=False),
+    Column('reporter_id', Integer, ForeignKey('person.id'), nullable=False),
+    Column('status', String(255), nullable=False),
+    Column('reqs_level', Float),
+    Column('design_level', Float),
+    Column('comment', Text),
+)
+
+
+def _make_estimate_table(name: str) -> Table:
+    return Table(
+        name, metadata,
+        Column('begin_datetime', DateTime, nullable=False),
+        Column('end_datetime', DateTime),
+        Column('issue_id', BigInteger, ForeignKey('issue.id'), nullable=False),
+        Column('team_id', Integer, ForeignKey('team.id'), nullable=False),
+        Column('implementation_type_id', Integer, ForeignKey('implementation_type.id'), nullable=False),
+        Column('estimation', Float),
+        Column('comment', Text),
+    )
+
+
+original_estimate_table = _make_estimate_table('original_estimate')
+remaining_estimate_table = _make_estimate_table('remaining_estimate')
+
+# kinds of work estimated by teams, stored as implementation types
+EFFORT_FIELDS = ('arch_design', 'perf_design', 'implementation', 'documentation', 'qa_effort')
+
+ISSUE_VERSION_COLUMNS = (
+    'type_id', 'resolved', 'due', 'summary', 'components', 'assignee_id', 'reporter_id', 'status', 'reqs_level',
+    'design_level'
+)
+ESTIMATE_KEY_COLUMNS = ('issue_id', 'team_id', 'implementation_type_id')
+ESTIMATE_VERSION_COLUMNS = ('estimation',)
+
+# person row for issues without assignee, assignee and reporter are required in history
+UNASSIGNED = ''
+
+ROWS_PER_STATEMENT = 1000
+
+
+def _chunks(items: Sequence, size: int = ROWS_PER_STATEMENT) -> Iterable[Sequence]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _to_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    Columns are timestamps without time zone, Jira returns times with time zones
+    """
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _truncate(value: Optional[str], length: int = 255) -> Optional[str]:
+    return value[:length] if value is not None else None
+
+
+def _make_person(name: str) -> dict:
+    firstname, _, lastname = name.rpartition('.')
+    return {'firstname': firstname, 'lastname': lastname, 'issue_tracker_name': name}
+
+
+def _least_confident_level(estimates: Iterable[WorkEstimate], field: str) -> Optional[float]:
+    """
+    Issue level confidence is the lowest confidence of teams estimates, lower confidence has bigger value
+    """
+    levels = [getattr(x, field).value for x in estimates if getattr(x, field) is not None]
+    return max(levels) if levels else None
+
+
+def _ensure_ids(
+    connection: Connection, table: Table, key_column: str, rows_by_key: Dict[str, dict]
+) -> Dict[str, int]:
+    """
+    Ids of rows by values of key column, missing rows are inserted
+    """
+    column = table.c[key_column]
+    keys = list(rows_by_key.keys())
+
+    def select_ids(chunk: Sequence[str]) -> List[Tuple[str, int]]:
+        return connection.execute(select([column, table.c.id]).where(column.in_(chunk))).fetchall()
+
+    ids = {}
+    for chunk in _chunks(keys):
+        ids.update(select_ids(chunk))
+
+    missing_keys = [x for x in keys if x not in ids]
+    for chunk in _chunks(missing_keys):
+        connection.execute(table.insert().values([dict(rows_by_key[x], **{key_column: x}) for x in chunk]))
+        ids.update(select_ids(chunk))
+    if missing_keys:
+        log.debug('Added %d row(s) to %s', len(missing_keys), table.name)
+    return ids
+
+
+def _save_versions(
+    connection: Connection,
+    table: Table,
+    key_columns: Sequence[str],
+    version_columns: Sequence[str],
+    rows: List[dict],
+    issue_ids: List[int],
+    captured_at: datetime
+) -> Tuple[int, int]:
+    """
+    Compare rows with current versions of given issues, insert changed and new rows as new versions,
+    close versions superseded by them and versions missing from rows.
+    Numbers of added and closed versions are returned
+    """
+    def key_of(row) -> tuple:
+        return tuple(row[x] for x in key_columns)
+
+    def version_of(row) -> tuple:
+        return tuple(row[x] for x in version_columns)
+
+    current = {}
+    columns = [table.c[x] for x in key_columns + version_columns]
+    for chunk in _chunks(issue_ids):
+        for row in connection.execute(
+            select(columns).where(table.c.end_datetime.is_(None)).where(table.c.issue_id.in_(chunk))
+        ):
+            current[key_of(row)] = version_of(row)
+
+    new_rows = [x for x in rows if current.get(key_of(x)) != version_of(x)]
+    rows_keys = {key_of(x) for x in rows}
+    superseded = [x for x in current.keys() if x not in rows_keys] + [
+        key_of(x) for x in new_rows if key_of(x) in current
+    ]
+
+    if superseded:
+        if len(key_columns) == 1:
+            condition = table.c[key_columns[0]].in_([x[0] for x in superseded])
+        else:
+            condition = tuple_(*[table.c[x] for x in key_columns]).in_(superseded)
+        connection.execute(
+            table.update().where(table.c.end_datetime.is_(None)).where(condition).values(end_datetime=captured_at)
+        )
+
+    for chunk in _chunks(new_rows):
+        connection.execute(table.insert().values([dict(x, begin_datetime=captured_at) for x in chunk]))
+
+    log.debug('Added %d and closed %d version(s) in %s', len(new_rows), len(superseded), table.name)
+    return len(new_rows), len(superseded)
+
+
+def _make_estimate_rows(
+    issue: Issue, issue_id: int, team_ids: Dict[str, int], implementation_type_ids: Dict[str, int]
+) -> Tuple[List[dict], List[dict]]:
+    """
+    Rows of original and remaining estimates for every kind of work estimated by teams from the plan
+    """
+    original_rows, remaining_rows = [], []
+    for team_name, original in issue.orig_estimates_by_team.items():
+        if team_name not in team_ids:
+            continue
+        # remaining estimates are derived from original ones the same way as for the plan
+        remaining = issue.remaining_estimates_by_team[team_name]
+        for field in EFFORT_FIELDS:
+            if getattr(original, field) is None:
+                continue
+            for rows, estimate in ((original_rows, original), (remaining_rows, remaining)):
+                rows.append({
+                    'issue_id': issue_id,
+                    'team_id': team_ids[team_name],
+                    'implementation_type_id': implementation_type_ids[field],
+                    'estimation': seconds_to_man_weeks(getattr(estimate, field)),
+                    'comment': None,
+                })
+    return original_rows, remaining_rows
+
+
+def save_issues_history(
+    connection: Connection, records: List[IssueRecord], teams: List[Team], captured_at: datetime = None
+) -> Dict[str, Tuple[int, int]]:
+    """
+    Save current state of issues and their estimates as versions valid since captured_at, estimates are
+    stored in man-weeks. Issues missing from records are left as is. Should be run within a transaction,
+    numbers of added and closed versions by table are returned
+    """
+    captured_at = captured_at or datetime.utcnow()
+    records = list({x.jira_issue.key: x for x in records}.values())
+
+    team_ids = _ensure_ids(connection, team_table, 'name', {
+        x.name: {'bugfix_rate': getattr(x, 'bugfix_rate', None) or 0} for x in teams
+    })
+    implementation_type_ids = _ensure_ids(connection, implementation_type_table, 'name', {x: {} for x in EFFORT_FIELDS})
+    issue_type_ids = _ensure_ids(connection, issue_type_table, 'name', {x.jira_issue.type: {} for x in records})
+
+    person_names = {UNASSIGNED}
+    for record in records:
+        person_names.update(x for x in (record.jira_issue.assignee, record.jira_issue.reporter) if x)
+    person_ids = _ensure_ids(
+        connection, person_table, 'issue_tracker_name', {x: _make_person(x) for x in person_names}
+    )
+
+    issue_ids = _ensure_ids(connection, issue_table, 'key', {
+        x.jira_issue.key: {
+            'url': x.jira_issue.url,
+            'created': _to_naive_utc(x.jira_issue.created) or captured_at,
+        }
+        for x in records
+    })
+
+    issue_rows, original_estimate_rows, remaining_estimate_rows = [], [], []
+    for record in records:
+        jira_issue, issue_id = record.jira_issue, issue_ids[record.jira_issue.key]
+        issue_rows.append({
+            'issue_id': issue_id,
+            'type_id': issue_type_ids[jira_issue.type],
+            'resolved': _to_naive_utc(jira_issue.resolved),
+            'due': jira_issue.due.date() if jira_issue.due else None,
+            'summary': _truncate(jira_issue.summary or ''),
+            'components': _truncate(jira_issue.components),
+            'assignee_id': person_ids[jira_issue.assignee or UNASSIGNED],
+            'reporter_id': person_ids[jira_issue.reporter or UNASSIGNED],
+            'status': jira_issue.status,
+            'reqs_level': _least_confident_level(record.estimates.values(), 'reqs_level'),
+            'design_level': _least_confident_level(record.estimates.values(), 'design_level'),
+            'comment': None,
+        })
+
+        original_rows, remaining_rows = _make_estimate_rows(
+            Issue(jira_issue.key, issue_status=jira_issue.status, work_estimates=record.estimates),
+            issue_id,
+            team_ids,
+            implementation_type_ids
+        )
+        original_estimate_rows.extend(original_rows)
+        remaining_estimate_rows.extend(remaining_rows)
+
+    loaded_issue_ids = [issue_ids[x.jira_issue.key] for x in records]
+    result = {
+        issue_history_table.name: _save_versions(
+            connection, issue_history_table, ('issue_id',), ISSUE_VERSION_COLUMNS, issue_rows, loaded_issue_ids,
+            captured_at
+        )
+    }
+    for table, rows in (
+        (original_estimate_table, original_estimate_rows), (remaining_estimate_table, remaining_estimate_rows)
+    ):
+        result[table.name] = _save_versions(
+            connection, table, ESTIMATE_KEY_COLUMNS, ESTIMATE_VERSION_COLUMNS, rows, loaded_issue_ids, captured_at
+        )
+    return result
+
+
+def capture_plan_history(plan: CapacityPlan, db_url: str, captured_at: datetime = None):
+    """
+    Export work items of all plan projects and save them to issues history in a single transaction
+    """
+    records = plan.export_issue_records()
+
+    engine = create_engine(db_url)
+    try:
+        with engine.begin() as connection:
+            result = save_issues_history(connection, records, plan.teams, captured_at)
+    finally:
+        engine.dispose()
+
+    for table_name, (added, closed) in result.items():
+        log.info('Issues history table %s: %d version(s) added, %d closed', table_name, added, closed)
@@ -1,14 +1,19 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
-from typing import List, Tuple, Dict
+from typing import Any, Callable, Dict, List, Tuple
 from yarl import URL
 
+from plan_b import profiling
 from plan_b.issue import Issue
 from plan_b.team import Team
 
 log = logging.getLogger(__name__)
 
 
+DEFAULT_QUERY_CONCURRENCY = 4
+
+
 class Project:
 
     def __init__(self, name: str, data_query: str = ''):
@@ -20,13 +25,19 @@ class Project:
 
 class IssuesDataSource:
 
-    def __init__(self, name: str = None, url: URL = None):
+    def __init__(self, name: str = None, url: URL = None, query_concurrency: int = DEFAULT_QUERY_CONCURRENCY):
         self.name: str = name
         self.url: URL = url
+        self.query_concurrency: int = query_concurrency
 
     def export_issues(self, data_query: str, teams: List[Team]) -> Tuple[List[Issue], Dict[Team, int]]:
         raise NotImplementedError
 
+    def close(self):
+        """
+        Release resources and data shared between export_issues calls
+        """
+
 
 class CapacityPlan:
 
@@ -46,12 +57,57 @@ class CapacityPlan:
         self._issues_data_source: IssuesDataSource = issues_data_source
         self._production_calendar = production_calendar
 
-    def _export_issues_for_projects(self):
+    def _projects_by_query(self) -> Dict[str, List[Project]]:
+        projects_by_query: Dict[str, List[Project]] = {}
         for project in self._projects:
-            log.info('Exporting work items for project %s', project.name)
-            issues, known_bugs_count = self._issues_data_source.export_issues(project.data_query, self._teams)
-            project.issues = issues
-            project.known_bugs_count = known_bugs_count
+            projects_by_query.setdefault(project.data_query, []).append(project)
+        return projects_by_query
+
+    def _run_data_queries(self, export: Callable[[str, List[Team]], Any]) -> Dict[str, Any]:
+        """
+        Run every distinct data query of projects once, concurrently, with given export method of data source,
+        data source is closed afterwards. Results are returned by data query
+        """
+        projects_by_query = self._projects_by_query()
+
+        def export_issues(data_query: str):
+            log.info(
+                'Exporting work items for project(s) %s',
+                ', '.join(x.name for x in projects_by_query[data_query])
+            )
+            with profiling.span('data_source.export_issues'):
+                return export(data_query, self._teams)
+
+        with profiling.span('plan.export_issues_for_projects'):
+            try:
+                with ThreadPoolExecutor(max_workers=self._issues_data_source.query_concurrency) as executor:
+                    results = list(executor.map(export_issues, projects_by_query.keys()))
+            finally:
+                self._issues_data_source.close()
+
+        return dict(zip(projects_by_query.keys(), results))
+
+    def _export_issues_for_projects(self):
+        projects_by_query = self._projects_by_query()
+        results = self._run_data_queries(self._issues_data_source.export_issues)
+        for data_query, (issues, known_bugs_count) in results.items():
+            for project in projects_by_query[data_query]:
+                project.issues = list(issues)
+                project.known_bugs_count = dict(known_bugs_count)
+
+    def export_issue_records(self) -> list:
+        """
+        Work items of all projects with all their fields, as they are stored in issues history,
+        exported the same way as issues of the plan
+        """
+        export = getattr(self._issues_data_source, 'export_issue_records', None)
+        if export is None:
+            raise RuntimeError(f'Data source {self._issues_data_source.name} does not support saving issues history')
+
+        records = []
+        for query_records in self._run_data_queries(export).values():
+            records.extend(query_records)
+        return records
 
     @property
     def start_date(self) -> date:
@@ -76,3 +132,7 @@ class CapacityPlan:
     @property
     def data_source(self) -> IssuesDataSource:
         return self._issues_data_source
+
+    @data_source.setter
+    def data_source(self, value: IssuesDataSource):
+        self._issues_data_source = value
@@ -0,0 +1,129 @@
+"""
+Opt-in instrumentation of plan export phases.
+Spans measure wall time and number of calls of code blocks, counters count events like requests to Jira.
+Nothing is recorded unless profiling is enabled, disabled spans cost a single function call
+"""
+import json
+import sys
+import time
+from threading import Lock
+from typing import Dict, Optional
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+class SpanStats:
+
+    def __init__(self):
+        self.calls: int = 0
+        self.seconds: float = 0
+
+
+class _Profiler:
+
+    def __init__(self):
+        self.enabled: bool = False
+        self.started: Optional[float] = None
+        self.spans: Dict[str, SpanStats] = {}
+        self.counters: Dict[str, int] = {}
+        self.lock: Lock = Lock()
+
+
+_profiler = _Profiler()
+
+
+class _Span:
+
+    def __init__(self, name: str):
+        self._name: str = name
+        self._started: Optional[float] = None
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        elapsed = time.perf_counter() - self._started
+        with _profiler.lock:
+            stats = _profiler.spans.get(self._name)
+            if stats is None:
+                stats = _profiler.spans[self._name] = SpanStats()
+            stats.calls += 1
+            stats.seconds += elapsed
+
+
+class _DisabledSpan:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+_DISABLED_SPAN = _DisabledSpan()
+
+
+def enable():
+    """
+    Start recording, previously recorded values are discarded
+    """
+    with _profiler.lock:
+        _profiler.enabled = True
+        _profiler.started = time.perf_counter()
+        _profiler.spans = {}
+        _profiler.counters = {}
+
+
+def disable():
+    _profiler.enabled = False
+
+
+def is_enabled() -> bool:
+    return _profiler.enabled
+
+
+def span(name: str):
+    """
+    Context manager measuring the block, time of concurrent calls is summed up
+    """
+    return _Span(name) if _profiler.enabled else _DISABLED_SPAN
+
+
+def increment(name: str, value: int = 1):
+    if not _profiler.enabled:
+        return
+    with _profiler.lock:
+        _profiler.counters[name] = _profiler.counters.get(name, 0) + value
+
+
+def _get_peak_memory() -> Optional[int]:
+    """
+    Peak resident set size of the process in bytes
+    """
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, other systems report kilobytes
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+def make_report() -> dict:
+    with _profiler.lock:
+        return {
+            'wall_seconds': time.perf_counter() - _profiler.started if _profiler.started is not None else None,
+            'peak_memory_bytes': _get_peak_memory(),
+            'spans': {
+                name: {'calls': stats.calls, 'seconds': round(stats.seconds, 6)}
+                for name, stats in sorted(_profiler.spans.items())
+            },
+            'counters': dict(sorted(_profiler.counters.items()))
+        }
+
+
+def write_report(path: str):
+    with open(path, 'w') as report_file:
+        json.dump(make_report(), report_file, indent=2)
@@ -1,18 +1,29 @@
+import logging
 from datetime import date
-from typing import List
+from typing import Dict, List, Optional
+
+log = logging.getLogger(__name__)
 
 
 class Worker:
 
-    def __init__(self, name: str, efficiency: float = 0.5, works_since: date = None):
+    def __init__(self, name: str, efficiency: float = 0.5, works_since: date = None, aliases: List[str] = None):
         self._name = name
         self._efficiency = efficiency
         self._works_since = works_since
+        self._aliases = aliases if aliases else []
 
     @property
     def name(self) -> str:
         return self._name
 
+    @property
+    def aliases(self) -> List[str]:
+        """
+        other names of the worker in issue tracker, e.g. ipetrov for I.Petrov
+        """
+        return self._aliases
+
     def efficiency(self, *_) -> float:
         return self._efficiency
 
@@ -35,11 +46,11 @@ class TBHWorker(Worker):
         )
 
 
-def make_worker(name, efficiency: float = 0.5, works_since: date = None) -> Worker:
+def make_worker(name, efficiency: float = 0.5, works_since: date = None, aliases: List[str] = None) -> Worker:
     if 'TBH' in name:
         return TBHWorker(name, works_since=works_since)
     else:
-        return Worker(name, efficiency=efficiency, works_since=works_since)
+        return Worker(name, efficiency=efficiency, works_since=works_since, aliases=aliases)
 
 
 class Team:
@@ -84,12 +95,67 @@ def make_team(name: str, workers: List[Worker] = None, bugfix_rate: float = None
     return DevTeam(name, bugfix_rate, workers)
 
 
+def _get_surname(worker_name: str) -> str:
+    return worker_name.split('.')[-1].lower()
+
+
+class TeamDirectory:
+    """
+    Index of team members by login, surname and aliases for matching issue tracker names with teams
+    """
+
+    def __init__(self, teams: List[Team]):
+        self._teams_by_login: Dict[str, List[Team]] = {}
+        self._teams_by_surname: Dict[str, List[Team]] = {}
+        self._matches: Dict[str, Optional[Team]] = {}
+
+        for team in teams:
+            for worker in team.members:
+                for login in [worker.name] + worker.aliases:
+                    self._add(self._teams_by_login, login.lower(), team)
+                self._add(self._teams_by_surname, _get_surname(worker.name), team)
+
+    @staticmethod
+    def _add(index: Dict[str, List[Team]], key: str, team: Team):
+        teams = index.setdefault(key, [])
+        if team not in teams:
+            teams.append(team)
+
+    @staticmethod
+    def _single_team(worker_name: str, teams: List[Team], match_kind: str) -> Optional[Team]:
+        if len(teams) > 1:
+            log.warning(
+                'Ambiguous %s match of worker %s with teams %s', match_kind, worker_name, ', '.join(x.name for x in teams)
+            )
+            return None
+        return teams[0]
+
+    def _find_team(self, worker_name: str) -> Optional[Team]:
+        teams = self._teams_by_login.get(worker_name.lower())
+        if teams:
+            return self._single_team(worker_name, teams, 'login')
+
+        teams = self._teams_by_surname.get(_get_surname(worker_name))
+        if teams:
+            return self._single_team(worker_name, teams, 'surname')
+
+        # workaround for cases when name is ipetrov instead of ivan.petrov
+        teams = []
+        for surname, surname_teams in self._teams_by_surname.items():
+            if surname in worker_name.lower():
+                teams.extend(x for x in surname_teams if x not in teams)
+        if teams:
+            return self._single_team(worker_name, teams, 'partial surname')
+
+        return None
+
+    def match(self, worker_name: str) -> Optional[Team]:
+        try:
+            return self._matches[worker_name]
+        except KeyError:
+            team = self._matches[worker_name] = self._find_team(worker_name)
+            return team
+
+
 def match_team_by_worker_name(worker_name: str, teams: List[Team]) -> Team:
-    for team in teams:
-        for worker in team.members:
-            surname = worker.name.split('.')[-1].lower()
-            if surname == worker_name.split('.')[-1].lower():
-                return team
-            if surname in worker_name:
-                # workaround for cases when name is ipetrov instead of ivan.petrov
-                return team
+    return TeamDirectory(teams).match(worker_name)
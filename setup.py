@@ -26,7 +26,8 @@ def walker(base, *paths):
 requires = (
     'jira',
     'openpyxl',
-    'XlsxWriter',
+    # constant_memory mode of xlsx exporter relies on internals of worksheet, see register_merged_range
+    'XlsxWriter>=3.0,<4',
     'PyYAML>=4.2b1',
     'yarl',
     'python-dateutil',
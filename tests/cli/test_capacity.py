@@ -0,0 +1,47 @@
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch, Mock
+
+from openpyxl import load_workbook
+
+from plan_b.exporters.config import make_capacity_plan_from_config
+from plan_b.exporters.xlsx.layout import make_plan_layout, CALENDAR_TABLE_HEADER_ROWS
+from tests.cli.test_cli import issues_side_effect, comments_side_effect
+
+
+class TestCapacityModel(TestCase):
+
+    @patch('jira.JIRA')
+    def test_formula_cells_have_model_values(self, jira_mock):
+        jira_mock().search_issues = Mock(side_effect=issues_side_effect)
+        jira_mock().comments = Mock(side_effect=comments_side_effect)
+
+        config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'config-test.yml')
+        plan = make_capacity_plan_from_config(config_path)
+        with TemporaryDirectory() as output_dir:
+            output_path = os.path.join(output_dir, 'plan.xlsx')
+            plan.export(output_path)
+            formulas = load_workbook(output_path)
+            values = load_workbook(output_path, data_only=True)
+
+        layout = make_plan_layout(
+            plan.projects, plan.teams, plan.start_date, plan.end_date, plan.production_calendar
+        )
+
+        for team, team_layout in layout.teams.items():
+            for cell_ref in team_layout.total_cells:
+                row, column = cell_ref.pos.row + 1, cell_ref.pos.column + 1
+                if str(formulas[cell_ref.pos.sheet_name].cell(row, column).value).startswith('='):
+                    self.assertAlmostEqual(
+                        cell_ref.value, values[cell_ref.pos.sheet_name].cell(row, column).value, msg=cell_ref.title
+                    )
+
+            capacity = team_layout.capacity
+            remaining_row = team_layout.calendar_offset.row + CALENDAR_TABLE_HEADER_ROWS
+            difference_row = remaining_row + len(team_layout.total_cells) + 1
+            for i, remaining in enumerate(capacity.remaining):
+                self.assertAlmostEqual(remaining, values[team.name].cell(remaining_row, i + 2).value)
+                # nothing is allocated in a new plan
+                self.assertAlmostEqual(remaining, values[team.name].cell(difference_row, i + 2).value)
+            self.assertTrue(any(capacity.remaining))
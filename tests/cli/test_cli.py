@@ -1,4 +1,6 @@
 import os
+import subprocess
+import sys
 
 from collections import namedtuple
 from unittest import TestCase
@@ -52,61 +54,62 @@ def _make_comment(author, body):
 
 
 def comments_side_effect(issue):
+    key = getattr(issue, 'key', issue)
     # A1 project
-    if issue.key == 'A-00001':
+    if key == 'A-00001':
         return [
             _make_comment('V.Ivanov', '#plan reqs: hi, design: med, impl: 10d, doc: 1d, arch: 1d'),
             _make_comment('B.Smithson', '#plan qa: 1d'),
         ]
-    elif issue.key == 'A-00002':
+    elif key == 'A-00002':
         return [
             _make_comment('J.Smith', '#plan reqs: hi, design: lo, impl: 5d, perf: 1w'),
             _make_comment('B.Smithson', '#plan qa: 2d'),
         ]
-    elif issue.key == 'A-00003':
+    elif key == 'A-00003':
         return [
             _make_comment('V.Ivanov', '#plan reqs: lo, design: med, impl: 1d, doc: 1d'),
             _make_comment('J.Smith', '#plan reqs: med, design: lo, impl: 1w, doc: 1d'),
             _make_comment('B.Smithson', '#plan qa: 5d'),
             _make_comment('A.Testerson', '#plan qa: 1d'),
         ]
-    elif issue.key == 'A-00005':
+    elif key == 'A-00005':
         return [
             _make_comment('V.Ivanov', '#plan reqs: lo, design: med, impl: 1d, doc: 1d'),
         ]
     # B2U4 project
-    elif issue.key == 'A-00050':
+    elif key == 'A-00050':
         return [
             _make_comment('J.Smith', '#plan reqs: lo, design: lo, impl: 5w, doc: 1d, arch: 3d'),
             _make_comment('A.Testerson', '#plan qa: 3d'),
             _make_comment('B.Smithson', '#plan qa: 1d'),
         ]
-    elif issue.key == 'A-00051':
+    elif key == 'A-00051':
         return [
             _make_comment('V.Ivanov', '#plan reqs: hi, design: lo, impl: 10w, doc: 1d, arch: 4d'),
             _make_comment('A.Testerson', '#plan qa: 2d'),
             _make_comment('B.Smithson', '#plan qa: 2d'),
         ]
     # qa specific epics
-    elif issue.key == 'A-00006':
+    elif key == 'A-00006':
         return [
             _make_comment('B.Smithson', '#plan qa: 1w'),
             _make_comment('A.Testerson', '#plan qa: 2w')
         ]
-    elif issue.key == 'A-00007':
+    elif key == 'A-00007':
         return [
             _make_comment('B.Smithson', '#plan qa: 3w'),
             _make_comment('A.Testerson', '#plan qa: 4w')
         ]
-    elif issue.key == 'A-00008':
+    elif key == 'A-00008':
         return [
             _make_comment('B.Smithson', '#plan qa: 3w'),
         ]
-    elif issue.key == 'A-00009':
+    elif key == 'A-00009':
         return [
             _make_comment('A.Testerson', '#plan qa: 1w')
         ]
-    elif issue.key == 'A-00010':
+    elif key == 'A-00010':
         return [
             _make_comment('B.Smithson', '#plan qa: 1w'),
         ]
@@ -159,3 +162,11 @@ class TestPlanExport(TestCase):
             os.path.join(data_dir_path, 'config-test.yml'),
             os.path.join(data_dir_path, 'test.xlsx')
         )
+
+    def test_heavy_modules_are_not_imported_on_start(self):
+        output = subprocess.check_output([
+            sys.executable,
+            '-c',
+            'import sys, plan_b.cli; print(",".join(x for x in ("jira", "xlsxwriter", "openpyxl") if x in sys.modules))'
+        ])
+        self.assertEqual('', output.decode().strip())
@@ -1,6 +1,6 @@
 from unittest import TestCase
 
-from plan_b.issue import parse_work_estimate_text, ConfidenceLevel
+from plan_b.issue import parse_work_estimate_text, ConfidenceLevel, EstimateParseError
 from plan_b.team import Team, Worker
 
 
@@ -68,3 +68,29 @@ design med because IPN client lib itself is not finalized yet
         self.assertEqual(ConfidenceLevel.Medium, r.design_level)
         self.assertEqual(10 * 8 * 60 * 60, r.implementation)
         self.assertEqual('a', possible_team)
+
+    def test_repeated_key_last_value_wins(self):
+        r, _ = parse_work_estimate_text('#plan impl: 1d, impl: 2d', 'Vasily.Ivanov', teams)
+        self.assertEqual(2 * 8 * 60 * 60, r.implementation)
+
+    def test_error_positions(self):
+        with self.assertRaises(EstimateParseError) as e:
+            parse_work_estimate_text('#plan reqs: hi, impl:  10x', 'Vasily.Ivanov', teams)
+        self.assertEqual(23, e.exception.position)
+
+        with self.assertRaises(EstimateParseError) as e:
+            parse_work_estimate_text('#plan impl: 1d, implementation: 2d', 'Vasily.Ivanov', teams)
+        self.assertEqual(32, e.exception.position)
+
+        with self.assertRaises(EstimateParseError) as e:
+            parse_work_estimate_text('#plan\ndoc: 1d: 2d', 'Vasily.Ivanov', teams)
+        self.assertEqual(13, e.exception.position)
+
+    def test_quoted_plan_tag(self):
+        r, _ = parse_work_estimate_text('#plan reqs: lo, design: hi\nprevious #plan impl: 2w', 'Vasily.Ivanov', teams)
+        self.assertEqual(ConfidenceLevel.Low, r.reqs_level)
+        self.assertEqual(ConfidenceLevel.High, r.design_level)
+        self.assertIsNone(r.implementation)
+
+        r, _ = parse_work_estimate_text('#plan: #plan impl: 1d', 'Vasily.Ivanov', teams)
+        self.assertIsNone(r.implementation)
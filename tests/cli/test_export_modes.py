@@ -0,0 +1,70 @@
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch, Mock
+
+from openpyxl import load_workbook
+from xlsxwriter import Workbook
+
+from plan_b.exporters.config import make_capacity_plan_from_config
+from plan_b.exporters.xlsx.utils import RowOrderedSheet
+from tests.cli.test_cli import issues_side_effect, comments_side_effect
+
+
+def _read_workbook(path: str) -> dict:
+    workbook = load_workbook(path)
+    return {
+        sheet.title: (
+            [[(cell.value, cell.number_format, cell.font.b, cell.fill.fgColor.rgb) for cell in row]
+             for row in sheet.iter_rows()],
+            sorted(str(x) for x in sheet.merged_cells.ranges)
+        )
+        for sheet in workbook.worksheets
+    }
+
+
+class TestExportModes(TestCase):
+
+    @patch('jira.JIRA')
+    def test_same_content_in_all_modes(self, jira_mock):
+        jira_mock().search_issues = Mock(side_effect=issues_side_effect)
+        jira_mock().comments = Mock(side_effect=comments_side_effect)
+
+        config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'config-test.yml')
+        with TemporaryDirectory() as output_dir:
+            content = []
+            for constant_memory in (False, True):
+                plan = make_capacity_plan_from_config(config_path)
+                plan._constant_memory = constant_memory
+                output_path = os.path.join(output_dir, f'plan-{constant_memory}.xlsx')
+                plan.export(output_path)
+                content.append(_read_workbook(output_path))
+
+        for other_content in content[1:]:
+            self.assertEqual(content[0], other_content)
+        self.assertIn('A2:A3', content[0]['A1'][1])
+
+    def test_constant_memory_merged_ranges(self):
+        with TemporaryDirectory() as output_dir:
+            path = os.path.join(output_dir, 'merged.xlsx')
+            workbook = Workbook(path, {'constant_memory': True})
+            sheet = RowOrderedSheet(workbook.add_worksheet('merged'))
+            sheet.write(3, 0, 'below')
+            sheet.merge_range(0, 0, 1, 0, 'Key')
+            sheet.merge_range(0, 1, 0, 3, 'Confidence')
+            sheet.write(1, 1, 'Reqs')
+            sheet.flush()
+            workbook.close()
+
+            sheet = load_workbook(path)['merged']
+            self.assertEqual(['A1:A2', 'B1:D1'], sorted(str(x) for x in sheet.merged_cells.ranges))
+            self.assertEqual(
+                [('Key', 'Confidence'), (None, 'Reqs'), (None, None), ('below', None)],
+                [(row[0].value, row[1].value) for row in sheet.iter_rows(max_col=2)]
+            )
+
+    def test_constant_memory_unsupported_worksheet(self):
+        sheet = RowOrderedSheet(Mock(spec=['name', 'write']))
+        sheet.merge_range(0, 0, 0, 1, 'Key')
+        with self.assertRaises(RuntimeError):
+            sheet.flush()
@@ -0,0 +1,24 @@
+from unittest import TestCase
+
+from xlsxwriter import Workbook
+
+from plan_b.exporters.xlsx import formats
+from plan_b.exporters.xlsx.project import _get_format_for_confidence_level, BorderPos
+
+
+class TestFormats(TestCase):
+
+    def test_formats_are_interned(self):
+        workbook = Workbook('unused.xlsx', {'in_memory': True})
+        formats.init_formats(workbook)
+        formats_count = len(workbook.formats)
+
+        for level in (1, 1.2, 2) * 100:
+            for border_pos in (BorderPos.Left, BorderPos.Right):
+                _get_format_for_confidence_level(level, border_pos)
+
+        self.assertEqual(formats_count + 6, len(workbook.formats))
+        self.assertIs(formats.numeric_format, formats.get_format({'num_format': '0.0'}))
+        self.assertIsNot(
+            _get_format_for_confidence_level(1, BorderPos.Left), _get_format_for_confidence_level(2, BorderPos.Left)
+        )
@@ -0,0 +1,76 @@
+from collections import defaultdict
+from unittest import TestCase
+
+from plan_b.team import Team, make_team
+from plan_b.issue import Issue, WorkEstimate, ConfidenceLevel
+from plan_b.issue_table import IssueTable, DEFAULT_CONFIDENCE_LEVEL
+
+WEEK = 5 * 8 * 60 * 60
+
+
+def _make_issue(key: str, status: str, owner: Team, estimates: dict) -> Issue:
+    return Issue(key, issue_status=status, owned_by_team=owner, work_estimates=defaultdict(WorkEstimate, estimates))
+
+
+class TestIssueTable(TestCase):
+
+    def setUp(self):
+        self.dev = make_team('Dev', bugfix_rate=0.5)
+        self.other_dev = make_team('Other', bugfix_rate=0.5)
+        self.qa = make_team('QA')
+        self.teams = [self.dev, self.other_dev, self.qa]
+
+    def test_columns(self):
+        open_issue = _make_issue('P-1', 'Open', self.dev, {
+            self.dev.name: WorkEstimate(
+                reqs_level=ConfidenceLevel.Medium, implementation=2 * WEEK, arch_design=WEEK, qa_effort=WEEK
+            ),
+            self.qa.name: WorkEstimate(design_level=ConfidenceLevel.High, qa_effort=WEEK),
+            'Unknown': WorkEstimate(documentation=WEEK)
+        })
+        closed_issue = _make_issue('P-2', 'Done', self.dev, {self.dev.name: WorkEstimate(implementation=4 * WEEK)})
+        qa_issue = _make_issue(
+            'P-3', 'Open', self.qa, {self.qa.name: WorkEstimate(reqs_level=ConfidenceLevel.Low, qa_effort=WEEK)}
+        )
+
+        table = IssueTable([open_issue, closed_issue, qa_issue, Issue('P-4')], self.teams)
+
+        self.assertEqual(4, len(table))
+        self.assertEqual([0, 1], table.dev_rows)
+        self.assertEqual([2], table.qa_rows)
+
+        self.assertEqual([2, 0, 0, 0], list(table.implementation[self.dev.name]))
+        self.assertEqual([0, 0, 0, 0], list(table.implementation[self.other_dev.name]))
+        self.assertEqual([2, 0, 0, 0], list(table.implementation_total))
+        self.assertEqual([1, 0, 1, 0], list(table.qa_effort_total))
+        self.assertEqual([1, 0, 0, 0], list(table.arch_design))
+        self.assertEqual([1, 0, 0, 0], list(table.documentation))
+
+        self.assertEqual([1.5, DEFAULT_CONFIDENCE_LEVEL, 0, DEFAULT_CONFIDENCE_LEVEL], list(table.reqs_level))
+        self.assertEqual([1, DEFAULT_CONFIDENCE_LEVEL, 0, DEFAULT_CONFIDENCE_LEVEL], list(table.design_level))
+
+        # remaining estimates of closed issues are zero, but original ones are kept
+        self.assertEqual([2, 4, 0, 0], list(table.orig_implementation[self.dev.name]))
+        self.assertEqual([True, False, True, True], [bool(x) for x in table.is_open])
+
+    def test_new_bugs_count(self):
+        issue = _make_issue(
+            'P-1', 'In Progress', self.dev, {self.dev.name: WorkEstimate(implementation=2 * WEEK, qa_effort=WEEK)}
+        )
+        closed_issue = _make_issue('P-2', 'Resolved', self.dev, {self.dev.name: WorkEstimate(implementation=10 * WEEK)})
+
+        table = IssueTable([issue, closed_issue], self.teams)
+
+        self.assertEqual(15, table.new_bugs_count(self.dev))
+        self.assertEqual(0, table.new_bugs_count(self.other_dev))
+
+    def test_missing_estimates_are_not_added(self):
+        issue = _make_issue('P-1', 'Open', self.dev, {self.dev.name: WorkEstimate(implementation=WEEK)})
+        closed_issue = _make_issue('P-2', 'Closed', self.dev, {self.dev.name: WorkEstimate(implementation=WEEK)})
+
+        IssueTable([issue, closed_issue], self.teams)
+
+        self.assertEqual([self.dev.name], list(issue.remaining_estimates_by_team))
+        self.assertEqual([self.dev.name], list(closed_issue.remaining_estimates_by_team))
+        self.assertEqual(0, closed_issue.remaining_estimates_by_team[self.dev.name].implementation)
+        self.assertEqual(WEEK, closed_issue.orig_estimates_by_team[self.dev.name].implementation)
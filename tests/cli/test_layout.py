@@ -0,0 +1,41 @@
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch, Mock
+
+from openpyxl import load_workbook
+
+from plan_b.exporters.config import make_capacity_plan_from_config
+from plan_b.exporters.xlsx.layout import make_plan_layout
+from tests.cli.test_cli import issues_side_effect, comments_side_effect
+
+
+class TestPlanLayout(TestCase):
+
+    @patch('jira.JIRA')
+    def test_layout_matches_written_workbook(self, jira_mock):
+        jira_mock().search_issues = Mock(side_effect=issues_side_effect)
+        jira_mock().comments = Mock(side_effect=comments_side_effect)
+
+        config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'config-test.yml')
+        plan = make_capacity_plan_from_config(config_path)
+        with TemporaryDirectory() as output_dir:
+            output_path = os.path.join(output_dir, 'plan.xlsx')
+            plan.export(output_path)
+            workbook = load_workbook(output_path)
+
+        layout = make_plan_layout(
+            plan.projects, plan.teams, plan.start_date, plan.end_date, plan.production_calendar
+        )
+
+        for team, team_layout in layout.teams.items():
+            self.assertTrue(team_layout.total_cells)
+            team_sheet = workbook[team.name]
+            for cell_ref in team_layout.total_cells:
+                total_cell = workbook[cell_ref.pos.sheet_name].cell(cell_ref.pos.row + 1, cell_ref.pos.column + 1)
+                self.assertIsNotNone(total_cell.value, cell_ref.title)
+
+                allocation = team_layout.allocation_regions[cell_ref.title]
+                self.assertEqual(
+                    cell_ref.title, team_sheet.cell(allocation.offset.row + 1, allocation.offset.column + 1).value
+                )
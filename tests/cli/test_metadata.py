@@ -0,0 +1,89 @@
+import os
+import shutil
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch, Mock
+from zipfile import ZipFile
+
+from openpyxl import load_workbook
+from xlsxwriter import Workbook
+
+from plan_b.exporters.config import make_capacity_plan_from_config
+from plan_b.exporters.xlsx.metadata import load_metadata
+from plan_b.exporters.xlsx.reader import XlsxValuesReader, parse_cell_ref
+from tests.cli.test_cli import issues_side_effect, comments_side_effect
+
+
+data_dir_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+def _load_metadata_with_openpyxl(filename: str) -> dict:
+    """
+    allocations of every item as they are seen by openpyxl
+    """
+    workbook = load_workbook(filename)
+    result = {}
+    team = None
+    for row in workbook['Meta'].iter_rows(values_only=True):
+        if row[0] == 'Team':
+            team = row[1]
+        elif row[0] == 'Item':
+            _, name, item_row, column, _, column_count = row[:6]
+            result[(team, name)] = [
+                workbook[team].cell(item_row + 1, x + 1).value for x in range(column, column + column_count)
+            ]
+    return result
+
+
+def _allocations(team_allocations) -> dict:
+    return {
+        (team, name): [x[1] for x in item.allocations]
+        for team, allocation in team_allocations.items() for name, item in allocation.items.items()
+    }
+
+
+class TestMetadataLoading(TestCase):
+
+    def test_metadata_sheet(self):
+        # files exported before plan state was stored in workbook properties
+        path = os.path.join(data_dir_path, 'test-meta-sheet.xlsx')
+        allocations = _allocations(load_metadata(path))
+
+        self.assertTrue(allocations)
+        self.assertEqual(_load_metadata_with_openpyxl(path), allocations)
+
+    @patch('jira.JIRA')
+    def test_plan_state(self, jira_mock):
+        jira_mock().search_issues = Mock(side_effect=issues_side_effect)
+        jira_mock().comments = Mock(side_effect=comments_side_effect)
+
+        previous_allocations = _allocations(load_metadata(os.path.join(data_dir_path, 'test-meta-sheet.xlsx')))
+        with TemporaryDirectory() as output_dir:
+            path = os.path.join(output_dir, 'plan.xlsx')
+            shutil.copy(os.path.join(data_dir_path, 'test-meta-sheet.xlsx'), path)
+
+            make_capacity_plan_from_config(os.path.join(data_dir_path, 'config-test.yml')).export(path)
+
+            self.assertNotIn('Meta', load_workbook(path).sheetnames)
+            self.assertEqual(previous_allocations, _allocations(load_metadata(path)))
+
+    def test_cell_values(self):
+        with TemporaryDirectory() as output_dir:
+            path = os.path.join(output_dir, 'values.xlsx')
+            for constant_memory in (False, True):
+                workbook = Workbook(path, {'constant_memory': constant_memory})
+                sheet = workbook.add_worksheet('Team Alpha')
+                sheet.write_row(0, 0, ['title', 1, 2.5, '=B1+C1', True])
+                sheet.write(2, 27, 'far away')
+                workbook.close()
+
+                with ZipFile(path) as package:
+                    cells = XlsxValuesReader(package).read_cells('Team Alpha', {(0, 0), (0, 2), (0, 3), (0, 5), (2, 27)})
+
+                self.assertEqual(
+                    {(0, 0): 'title', (0, 2): 2.5, (0, 3): '=B1+C1', (2, 27): 'far away'}, cells, constant_memory
+                )
+
+    def test_parse_cell_ref(self):
+        self.assertEqual((0, 0), parse_cell_ref('A1'))
+        self.assertEqual((11, 27), parse_cell_ref('AB12'))
@@ -0,0 +1,64 @@
+from datetime import date, timedelta
+from unittest import TestCase
+
+from plan_b.date_utils import ProductionCalendar, get_month_workdays_count
+from plan_b.exporters.config import make_production_calendar
+
+
+calendar_description = {
+    2018: {'Jan': '1-5,8', 'Apr': '30,x28', 'Dec': 'x29, 31'},
+    2019: {'Jan': '1-4,7-8', 'Mar': 8},
+}
+
+
+def _workdays_count(start_date: date, end_date: date, production_calendar: dict) -> int:
+    """
+    straightforward day by day count for comparison
+    """
+    result = 0
+    day = start_date
+    while day <= end_date:
+        month = production_calendar[day.year][day.month - 1] if day.year in production_calendar else None
+        if month and day.day in month['workdays']:
+            result += 1
+        elif day.weekday() < 5 and not (month and day.day in month['holidays']):
+            result += 1
+        day += timedelta(days=1)
+    return result
+
+
+class TestProductionCalendar(TestCase):
+
+    def setUp(self):
+        self.description = make_production_calendar(calendar_description)
+        self.calendar = ProductionCalendar.from_dict(self.description)
+
+    def test_month_workdays(self):
+        self.assertEqual(
+            {date(2018, 4, 1): 21, date(2018, 5, 1): 23, date(2018, 12, 1): 21},
+            {
+                k: v for k, v in get_month_workdays_count(date(2018, 4, 1), date(2018, 12, 31), self.calendar).items()
+                if k.month in (4, 5, 12)
+            }
+        )
+        self.assertEqual(17, self.calendar.workdays_count(date(2019, 1, 1), date(2019, 1, 31)))
+
+    def test_dict_calendar_is_accepted(self):
+        self.assertEqual(
+            get_month_workdays_count(date(2018, 10, 10), date(2019, 2, 5), self.calendar),
+            get_month_workdays_count(date(2018, 10, 10), date(2019, 2, 5), self.description)
+        )
+
+    def test_ranges(self):
+        start = date(2017, 12, 20)
+        for offset in range(0, 800, 7):
+            for length in (0, 1, 5, 40, 400):
+                first = start + timedelta(days=offset)
+                last = first + timedelta(days=length)
+                self.assertEqual(
+                    _workdays_count(first, last, self.description), self.calendar.workdays_count(first, last),
+                    f'{first} - {last}'
+                )
+
+    def test_empty_range(self):
+        self.assertEqual(0, self.calendar.workdays_count(date(2018, 5, 2), date(2018, 5, 1)))
@@ -0,0 +1,72 @@
+import json
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch, Mock
+
+from plan_b import profiling
+from plan_b.exporters.config import make_capacity_plan_from_config
+from tests.cli.test_cli import issues_side_effect, comments_side_effect
+
+
+class TestProfiling(TestCase):
+
+    def tearDown(self):
+        profiling.disable()
+
+    def test_disabled(self):
+        with profiling.span('phase'):
+            profiling.increment('requests')
+
+        profiling.enable()
+        report = profiling.make_report()
+        self.assertEqual({}, report['spans'])
+        self.assertEqual({}, report['counters'])
+
+    def test_spans_and_counters(self):
+        profiling.enable()
+        for _ in range(3):
+            with profiling.span('phase'):
+                profiling.increment('requests', 2)
+        with self.assertRaises(ValueError):
+            with profiling.span('failed phase'):
+                raise ValueError()
+
+        report = profiling.make_report()
+        self.assertEqual(3, report['spans']['phase']['calls'])
+        self.assertEqual(1, report['spans']['failed phase']['calls'])
+        self.assertGreaterEqual(report['wall_seconds'], report['spans']['phase']['seconds'])
+        self.assertEqual({'requests': 6}, report['counters'])
+
+    @patch('jira.JIRA')
+    def test_plan_export_report(self, jira_mock):
+        jira_mock().search_issues = Mock(side_effect=issues_side_effect)
+        jira_mock().comments = Mock(side_effect=comments_side_effect)
+
+        config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'config-test.yml')
+        plan = make_capacity_plan_from_config(config_path)
+        profiling.enable()
+        with TemporaryDirectory() as output_dir:
+            output_path = os.path.join(output_dir, 'plan.xlsx')
+            plan.export(output_path)
+            plan.export(output_path)
+
+            report_path = os.path.join(output_dir, 'profile.json')
+            profiling.write_report(report_path)
+            with open(report_path) as report_file:
+                report = json.load(report_file)
+
+        for name in (
+            'plan.export_issues_for_projects',
+            'jira.search_issues',
+            'jira.load_comments',
+            'jira.parse_comments',
+            'xlsx.fill_project_worksheet',
+            'xlsx.fill_calendar_plan_worksheet',
+            'xlsx.workbook_close'
+        ):
+            self.assertIn(name, report['spans'])
+        self.assertEqual(1, report['spans']['xlsx.load_metadata']['calls'])
+        self.assertEqual(2 * len(plan.teams), report['spans']['xlsx.fill_calendar_plan_worksheet']['calls'])
+        self.assertEqual(jira_mock().comments.call_count, report['counters']['jira.comments_requests'])
+        self.assertGreater(report['counters']['jira.search_requests'], 0)
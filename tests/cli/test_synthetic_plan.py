@@ -0,0 +1,35 @@
+from unittest import TestCase
+
+from tests_performance.pipeline import run_benchmark, PHASES
+from tests_performance.synthetic import PlanSize, SyntheticPlan, SyntheticJira
+
+SIZE = PlanSize(projects=2, issues=30, teams=3, months=3)
+
+
+class TestSyntheticPlan(TestCase):
+
+    def test_same_seed_gives_same_plan(self):
+        plan, same_plan, other_plan = SyntheticPlan(SIZE, 1), SyntheticPlan(SIZE, 1), SyntheticPlan(SIZE, 2)
+        self.assertEqual(plan.make_config(), same_plan.make_config())
+        self.assertEqual(plan.make_issues('P001'), same_plan.make_issues('P001'))
+        self.assertNotEqual(plan.make_issues('P001'), other_plan.make_issues('P001'))
+
+    def test_size(self):
+        plan = SyntheticPlan(SIZE)
+        config = plan.make_config()
+        self.assertEqual(2, len(config['projects']))
+        self.assertEqual(3, len(config['teams']))
+        self.assertEqual('2019-03-31', str(plan.end_date))
+
+        jira = SyntheticJira(plan)
+        page = jira.search_issues(config['projects'][1]['data_query'], startAt=20, maxResults=20)
+        self.assertEqual(30, page.total)
+        self.assertEqual(['P001-00021', 'P001-00030'], [page[0].key, page[-1].key])
+        self.assertEqual(list(page[0].fields.comment.comments), jira.comments('P001-00021'))
+
+    def test_benchmark(self):
+        results = run_benchmark(SIZE, repeat=1, trace_memory=False)
+        self.assertEqual(list(PHASES), list(results.keys()))
+        for values in results.values():
+            self.assertGreaterEqual(values['seconds'], 0)
+            self.assertIsNone(values['peak_memory_mb'])
@@ -0,0 +1,38 @@
+from unittest import TestCase
+
+from plan_b.team import Team, Worker, TeamDirectory
+
+
+teams = [
+    Team('a', [Worker('V.Ivanov'), Worker('P.Smirnov', aliases=['psm'])]),
+    Team('b', [Worker('A.Petrov'), Worker('S.Kuznetsov')]),
+    Team('c', [Worker('I.Petrov'), Worker('N.Ivanova')]),
+]
+
+
+class TestTeamDirectory(TestCase):
+
+    def setUp(self):
+        self.directory = TeamDirectory(teams)
+
+    def test_exact_login(self):
+        self.assertEqual('b', self.directory.match('A.Petrov').name)
+        self.assertEqual('c', self.directory.match('i.petrov').name)
+
+    def test_surname(self):
+        self.assertEqual('a', self.directory.match('Vasily.Ivanov').name)
+        self.assertEqual('c', self.directory.match('Natalia.Ivanova').name)
+
+    def test_alias(self):
+        self.assertEqual('a', self.directory.match('PSM').name)
+
+    def test_partial_surname(self):
+        self.assertEqual('b', self.directory.match('skuznetsov').name)
+
+    def test_ambiguous_match(self):
+        # surname petrov belongs to members of two teams
+        with self.assertLogs('plan_b.team', 'WARNING'):
+            self.assertIsNone(self.directory.match('Ivan.Petrov'))
+
+    def test_no_match(self):
+        self.assertIsNone(self.directory.match('J.Smith'))
@@ -0,0 +1,56 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from plan_b.exporters.config import make_capacity_plan
+from tests_performance.jira_server import MockJiraServer
+from tests_performance.synthetic import PlanSize, SyntheticPlan, SyntheticJira
+
+SIZE = PlanSize(projects=2, issues=60, teams=3, months=3)
+
+
+def _describe(issues) -> list:
+    return [
+        (x.issue_key, x.owned_by_team.name if x.owned_by_team else None, sorted(x.orig_estimates_by_team.keys()))
+        for x in issues
+    ]
+
+
+class TestJiraIssuesDataSourceOverHttp(TestCase):
+
+    def setUp(self):
+        self.synthetic_plan = SyntheticPlan(SIZE)
+
+    def _export(self, server: MockJiraServer = None, **data_source_options):
+        config = self.synthetic_plan.make_config()
+        config['issue_data_sources'][0].update(data_source_options)
+        if server is not None:
+            config['issue_data_sources'][0]['url'] = server.url
+        plan = make_capacity_plan(config)
+        plan._export_issues_for_projects()
+        return [(_describe(x.issues), sorted(v for v in x.known_bugs_count.values())) for x in plan.projects]
+
+    def test_export_issues(self):
+        with patch('jira.JIRA', return_value=SyntheticJira(self.synthetic_plan)):
+            expected = self._export()
+
+        with MockJiraServer(self.synthetic_plan, max_page_size=25) as server:
+            self.assertEqual(expected, self._export(server, page_size=100))
+            # pages are limited by server, 60 issues of every project are returned in 3 pages
+            self.assertEqual(6, server.stats['search_requests'])
+            self.assertEqual(sum(len(x[0]) for x in expected), server.stats['comments_requests'])
+
+            server.reset_stats()
+            self.assertEqual(expected, self._export(server, inline_comments=True, count_bugs_on_server=True))
+            self.assertEqual(0, server.stats['comments_requests'])
+
+    def test_server_error(self):
+        with MockJiraServer(self.synthetic_plan, error_rate=1, error_status=500) as server:
+            with self.assertRaises(Exception):
+                self._export(server)
+            self.assertGreater(server.stats['errors'], 0)
+
+    def test_fractional_rate_limit(self):
+        with MockJiraServer(self.synthetic_plan, rate_limit=0.5) as server:
+            self.assertIsNone(server.admit())
+            self.assertEqual(429, server.admit())
+            self.assertEqual(1, server.stats['throttled'])
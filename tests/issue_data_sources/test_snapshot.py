@@ -0,0 +1,128 @@
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch, Mock
+
+import openpyxl
+
+from plan_b.cli import do_work
+from plan_b.issue_data_sources.snapshot import (
+    RecordingIssuesDataSource, SnapshotIssuesDataSource, SNAPSHOT_HEADER, SNAPSHOT_MAGIC
+)
+from plan_b.team import make_team, make_worker
+from tests.cli.test_cli import issues_side_effect, comments_side_effect
+from tests.issue_data_sources.test_jira import _make_data_source, teams
+
+QUERIES = ('some query for A1', 'some other query for B2U4')
+
+
+def _describe_estimates(estimates: dict) -> dict:
+    return {k: [getattr(v, x) for x in v.__slots__] for k, v in estimates.items()}
+
+
+def _describe(issues) -> list:
+    return [
+        (
+            x.issue_key,
+            x.issue_summary,
+            x.issue_url,
+            x.issue_status,
+            x.owned_by_team,
+            _describe_estimates(x.orig_estimates_by_team),
+            _describe_estimates(x.remaining_estimates_by_team)
+        )
+        for x in issues
+    ]
+
+
+class TestSnapshot(TestCase):
+
+    def setUp(self):
+        self._dir = TemporaryDirectory()
+        self.path = os.path.join(self._dir.name, 'issues.snapshot')
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def _record(self) -> list:
+        data_source = RecordingIssuesDataSource(_make_data_source(), self.path)
+        results = [data_source.export_issues(x, teams) for x in QUERIES]
+        data_source.close()
+        data_source.save()
+        return results
+
+    def test_replay(self):
+        recorded = self._record()
+        data_source = SnapshotIssuesDataSource(self.path)
+        for data_query, (issues, known_bugs_count) in zip(QUERIES, recorded):
+            replayed_issues, replayed_known_bugs_count = data_source.export_issues(data_query, teams)
+            self.assertEqual(_describe(issues), _describe(replayed_issues))
+            self.assertEqual(known_bugs_count, replayed_known_bugs_count)
+
+        with self.assertRaises(RuntimeError):
+            data_source.export_issues('unknown query', teams)
+
+    def test_teams_are_matched_by_name(self):
+        self._record()
+        changed_teams = [make_team('Team Alpha', [make_worker('V.Ivanov', efficiency=0.5)], bugfix_rate=0.5)]
+        issues, known_bugs_count = SnapshotIssuesDataSource(self.path).export_issues(QUERIES[0], changed_teams)
+        self.assertEqual({changed_teams[0]: 1}, known_bugs_count)
+        self.assertEqual({changed_teams[0], None}, {x.owned_by_team for x in issues})
+
+    def test_invalid_file(self):
+        self._record()
+        with open(self.path, 'rb') as snapshot_file:
+            data = snapshot_file.read()
+
+        for header in (b'not a snapshot', SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, 999)):
+            with open(self.path, 'wb') as snapshot_file:
+                snapshot_file.write(header + data[SNAPSHOT_HEADER.size:])
+            with self.assertRaises(RuntimeError):
+                SnapshotIssuesDataSource(self.path).export_issues(QUERIES[0], teams)
+
+    @patch('jira.JIRA')
+    def test_plan_export(self, jira_mock):
+        jira_mock().search_issues = Mock(side_effect=issues_side_effect)
+        jira_mock().comments = Mock(side_effect=comments_side_effect)
+
+        config_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'cli', 'data', 'config-test.yml')
+        recorded_path = os.path.join(self._dir.name, 'recorded.xlsx')
+        replayed_path = os.path.join(self._dir.name, 'replayed.xlsx')
+        do_work(config_path, recorded_path, record_snapshot=self.path)
+
+        jira_mock.reset_mock()
+        jira_mock().search_issues = Mock(side_effect=AssertionError('Jira must not be queried'))
+        do_work(config_path, replayed_path, replay_snapshot=self.path)
+        jira_mock().search_issues.assert_not_called()
+
+        recorded, replayed = openpyxl.load_workbook(recorded_path), openpyxl.load_workbook(replayed_path)
+        self.assertEqual(recorded.sheetnames, replayed.sheetnames)
+        for name in recorded.sheetnames:
+            self.assertEqual(
+                [[c.value for c in row] for row in recorded[name].iter_rows()],
+                [[c.value for c in row] for row in replayed[name].iter_rows()]
+            )
+
+    @patch('jira.JIRA')
+    def test_failed_recording_keeps_snapshot(self, jira_mock):
+        jira_mock().comments = Mock(side_effect=comments_side_effect)
+        config_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'cli', 'data', 'config-test.yml')
+        output_path = os.path.join(self._dir.name, 'plan.xlsx')
+
+        jira_mock().search_issues = Mock(side_effect=issues_side_effect)
+        do_work(config_path, output_path, record_snapshot=self.path)
+        with open(self.path, 'rb') as snapshot_file:
+            recorded = snapshot_file.read()
+        os.unlink(output_path)
+
+        def fail_on_second_query(data_query, **kwargs):
+            if 'B2U4' in data_query:
+                raise RuntimeError('Jira is not available')
+            return issues_side_effect(data_query, **kwargs)
+
+        jira_mock().search_issues = Mock(side_effect=fail_on_second_query)
+        with self.assertRaises(RuntimeError):
+            do_work(config_path, output_path, record_snapshot=self.path)
+        with open(self.path, 'rb') as snapshot_file:
+            self.assertEqual(recorded, snapshot_file.read())
+        self.assertEqual(['issues.snapshot'], sorted(x for x in os.listdir(self._dir.name) if 'snapshot' in x))
@@ -0,0 +1,135 @@
+from datetime import datetime
+
+from alembic.command import upgrade as upgrade_database, downgrade as downgrade_database
+from sqlalchemy import select, text
+
+from plan_b.issue import WorkEstimate, ConfidenceLevel
+from plan_b.issue_data_sources.jira import JiraIssue, IssueRecord
+from plan_b.issues_history import (
+    capture_plan_history, save_issues_history, issue_table, issue_history_table, original_estimate_table, remaining_estimate_table
+)
+from plan_b.plan import CapacityPlan, Project
+from plan_b.team import make_team, make_worker
+from tests.issue_data_sources.test_jira import _make_data_source, teams as jira_teams
+
+from . import TestMigrationsBase
+
+teams = [
+    make_team('Team Alpha', [make_worker('V.Ivanov')], bugfix_rate=0.8),
+    make_team('Team QA Alpha', [make_worker('B.Smithson')]),
+]
+
+
+def _make_record(key: str, status: str = 'Open', estimates: dict = None) -> IssueRecord:
+    return IssueRecord(
+        JiraIssue(
+            key=key, url=f'https://jira.domain/browse/{key}', type='Epic', summary=f'Epic {key}',
+            assignee='V.Ivanov', reporter=None, created=datetime(2019, 1, 10), resolved=None, due=None,
+            time_spent=None, severity=None, priority='Medium', components='[]', tags='None', qa_advice=None,
+            status=status, resolution=None, epic_link=None, comments=(), aggregated_orig_estimate=None,
+            orig_estimate=None
+        ),
+        estimates if estimates is not None else {
+            'Team Alpha': WorkEstimate(ConfidenceLevel.High, ConfidenceLevel.Low, implementation=28800 * 5),
+            'Team QA Alpha': WorkEstimate(qa_effort=28800),
+        }
+    )
+
+
+class TestIssuesHistory(TestMigrationsBase):
+
+    def setUp(self):
+        super().setUp()
+        upgrade_database(self.alembic_config, 'head')
+
+    def _save(self, records, captured_at: datetime) -> dict:
+        with self.db.ENGINE.begin() as connection:
+            return save_issues_history(connection, records, teams, captured_at)
+
+    def _versions(self, table) -> list:
+        with self.db.ENGINE.connect() as connection:
+            return connection.execute(
+                select([issue_table.c.key, table]).select_from(table.join(issue_table))
+                .order_by(issue_table.c.key, table.c.begin_datetime)
+            ).fetchall()
+
+    def test_versions(self):
+        day1, day2, day3 = datetime(2019, 2, 1), datetime(2019, 2, 2), datetime(2019, 2, 3)
+        result = self._save([_make_record('A-1'), _make_record('A-2')], day1)
+        self.assertEqual({'issue_history': (2, 0), 'original_estimate': (4, 0), 'remaining_estimate': (4, 0)}, result)
+
+        # nothing changed
+        result = self._save([_make_record('A-1'), _make_record('A-2')], day2)
+        self.assertEqual({'issue_history': (0, 0), 'original_estimate': (0, 0), 'remaining_estimate': (0, 0)}, result)
+
+        # A-1 is closed and QA estimate of A-2 is removed
+        result = self._save(
+            [
+                _make_record('A-1', status='Closed'),
+                _make_record('A-2', estimates={'Team Alpha': WorkEstimate(implementation=28800 * 5)}),
+            ],
+            day3
+        )
+        self.assertEqual({'issue_history': (2, 2), 'original_estimate': (0, 1), 'remaining_estimate': (2, 3)}, result)
+
+        issue_versions = self._versions(issue_history_table)
+        self.assertEqual(
+            [('A-1', day1, day3, 'Open', 2.0), ('A-1', day3, None, 'Closed', 2.0), ('A-2', day1, day3, 'Open', 2.0),
+             ('A-2', day3, None, 'Open', None)],
+            [(x.key, x.begin_datetime, x.end_datetime, x.status, x.design_level) for x in issue_versions]
+        )
+
+        remaining = [
+            (x.key, x.estimation) for x in self._versions(remaining_estimate_table) if x.end_datetime is None
+        ]
+        self.assertEqual([('A-1', 0), ('A-1', 0), ('A-2', 1.0)], remaining)
+        self.assertEqual(3, len([x for x in self._versions(original_estimate_table) if x.end_datetime is None]))
+
+
+    def test_capture_plan_history(self):
+        data_source = _make_data_source()
+        projects = [
+            Project('A1', 'some query for A1'),
+            Project('A1 hotfix', 'some query for A1 hotfix'),
+            Project('A1 copy', 'some query for A1'),
+        ]
+        plan = CapacityPlan(None, None, None, data_source, jira_teams, projects)
+        capture_plan_history(plan, self.DB_URL, datetime(2019, 2, 1))
+
+        # distinct queries are run once and issues they share are loaded once
+        self.assertEqual(2, data_source.jira_client.search_issues.call_count)
+        self.assertEqual(9, data_source.jira_client.comments.call_count)
+        self.assertEqual(9, len(self._versions(issue_history_table)))
+
+
+class TestIssuesHistoryLoadingMigration(TestMigrationsBase):
+    target_revision = '5b2f1c9d7e41'
+
+    def _resolved(self) -> list:
+        with self.db.ENGINE.connect() as connection:
+            return [x[0] for x in connection.execute(text('SELECT resolved FROM issue_history ORDER BY issue_id'))]
+
+    def test_resolved_conversion(self):
+        previous_revision = self.get_previous_alembic_revision()
+        upgrade_database(self.alembic_config, previous_revision)
+        with self.db.ENGINE.begin() as connection:
+            # server time zone must not affect conversion of unix time
+            connection.execute(text(f"ALTER DATABASE {self.db.ENGINE.url.database} SET timezone TO 'Asia/Tokyo'"))
+            connection.execute(text(
+                "INSERT INTO issue_type (id, name) VALUES (1, 'Epic');"
+                "INSERT INTO person (id, firstname, lastname, issue_tracker_name) VALUES (1, 'V', 'Ivanov', 'V.Ivanov');"
+                "INSERT INTO issue (id, key, url, created) VALUES "
+                "(1, 'A-1', 'https://jira.domain/browse/A-1', '2019-01-10'), "
+                "(2, 'A-2', 'https://jira.domain/browse/A-2', '2019-01-10');"
+                "INSERT INTO issue_history (begin_datetime, issue_id, type_id, resolved, summary, assignee_id, "
+                "reporter_id, status) VALUES "
+                "('2019-02-01', 1, 1, 1549886400, 'Epic A-1', 1, 1, 'Closed'), "
+                "('2019-02-01', 2, 1, NULL, 'Epic A-2', 1, 1, 'Open');"
+            ))
+        self.db.ENGINE.dispose()
+
+        upgrade_database(self.alembic_config, self.target_revision)
+        self.assertEqual([datetime(2019, 2, 11, 12, 0), None], self._resolved())
+
+        downgrade_database(self.alembic_config, previous_revision)
+        self.assertEqual([1549886400, None], self._resolved())
@@ -0,0 +1,183 @@
+"""
+Benchmark of #plan comments parsing on a generated corpus of comments,
+compares results and speed with the previous multi-pass implementation
+
+    python -m tests_performance.estimate_parsing --count 100000
+"""
+import random
+import re
+import time
+from argparse import ArgumentParser
+from typing import List, Optional, Tuple
+
+from plan_b.issue import (
+    WorkEstimate, parse_work_estimate_text, _parse_confidence_level, _parse_estimation, POSSIBLE_TOKENS,
+    POSSIBLE_REQS_LEVEL_TOKENS, POSSIBLE_DESIGN_LEVEL_TOKENS, POSSIBLE_ARCH_DESIGN_TOKENS, POSSIBLE_PERF_DESIGN_TOKENS,
+    POSSIBLE_IMPL_TOKENS, POSSIBLE_DOCUMENTATION_TOKENS, POSSIBLE_QA_EFFORT_TOKENS, POSSIBLE_TEAM_TOKENS
+)
+from plan_b.team import Team, Worker, TeamDirectory
+
+SEPARATORS_RX = re.compile('[;\n]')
+
+
+def _match_team_by_worker_name(worker_name: str, teams: List[Team]) -> Team:
+    for team in teams:
+        for worker in team.members:
+            surname = worker.name.split('.')[-1].lower()
+            if surname == worker_name.split('.')[-1].lower():
+                return team
+            if surname in worker_name:
+                return team
+
+
+def _set_property(estimate, property_name, possible_names, data_name, data_value, value_parser) -> bool:
+    if data_name in possible_names:
+        if getattr(estimate, property_name) is not None:
+            raise RuntimeError(f'{property_name} already specified in comment')
+        setattr(estimate, property_name, value_parser(data_value))
+        return True
+    return False
+
+
+def reference_parse_work_estimate_text(
+    text: str, author_name: str, team_by_name: dict
+) -> Tuple[Optional[WorkEstimate], Optional[str]]:
+    """
+    Previous multi-pass implementation of parse_work_estimate_text kept as a reference
+    """
+    text = text.strip()
+
+    if not text.startswith('#plan'):
+        return None, None
+
+    text = text.replace('#plan', '').strip()
+
+    text = re.sub(SEPARATORS_RX, ',', text)
+
+    lines = [t for t in [x.strip() for x in text.split(',')] if t]
+    tokens = []
+    for l in lines:
+        for start in POSSIBLE_TOKENS:
+            if l.startswith(start):
+                tokens.append(l)
+                break
+
+    kv = {k.strip().lower(): v.strip().lower() for k, v in [x.split(':') for x in tokens if ':' in x]}
+
+    matching_team_name = None
+    result = WorkEstimate()
+    for k, v in kv.items():
+        (
+            _set_property(result, 'reqs_level', POSSIBLE_REQS_LEVEL_TOKENS, k, v, _parse_confidence_level)
+            or _set_property(result, 'design_level', POSSIBLE_DESIGN_LEVEL_TOKENS, k, v, _parse_confidence_level)
+            or _set_property(result, 'arch_design', POSSIBLE_ARCH_DESIGN_TOKENS, k, v, _parse_estimation)
+            or _set_property(result, 'perf_design', POSSIBLE_PERF_DESIGN_TOKENS, k, v, _parse_estimation)
+            or _set_property(result, 'implementation', POSSIBLE_IMPL_TOKENS, k, v, _parse_estimation)
+            or _set_property(result, 'documentation', POSSIBLE_DOCUMENTATION_TOKENS, k, v, _parse_estimation)
+            or _set_property(result, 'qa_effort', POSSIBLE_QA_EFFORT_TOKENS, k, v, _parse_estimation)
+        )
+
+        if k in POSSIBLE_TEAM_TOKENS:
+            for team_name in team_by_name.keys():
+                if v in team_name.lower():
+                    matching_team_name = team_name
+
+    if matching_team_name is None:
+        team = _match_team_by_worker_name(author_name, [x for x in team_by_name.values()])
+        if team:
+            matching_team_name = team.name
+
+    return result, matching_team_name
+
+
+TEAMS = [
+    Team('Team Alpha', [Worker('V.Ivanov'), Worker('I.Petrov'), Worker('A.Sidorov')]),
+    Team('Team Beta', [Worker('J.Smith'), Worker('P.Jones'), Worker('A.Peterson')]),
+    Team('Team QA Alpha', [Worker('B.Smithson'), Worker('A.Johnson')]),
+]
+
+AUTHORS = ['V.Ivanov', 'I.Petrov', 'J.Smith', 'P.Jones', 'B.Smithson', 'A.Johnson', 'Mr.Coordinator']
+
+FREE_TEXT = [
+    'looks good to me',
+    'design med because client lib itself is not finalized yet',
+    '+ 3d - need to get data about licenses from server',
+    'see attached document for details',
+]
+
+
+def _make_plan_comment(rnd: random.Random) -> str:
+    items = []
+    for tokens, values in (
+        (POSSIBLE_REQS_LEVEL_TOKENS, ['hi', 'high', 'med', 'medium', 'lo', 'low']),
+        (POSSIBLE_DESIGN_LEVEL_TOKENS, ['hi', 'high', 'med', 'medium', 'lo', 'low']),
+        (POSSIBLE_ARCH_DESIGN_TOKENS, ['4h', '1d', '0.5w']),
+        (POSSIBLE_PERF_DESIGN_TOKENS, ['2d', '1w']),
+        (POSSIBLE_IMPL_TOKENS, ['10d', '1w', '5w', '3.5d']),
+        (POSSIBLE_DOCUMENTATION_TOKENS, ['1d', '0.5w']),
+        (POSSIBLE_QA_EFFORT_TOKENS, ['1d', '2w']),
+        (POSSIBLE_TEAM_TOKENS, ['alpha', 'beta', 'qa']),
+    ):
+        if rnd.random() < 0.6:
+            items.append(f'{rnd.choice(tokens)}{rnd.choice(["", " "])}:{rnd.choice(["", " ", "  "])}{rnd.choice(values)}')
+    items.extend(rnd.sample(FREE_TEXT, rnd.randint(0, 2)))
+    rnd.shuffle(items)
+
+    text = '#plan' + rnd.choice([' ', '\n'])
+    for item in items:
+        text += item + rnd.choice([', ', ';', '\n', ',\n '])
+    return text
+
+
+def make_comments_corpus(count: int, seed: int = 0, plan_ratio: float = 0.3) -> List[Tuple[str, str]]:
+    """
+    Generate comments as (author, body) tuples, plan_ratio of them are #plan comments
+    """
+    rnd = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        author = rnd.choice(AUTHORS)
+        if rnd.random() < plan_ratio:
+            corpus.append((author, _make_plan_comment(rnd)))
+        else:
+            corpus.append((author, ' '.join(rnd.sample(FREE_TEXT, rnd.randint(1, 3)))))
+    return corpus
+
+
+def _as_tuple(result):
+    estimate, team_name = result
+    if estimate is None:
+        return None
+    return tuple(getattr(estimate, x) for x in WorkEstimate.__slots__), team_name
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('--count', type=int, default=100000, help='number of comments to parse')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    corpus = make_comments_corpus(args.count, args.seed)
+    team_by_name = {x.name: x for x in TEAMS}
+    team_directory = TeamDirectory(TEAMS)
+
+    started = time.perf_counter()
+    reference = [reference_parse_work_estimate_text(body, author, team_by_name) for author, body in corpus]
+    reference_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    results = [parse_work_estimate_text(body, author, team_by_name, team_directory) for author, body in corpus]
+    parse_time = time.perf_counter() - started
+
+    mismatches = sum(1 for x, y in zip(reference, results) if _as_tuple(x) != _as_tuple(y))
+
+    print(f'comments: {len(corpus)}, #plan comments: {sum(1 for x in results if x[0] is not None)}')
+    print(f'reference parser: {reference_time:.3f}s')
+    print(f'compiled parser:  {parse_time:.3f}s ({reference_time / parse_time:.1f}x)')
+    print(f'mismatching results: {mismatches}')
+    if mismatches:
+        exit(1)
+
+
+if __name__ == '__main__':
+    main()
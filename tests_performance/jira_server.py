@@ -0,0 +1,350 @@
+"""
+Local stand-in for Jira REST API serving issues and comments of synthetic plan over HTTP.
+Latency, server side page size limit, rate limiting and error injection are configurable,
+so the real Jira client and data source could be measured without network access
+
+    python -m tests_performance.jira_server --size medium --port 8080 --latency 0.05 --rate-limit 50
+"""
+import json
+import random
+import re
+import time
+from argparse import ArgumentParser
+from collections import Counter
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from threading import Lock, Thread
+from typing import Dict, List, Optional
+from urllib.parse import urlparse, parse_qs, unquote
+
+from tests_performance.synthetic import PlanSize, SyntheticPlan, RawIssue, RawFields, SIZES, PROJECT_RX
+
+API_PREFIX = '/rest/api/2/'
+
+COMMENTS_PATH_RX = re.compile(r'^issue/([A-Z0-9]+-\d+)/comment$')
+
+# conditions added to data queries by JiraIssuesDataSource, the rest of JQL is ignored
+IN_CONDITION_RX = re.compile(r'\b(issuetype|status|key) in \(([^)]*)\)', re.IGNORECASE)
+UPDATED_CONDITION_RX = re.compile(r'\bupdated >= "([^"]+)"', re.IGNORECASE)
+JQL_DATETIME_FORMAT = '%Y/%m/%d %H:%M'
+
+ALL_FIELDS = '*all'
+
+# time of the last update of every synthetic issue, so incremental sync finds no updated issues
+UPDATED = datetime(2019, 1, 1)
+
+
+def _named(value) -> Optional[dict]:
+    return {'name': value.name, 'displayName': value.name} if value is not None else None
+
+
+def _comment_to_json(idx: int, comment) -> dict:
+    return {'id': str(idx), 'author': _named(comment.author), 'body': comment.body}
+
+
+def _comments_to_json(comments: list) -> dict:
+    return {
+        'startAt': 0,
+        'maxResults': len(comments),
+        'total': len(comments),
+        'comments': [_comment_to_json(i, x) for i, x in enumerate(comments)]
+    }
+
+
+def issue_to_json(issue: RawIssue) -> dict:
+    """
+    Issue in the format of Jira search results, with all fields
+    """
+    f = issue.fields
+    return {
+        'id': issue.key.split('-')[1].lstrip('0'),
+        'key': issue.key,
+        'fields': {
+            'issuetype': _named(f.issuetype),
+            'summary': f.summary,
+            'assignee': _named(f.assignee),
+            'reporter': _named(f.reporter),
+            'created': f.created,
+            'updated': UPDATED.isoformat(),
+            'resolutiondate': f.resolutiondate,
+            'duedate': f.duedate,
+            'aggregatetimespent': f.aggregatetimespent,
+            'customfield_10073': {'value': f.customfield_10073.value} if f.customfield_10073 else None,
+            'priority': _named(f.priority),
+            'components': f.components,
+            'customfield_10180': f.customfield_10180,
+            'customfield_16390': f.customfield_16390,
+            'status': _named(f.status),
+            'resolution': _named(f.resolution),
+            'customfield_13694': f.customfield_13694,
+            'aggregatetimeoriginalestimate': f.aggregatetimeoriginalestimate,
+            'timeoriginalestimate': f.timeoriginalestimate,
+            'comment': _comments_to_json(f.comment.comments),
+        }
+    }
+
+
+def _split_jql_list(values: str) -> List[str]:
+    return [x.strip().strip('"').lower() for x in values.split(',') if x.strip()]
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class MockJiraServer:
+    """
+    HTTP server imitating Jira REST API for synthetic plan, runs in a background thread.
+    Requests above rate limit are answered with 429 and injected errors are answered with error_status,
+    both with Retry-After header, which makes Jira client retry them
+    """
+
+    def __init__(
+        self,
+        plan: SyntheticPlan,
+        latency: float = 0,
+        max_page_size: int = 1000,
+        rate_limit: Optional[float] = None,
+        error_rate: float = 0,
+        error_status: int = 503,
+        seed: int = 0,
+        host: str = '127.0.0.1',
+        port: int = 0
+    ):
+        self.plan: SyntheticPlan = plan
+        self.latency: float = latency
+        self.max_page_size: int = max_page_size
+        self.rate_limit: Optional[float] = rate_limit  # requests per second
+        self.error_rate: float = error_rate
+        self.error_status: int = error_status
+
+        self.stats: Counter = Counter()
+        self._lock: Lock = Lock()
+        self._random: random.Random = random.Random(seed)
+        self._tokens: float = self._bucket_capacity()
+        self._tokens_updated: float = time.monotonic()
+        self._issues_by_project: Dict[str, List[dict]] = {}
+        self._issues_by_key: Dict[str, dict] = {}
+
+        self._http_server: HTTPServer = _ThreadingHTTPServer((host, port), _RequestHandler)
+        self._http_server.mock = self
+        self._thread: Optional[Thread] = None
+
+    @property
+    def url(self) -> str:
+        """
+        URL to use in data source config, credentials are not checked
+        """
+        host, port = self._http_server.server_address[:2]
+        return f'http://user:password@{host}:{port}'
+
+    def start(self) -> 'MockJiraServer':
+        self._thread = Thread(target=self._http_server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._http_server.shutdown()
+        self._http_server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = Counter()
+
+    def set_faults(self, rate_limit: Optional[float] = None, error_rate: float = 0):
+        with self._lock:
+            self.rate_limit = rate_limit
+            self.error_rate = error_rate
+            self._tokens = self._bucket_capacity()
+            self._tokens_updated = time.monotonic()
+
+    def preload(self):
+        """
+        Generate issues of all projects, so that generation time is not included in measurements
+        """
+        for project_name in self.plan.project_names:
+            self._get_issues(project_name)
+
+    def _get_issues(self, project_name: str) -> List[dict]:
+        with self._lock:
+            issues = self._issues_by_project.get(project_name)
+            if issues is None:
+                issues = [issue_to_json(x) for x in self.plan.make_issues(project_name)]
+                self._issues_by_project[project_name] = issues
+                self._issues_by_key.update((x['key'], x) for x in issues)
+            return issues
+
+    def _get_issue(self, key: str) -> Optional[dict]:
+        self._get_issues(key.split('-')[0])
+        return self._issues_by_key.get(key)
+
+    def _bucket_capacity(self) -> float:
+        # at least one request fits, so that limits below one request per second are reachable
+        return max(1.0, self.rate_limit) if self.rate_limit else 0
+
+    def _take_token(self) -> bool:
+        """
+        Token bucket allowing bursts of up to rate limit requests
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self._bucket_capacity(), self._tokens + (now - self._tokens_updated) * self.rate_limit
+            )
+            self._tokens_updated = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def admit(self) -> Optional[int]:
+        """
+        Status of error response for the next request, None if request should be served
+        """
+        if self.rate_limit and not self._take_token():
+            self.count('throttled')
+            return 429
+        with self._lock:
+            failed = self.error_rate and self._random.random() < self.error_rate
+        if failed:
+            self.count('errors')
+            return self.error_status
+        return None
+
+    def count(self, name: str, value: int = 1):
+        with self._lock:
+            self.stats[name] += value
+
+    def search(self, jql: str, start_at: int, max_results: int, fields: str) -> dict:
+        issues = self._filter(jql)
+        page = issues[start_at:start_at + min(max_results, self.max_page_size)]
+
+        requested_fields = set(fields.split(',')) if fields else {ALL_FIELDS}
+        if ALL_FIELDS not in requested_fields:
+            page = [
+                dict(x, fields={k: v for k, v in x['fields'].items() if k in requested_fields}) for x in page
+            ]
+        return {'startAt': start_at, 'maxResults': len(page), 'total': len(issues), 'issues': page}
+
+    def _filter(self, jql: str) -> List[dict]:
+        conditions = {name.lower(): _split_jql_list(values) for name, values in IN_CONDITION_RX.findall(jql)}
+
+        if 'key' in conditions:
+            issues = [x for x in (self._get_issue(k.upper()) for k in conditions['key']) if x is not None]
+        else:
+            project = PROJECT_RX.search(jql)
+            issues = self._get_issues(project.group(1)) if project else []
+
+        for name in ('issuetype', 'status'):
+            if name in conditions:
+                issues = [x for x in issues if x['fields'][name]['name'].lower() in conditions[name]]
+
+        updated_since = UPDATED_CONDITION_RX.search(jql)
+        if updated_since and datetime.strptime(updated_since.group(1), JQL_DATETIME_FORMAT) > UPDATED:
+            issues = []
+        return issues
+
+    def comments(self, key: str) -> Optional[dict]:
+        issue = self._get_issue(key)
+        return issue['fields']['comment'] if issue else None
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status: int, data, headers: Dict[str, str] = None):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.mock.count('bytes_sent', len(body))
+
+    def do_GET(self):
+        mock: MockJiraServer = self.server.mock
+        url = urlparse(self.path)
+        # list parameters like fields could be passed either comma separated or repeated
+        params = {k: ','.join(v) for k, v in parse_qs(url.query).items()}
+        path = unquote(url.path)[len(API_PREFIX):] if url.path.startswith(API_PREFIX) else None
+
+        if mock.latency:
+            time.sleep(mock.latency)
+        mock.count('requests')
+
+        status = mock.admit()
+        if status is not None:
+            self._send_json(status, {'errorMessages': ['Injected error']}, {'Retry-After': '1'})
+            return
+
+        if path == 'serverInfo':
+            self._send_json(200, {'version': '8.0.0', 'versionNumbers': [8, 0, 0], 'deploymentType': 'Server'})
+        elif path == 'field':
+            self._send_json(200, [{'id': x, 'name': x} for x in RawFields._fields + ('updated',)])
+        elif path == 'search':
+            mock.count('search_requests')
+            self._send_json(200, mock.search(
+                params.get('jql', ''),
+                int(params.get('startAt', 0)),
+                int(params.get('maxResults', 50)),
+                params.get('fields')
+            ))
+        elif path is not None and COMMENTS_PATH_RX.match(path):
+            mock.count('comments_requests')
+            comments = mock.comments(COMMENTS_PATH_RX.match(path).group(1))
+            if comments is None:
+                self._send_json(404, {'errorMessages': ['Issue does not exist']})
+            else:
+                self._send_json(200, comments)
+        else:
+            self._send_json(404, {'errorMessages': [f'Unknown resource {url.path}']})
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('--size', choices=sorted(SIZES.keys()), default='small', help='predefined plan size')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0, help='delay of every response in seconds')
+    parser.add_argument('--max-page-size', type=int, default=1000, help='max number of issues returned at once')
+    parser.add_argument('--rate-limit', type=float, help='requests per second, the rest are answered with 429')
+    parser.add_argument('--error-rate', type=float, default=0, help='share of requests answered with error')
+    parser.add_argument('--error-status', type=int, default=503, help='status of injected errors')
+    args = parser.parse_args()
+
+    size: PlanSize = SIZES[args.size]
+    server = MockJiraServer(
+        SyntheticPlan(size, args.seed),
+        latency=args.latency,
+        max_page_size=args.max_page_size,
+        rate_limit=args.rate_limit,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+        port=args.port
+    )
+    print(f'serving {size} plan at {server.url}, projects are queried with "project = P000"')
+    with server:
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+    print(dict(server.stats))
+
+
+if __name__ == '__main__':
+    main()
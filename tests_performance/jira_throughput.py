@@ -0,0 +1,74 @@
+"""
+Benchmark of Jira data source throughput over HTTP against local Jira stand-in,
+every scenario exports issues of all projects of synthetic plan with different data source options
+and server behaviour: concurrency, inline comments, cache, rate limiting and errors retried by Jira client
+
+    python -m tests_performance.jira_throughput --size small --latency 0.05
+"""
+import os
+import time
+from argparse import ArgumentParser
+from tempfile import TemporaryDirectory
+
+from plan_b.exporters.config import make_capacity_plan
+from tests_performance.jira_server import MockJiraServer
+from tests_performance.synthetic import SyntheticPlan, SIZES
+
+
+def _run_scenario(synthetic_plan: SyntheticPlan, server: MockJiraServer, data_source_options: dict) -> dict:
+    config = synthetic_plan.make_config()
+    config['issue_data_sources'][0].update(url=server.url, **data_source_options)
+    plan = make_capacity_plan(config)
+
+    server.reset_stats()
+    started = time.perf_counter()
+    plan._export_issues_for_projects()
+    elapsed = time.perf_counter() - started
+
+    issues = sum(len(x.issues) for x in plan.projects)
+    return dict(server.stats, seconds=elapsed, issues=issues)
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('--size', choices=sorted(SIZES.keys()), default='small', help='predefined plan size')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.05, help='delay of every response in seconds')
+    parser.add_argument('--max-page-size', type=int, default=50, help='max number of issues returned at once')
+    parser.add_argument('--rate-limit', type=float, default=20, help='requests per second for throttled scenario')
+    parser.add_argument('--error-rate', type=float, default=0.05, help='share of failed requests for errors scenario')
+    args = parser.parse_args()
+
+    synthetic_plan = SyntheticPlan(SIZES[args.size], args.seed)
+    print(
+        f'plan size: {synthetic_plan.size}, latency: {args.latency}s, max page size: {args.max_page_size}'
+    )
+    print(f'{"scenario":<22} {"seconds":>8} {"issues/s":>9} {"requests":>9} {"throttled":>10} {"errors":>7}')
+
+    with TemporaryDirectory() as cache_dir, \
+            MockJiraServer(
+                synthetic_plan, latency=args.latency, max_page_size=args.max_page_size, seed=args.seed
+            ) as server:
+        server.preload()
+        cache_path = os.path.join(cache_dir, 'cache.sqlite')
+        scenarios = (
+            ('sequential', {'comments_concurrency': 1, 'query_concurrency': 1}, {}),
+            ('concurrent', {}, {}),
+            ('inline comments', {'inline_comments': True}, {}),
+            ('bugs counted on server', {'count_bugs_on_server': True}, {}),
+            ('cold cache', {'cache': cache_path}, {}),
+            ('warm cache', {'cache': cache_path}, {}),
+            (f'{args.rate_limit:g} requests/s limit', {}, {'rate_limit': args.rate_limit}),
+            (f'{args.error_rate:.0%} errors', {}, {'error_rate': args.error_rate}),
+        )
+        for title, data_source_options, faults in scenarios:
+            server.set_faults(**faults)
+            result = _run_scenario(synthetic_plan, server, data_source_options)
+            print(
+                f'{title:<22} {result["seconds"]:>8.2f} {result["issues"] / result["seconds"]:>9.0f} '
+                f'{result.get("requests", 0):>9} {result.get("throttled", 0):>10} {result.get("errors", 0):>7}'
+            )
+
+
+if __name__ == '__main__':
+    main()
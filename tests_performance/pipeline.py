@@ -0,0 +1,207 @@
+"""
+Benchmark of the whole export pipeline on synthetic plans of given size, Jira client is replaced
+with in-memory stand-in serving generated issues. Time and peak memory of every phase are compared
+with baselines stored in baselines.json, which is specific to the machine and is not committed:
+results of the first run of a predefined size become its baseline
+
+    python -m tests_performance.pipeline --size medium
+    python -m tests_performance.pipeline --size medium --save-baseline
+    python -m tests_performance.pipeline --projects 3 --issues 10000 --teams 4 --months 12
+
+Best time out of several runs is reported, peak memory is measured with tracemalloc in a separate run,
+so that tracing does not affect timings
+"""
+import json
+import os
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from collections import OrderedDict
+from tempfile import TemporaryDirectory
+from typing import Callable, Dict, List, Optional
+from unittest.mock import patch
+
+from plan_b.team import Team, TeamDirectory
+from plan_b.exporters.config import make_capacity_plan, XlsxCapacityPlan
+from plan_b.exporters.xlsx import export_plan
+from plan_b.exporters.xlsx.layout import make_plan_layout
+from plan_b.exporters.xlsx.metadata import load_metadata
+from plan_b.issue_data_sources.jira import JiraIssue, BUG_TYPES, OPEN_BUG_STATUSES, WORK_ITEM_TYPES
+from tests_performance.synthetic import PlanSize, SyntheticPlan, SyntheticJira, SIZES
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+PHASES = ('fetch_normalize', 'parse', 'layout', 'write', 'metadata_reload')
+
+
+class PipelineRun:
+    """
+    Phases of plan export run one by one, every phase uses results of previous ones
+    """
+
+    def __init__(self, synthetic_plan: SyntheticPlan, output_dir: str):
+        self.synthetic_plan: SyntheticPlan = synthetic_plan
+        self.plan: XlsxCapacityPlan = make_capacity_plan(synthetic_plan.make_config())
+        self.output_file: str = os.path.join(output_dir, 'plan.xlsx')
+        self.jira_issues: Dict[str, List[JiraIssue]] = {}
+        self.layout = None
+
+    @property
+    def _teams(self) -> List[Team]:
+        return self.plan.teams
+
+    def fetch_normalize(self):
+        data_source = self.plan.data_source
+        data_source._connect()
+        for project in self.plan.projects:
+            issues = [x for page in data_source._search_jira_issues(project.data_query) for x in page]
+            self.jira_issues[project.name] = data_source._load_comments_for_issues(
+                [x for x in issues if x.type in WORK_ITEM_TYPES]
+            ) + [x for x in issues if x.type in BUG_TYPES]
+        data_source.close()
+
+    def parse(self):
+        data_source = self.plan.data_source
+        team_directory = TeamDirectory(self._teams)
+        for project in self.plan.projects:
+            jira_issues = self.jira_issues[project.name]
+            project.known_bugs_count = {x: 0 for x in self._teams if x.is_dev()}
+            for x in jira_issues:
+                if x.type in BUG_TYPES and x.status.lower() in OPEN_BUG_STATUSES:
+                    data_source._count_known_bug(x.assignee, x.url, team_directory, project.known_bugs_count)
+            project.issues = data_source._make_issues(
+                [x for x in jira_issues if x.type in WORK_ITEM_TYPES], self._teams, team_directory
+            )
+
+    def make_layout(self):
+        plan = self.plan
+        self.layout = make_plan_layout(
+            plan.projects, plan.teams, plan.start_date, plan.end_date, plan.production_calendar
+        )
+
+    def write(self):
+        plan = self.plan
+        export_plan(
+            plan.projects, plan.teams, plan.start_date, plan.end_date, plan.production_calendar, self.output_file, None
+        )
+
+    def reload_metadata(self):
+        load_metadata(self.output_file)
+
+    def phases(self) -> List[Callable]:
+        return [self.fetch_normalize, self.parse, self.make_layout, self.write, self.reload_metadata]
+
+
+def _run(synthetic_plan: SyntheticPlan, measure: Callable[[Callable], float]) -> List[float]:
+    with TemporaryDirectory() as output_dir, patch('jira.JIRA', return_value=SyntheticJira(synthetic_plan)):
+        run = PipelineRun(synthetic_plan, output_dir)
+        return [measure(phase) for phase in run.phases()]
+
+
+def _measure_time(phase: Callable) -> float:
+    started = time.perf_counter()
+    phase()
+    return time.perf_counter() - started
+
+
+def _measure_memory(phase: Callable) -> float:
+    """
+    Peak size of memory allocated by the phase in megabytes
+    """
+    tracemalloc.start()
+    try:
+        phase()
+        return tracemalloc.get_traced_memory()[1] / (1 << 20)
+    finally:
+        tracemalloc.stop()
+
+
+def run_benchmark(size: PlanSize, seed: int = 0, repeat: int = 3, trace_memory: bool = True) -> Dict[str, dict]:
+    """
+    Best time of every phase out of several runs and peak memory of a single traced run
+    """
+    synthetic_plan = SyntheticPlan(size, seed)
+    timings = [min(x) for x in zip(*(_run(synthetic_plan, _measure_time) for _ in range(repeat)))]
+    memory = _run(synthetic_plan, _measure_memory) if trace_memory else [None] * len(PHASES)
+    return OrderedDict(
+        (phase, {'seconds': round(seconds, 4), 'peak_memory_mb': round(mb, 2) if mb is not None else None})
+        for phase, seconds, mb in zip(PHASES, timings, memory)
+    )
+
+
+def _load_baselines() -> dict:
+    if not os.path.exists(BASELINES_PATH):
+        return {}
+    with open(BASELINES_PATH) as baselines_file:
+        return json.load(baselines_file, object_pairs_hook=OrderedDict)
+
+
+def _format_change(value: Optional[float], baseline: Optional[float]) -> str:
+    if value is None or not baseline:
+        return ''
+    return f'{(value - baseline) / baseline * 100:+.0f}%'
+
+
+def report(results: Dict[str, dict], baseline: Optional[Dict[str, dict]], tolerance: float) -> List[str]:
+    """
+    Print results compared to baseline, names of regressed metrics are returned
+    """
+    regressions = []
+    print(f'{"phase":<16} {"seconds":>9} {"change":>7} {"peak MB":>9} {"change":>7}')
+    for phase, values in results.items():
+        phase_baseline = (baseline or {}).get(phase, {})
+        cells = []
+        for metric in ('seconds', 'peak_memory_mb'):
+            value, baseline_value = values[metric], phase_baseline.get(metric)
+            cells.append(f'{value if value is not None else "-":>9} {_format_change(value, baseline_value):>7}')
+            if value is not None and baseline_value and value > baseline_value * (1 + tolerance):
+                regressions.append(f'{phase}.{metric}')
+        print(f'{phase:<16} {" ".join(cells)}')
+    return regressions
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('--size', choices=sorted(SIZES.keys()), default='small', help='predefined plan size')
+    parser.add_argument('--projects', type=int, help='number of projects, overrides predefined size')
+    parser.add_argument('--issues', type=int, help='number of issues per project, overrides predefined size')
+    parser.add_argument('--teams', type=int, help='number of teams, overrides predefined size')
+    parser.add_argument('--months', type=int, help='number of months of plan period, overrides predefined size')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3, help='number of timed runs, best time is reported')
+    parser.add_argument('--no-memory', dest='trace_memory', action='store_false', help='skip memory measurement')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative increase over baseline')
+    parser.add_argument(
+        '--save-baseline', action='store_true', help='store results as baseline of the size, replacing existing one'
+    )
+    args = parser.parse_args()
+
+    size = SIZES[args.size]
+    overrides = {x: getattr(args, x) for x in ('projects', 'issues', 'teams', 'months') if getattr(args, x)}
+    name = args.size
+    if overrides:
+        size = PlanSize(**dict(vars(size), **overrides))
+        name = 'custom'
+    print(f'plan size: {size}, seed: {args.seed}')
+
+    if args.save_baseline and name == 'custom':
+        raise RuntimeError('Baselines are stored for predefined sizes only')
+
+    results = run_benchmark(size, args.seed, args.repeat, args.trace_memory)
+    baselines = _load_baselines()
+    baseline = baselines.get(name) if name != 'custom' else None
+    regressions = report(results, baseline, args.tolerance)
+
+    if args.save_baseline or (baseline is None and name != 'custom'):
+        baselines[name] = results
+        with open(BASELINES_PATH, 'w') as baselines_file:
+            json.dump(baselines, baselines_file, indent=2)
+            baselines_file.write('\n')
+        print(f'baseline of {name} plan saved to {BASELINES_PATH}')
+    elif regressions:
+        print(f'regressions over {args.tolerance:.0%} tolerance: {", ".join(regressions)}')
+        exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark of CLI startup time, every command is run in a fresh interpreter several times
+and median wall time is reported along with the time of importing all heavy dependencies eagerly,
+as the app did before they were imported on demand
+
+    python -m tests_performance.startup --runs 10
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser
+from typing import List
+
+DEFAULT_CONFIG = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests', 'cli', 'data', 'config-test.yml'
+)
+
+HEAVY_MODULES = ('jira', 'xlsxwriter', 'dateutil.parser', 'dateutil.rrule', 'yaml')
+
+
+def _measure(command: List[str], runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        timings.append(time.perf_counter() - started)
+        if result.returncode != 0:
+            raise RuntimeError(f'Command {" ".join(command)} failed: {result.stderr.decode()}')
+    return statistics.median(timings)
+
+
+def _loaded_heavy_modules(statement: str) -> List[str]:
+    output = subprocess.check_output([
+        sys.executable,
+        '-c',
+        f'import sys; {statement}; print(",".join(x for x in {HEAVY_MODULES!r} if x in sys.modules))'
+    ])
+    return [x for x in output.decode().strip().split(',') if x]
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('--runs', type=int, default=10, help='number of runs of every command')
+    parser.add_argument('--config', default=DEFAULT_CONFIG, help='config file to check')
+    args = parser.parse_args()
+
+    baseline = _measure([sys.executable, '-c', 'pass'], args.runs)
+    eager = _measure([sys.executable, '-c', f'import {", ".join(HEAVY_MODULES)}, plan_b.cli'], args.runs)
+    cases = [
+        ('plan_b --help', [sys.executable, '-m', 'plan_b.cli', '--help']),
+        ('plan_b --check-config', [sys.executable, '-m', 'plan_b.cli', '--config', args.config, '--check-config']),
+    ]
+
+    print(f'interpreter startup:     {baseline:.3f}s')
+    print(f'eager heavy imports:     {eager:.3f}s')
+    for title, command in cases:
+        elapsed = _measure(command, args.runs)
+        print(f'{title + ":":<24} {elapsed:.3f}s ({(eager - baseline) / max(elapsed - baseline, 1e-6):.1f}x)')
+
+    loaded = _loaded_heavy_modules('import plan_b.cli')
+    print(f'heavy modules loaded by plan_b.cli: {", ".join(loaded) or "none"}')
+    if loaded:
+        exit(1)
+
+
+if __name__ == '__main__':
+    main()